@@ -0,0 +1,194 @@
+"""
+Controlul admiterii și planificarea joburilor de transcriere în proces.
+
+Un job nou cere un bilet cu submit(). Biletul rulează imediat dacă sunt
+locuri libere (cel mult MAX_JOBS_PER_NODE joburi simultan în proces, cel
+mult MAX_RUNNING_PER_SESSION pe sesiune); altfel intră în coadă. Din coadă
+se alege întâi jobul cel mai scurt (durata estimată), cu îmbătrânire:
+fiecare secundă de așteptare scade prioritatea efectivă cu AGING_RATE
+secunde, ca un job lung să nu aștepte la nesfârșit.
+
+Peste capacitate, cererea se respinge imediat cu un mesaj clar: prea multe
+joburi ale aceleiași sesiuni, coadă plină sau start estimat peste
+MAX_QUEUE_WAIT_S. Biletul expune poziția în coadă și timpul estimat până la
+start (position, eta_s); release() eliberează locul sau scoate biletul din
+coadă.
+"""
+import itertools
+import os
+import threading
+import time
+
+import eta
+
+MAX_JOBS_PER_NODE = max(1, int(os.environ.get("WORKER_CONCURRENCY", "2")))
+MAX_RUNNING_PER_SESSION = int(os.environ.get("MAX_RUNNING_PER_SESSION", "1"))
+MAX_JOBS_PER_SESSION = int(os.environ.get("MAX_JOBS_PER_SESSION", "2"))
+MAX_QUEUE = int(os.environ.get("MAX_QUEUE", "20"))
+MAX_QUEUE_WAIT_S = float(os.environ.get("MAX_QUEUE_WAIT_S", str(30 * 60)))
+
+AGING_RATE = 1.0
+
+# Durata presupusă a unui job fără estimare
+DEFAULT_JOB_S = 180
+
+QUEUED = "queued"
+RUNNING = "running"
+RELEASED = "released"
+
+
+class Ticket:
+    """Un job admis: în coadă sau în rulare"""
+
+    def __init__(self, ticket_id: int, session_id: str, expected_s: float, label: str = ""):
+        self.ticket_id = ticket_id
+        self.session_id = session_id
+        self.expected_s = expected_s
+        self.label = label
+        self.state = QUEUED
+        self.enqueued_at = time.time()
+        self.started_at = None
+        self._granted = threading.Event()
+
+    def priority(self, now: float) -> float:
+        return self.expected_s - AGING_RATE * (now - self.enqueued_at)
+
+    def remaining_s(self, now: float) -> float:
+        return max(self.expected_s - (now - (self.started_at or now)), 5.0)
+
+    @property
+    def running(self) -> bool:
+        return self.state == RUNNING
+
+    def wait(self, timeout: float = None) -> bool:
+        """True când biletul a primit un loc"""
+        return self._granted.wait(timeout)
+
+    def position(self) -> int:
+        """Poziția în coadă (1 = următorul), 0 dacă rulează"""
+        return scheduler.position(self)
+
+    def eta_s(self) -> float:
+        """Secundele estimate până la start"""
+        return scheduler.eta_s(self)
+
+
+class Scheduler:
+    def __init__(self, max_jobs: int = MAX_JOBS_PER_NODE):
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._running = []
+        self._queue = []
+
+    def _ordered_queue(self, now: float) -> list:
+        return sorted(self._queue, key=lambda ticket: (ticket.priority(now), ticket.ticket_id))
+
+    def _running_for(self, session_id: str) -> int:
+        return sum(1 for ticket in self._running if ticket.session_id == session_id)
+
+    def _dispatch(self):
+        """Pornește biletele eligibile cât timp sunt locuri (sub _lock)"""
+        now = time.time()
+        for ticket in self._ordered_queue(now):
+            if len(self._running) >= self.max_jobs:
+                break
+            if self._running_for(ticket.session_id) >= MAX_RUNNING_PER_SESSION:
+                continue
+            self._queue.remove(ticket)
+            ticket.state = RUNNING
+            ticket.started_at = now
+            self._running.append(ticket)
+            ticket._granted.set()
+
+    def _start_times(self, now: float) -> dict:
+        """Startul estimat pentru fiecare bilet din coadă (sub _lock)"""
+        slots = sorted(ticket.remaining_s(now) for ticket in self._running)
+        slots += [0.0] * (self.max_jobs - len(slots))
+        starts = {}
+        for ticket in self._ordered_queue(now):
+            slots.sort()
+            start = slots[0]
+            starts[ticket.ticket_id] = start
+            slots[0] = start + ticket.expected_s
+        return starts
+
+    def submit(self, session_id: str, expected_s: float = None, label: str = ""):
+        """
+        Admite un job. Returnează (bilet, None) sau (None, motivul respingerii).
+        Biletul poate fi deja în rulare; altfel se așteaptă cu ticket.wait().
+        """
+        expected_s = expected_s or DEFAULT_JOB_S
+        with self._lock:
+            session_jobs = sum(1 for ticket in self._running + self._queue if ticket.session_id == session_id)
+            if session_jobs >= MAX_JOBS_PER_SESSION:
+                return None, (f"Aveți deja {session_jobs} joburi în lucru. "
+                              f"Așteptați să se termine înainte de a porni altul.")
+            if len(self._queue) >= MAX_QUEUE:
+                return None, "Serverul este la capacitate maximă. Încercați din nou în câteva minute."
+
+            ticket = Ticket(next(self._ids), session_id, expected_s, label)
+            self._queue.append(ticket)
+            self._dispatch()
+            if not ticket.running:
+                wait_s = self._start_times(time.time()).get(ticket.ticket_id, 0.0)
+                if wait_s > MAX_QUEUE_WAIT_S:
+                    self._queue.remove(ticket)
+                    ticket.state = RELEASED
+                    return None, (f"Coada este prea lungă (start estimat în ~{wait_s / 60:.0f} minute). "
+                                  f"Încercați din nou mai târziu.")
+            return ticket, None
+
+    def release(self, ticket: Ticket):
+        """Eliberează locul (sau scoate biletul din coadă) și pornește următorul"""
+        with self._lock:
+            if ticket in self._running:
+                self._running.remove(ticket)
+            elif ticket in self._queue:
+                self._queue.remove(ticket)
+            ticket.state = RELEASED
+            self._dispatch()
+
+    def position(self, ticket: Ticket) -> int:
+        with self._lock:
+            if ticket.state != QUEUED:
+                return 0
+            ordered = self._ordered_queue(time.time())
+            return ordered.index(ticket) + 1 if ticket in ordered else 0
+
+    def eta_s(self, ticket: Ticket) -> float:
+        with self._lock:
+            if ticket.state != QUEUED:
+                return 0.0
+            return self._start_times(time.time()).get(ticket.ticket_id, 0.0)
+
+    def snapshot(self) -> dict:
+        """Starea curentă pentru afișare"""
+        with self._lock:
+            return {
+                "running": len(self._running),
+                "queued": len(self._queue),
+                "capacity": self.max_jobs,
+            }
+
+
+def estimate_job_seconds(source_type: str, file_size_mb: float = 0, duration_s: float = None,
+                         preprocess: bool = False, db_file=None) -> float:
+    """Durata estimată a unui job, din modelul ETA (eta.py)"""
+    return eta.estimate_total(source_type, file_size_mb or None, duration_s,
+                              preprocess=preprocess, db_file=db_file) or DEFAULT_JOB_S
+
+
+scheduler = Scheduler()
+
+
+def submit(session_id: str, expected_s: float = None, label: str = ""):
+    return scheduler.submit(session_id, expected_s, label)
+
+
+def release(ticket: Ticket):
+    scheduler.release(ticket)
+
+
+def snapshot() -> dict:
+    return scheduler.snapshot()
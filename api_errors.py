@@ -0,0 +1,249 @@
+"""
+Clasificarea erorilor Gemini și politica comună de reîncercare.
+
+classify(eroare) întoarce un ApiFailure cu tipul erorii:
+    RATE_LIMITED     429 pe limitele pe minut; trece după o scurtă așteptare
+    QUOTA_EXHAUSTED  cota zilnică sau facturarea; cheia se exclude o vreme
+    INVALID_KEY      cheie invalidă sau expirată; se exclude
+    OVERLOADED       500/503, model supraîncărcat; trece după o așteptare
+    DEADLINE         504 sau timeout local; alt model (mai rapid) poate ajuta
+    OTHER            restul (cerere greșită, fișier invalid, 403 / PERMISSION_DENIED:
+                     acces refuzat la model, regiune sau fișier, nu neapărat cheia)
+Tipul se deduce din codul HTTP și statusul google.rpc ale erorii
+(google.genai.errors.APIError), din detaliile QuotaFailure/RetryInfo și abia
+la final din textul mesajului.
+
+call_with_retry reîncearcă doar RATE_LIMITED și OVERLOADED, cu backoff
+exponențial cu jitter complet, respectând întârzierea cerută de server
+(RetryInfo.retryDelay, antetul Retry-After sau "retry in Ns" din mesaj).
+Cheile invalide sau epuizate se exclud cu exclude_key, pentru toate
+sesiunile procesului; is_excluded le filtrează la alegerea cheii.
+"""
+import random
+import re
+import threading
+import time
+
+RATE_LIMITED = "rate_limited"
+QUOTA_EXHAUSTED = "quota_exhausted"
+INVALID_KEY = "invalid_key"
+OVERLOADED = "overloaded"
+DEADLINE = "deadline"
+OTHER = "other"
+
+RETRYABLE = {RATE_LIMITED, OVERLOADED}
+KEY_FATAL = {INVALID_KEY, QUOTA_EXHAUSTED}
+
+# Backoff: min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2^încercare), cu jitter complet
+BACKOFF_BASE_S = 2.0
+BACKOFF_CAP_S = 60.0
+MAX_ATTEMPTS = 5
+# Timpul total maxim de așteptare pentru un apel
+MAX_WAIT_S = 180.0
+
+# Cât timp se exclude o cheie cu cota epuizată (fără indicație de la server)
+QUOTA_COOLDOWN_S = 3600
+# Cheile invalide rămân excluse până la repornirea procesului
+INVALID_KEY_COOLDOWN_S = float("inf")
+
+MESSAGES = {
+    RATE_LIMITED: "⏳ Limită de rată API atinsă; încercați din nou în câteva minute",
+    QUOTA_EXHAUSTED: "❌ Quota API depășită",
+    INVALID_KEY: "❌ Cheie API invalidă sau expirată",
+    OVERLOADED: "⏳ Serviciul Gemini este supraîncărcat; încercați din nou în câteva minute",
+    DEADLINE: "⏱️ Timpul de generare a expirat",
+}
+
+_STATUS_KINDS = {
+    "UNAVAILABLE": OVERLOADED,
+    "INTERNAL": OVERLOADED,
+    "DEADLINE_EXCEEDED": DEADLINE,
+    "UNAUTHENTICATED": INVALID_KEY,
+}
+_CODE_KINDS = {
+    500: OVERLOADED,
+    502: OVERLOADED,
+    503: OVERLOADED,
+    504: DEADLINE,
+    401: INVALID_KEY,
+}
+
+_RETRY_IN_RE = re.compile(r"retry in\s+([\d.]+)\s*(ms|s)", re.IGNORECASE)
+_DURATION_RE = re.compile(r"^([\d.]+)s$")
+
+
+class ApiFailure:
+    """O eroare API clasificată"""
+
+    def __init__(self, kind: str, message: str, retry_after_s: float = None, code: int = None):
+        self.kind = kind
+        self.message = message
+        self.retry_after_s = retry_after_s
+        self.code = code
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind in RETRYABLE
+
+    @property
+    def key_fatal(self) -> bool:
+        return self.kind in KEY_FATAL
+
+    def user_message(self) -> str:
+        return MESSAGES.get(self.kind, f"❌ Eroare API: {self.message[:200]}")
+
+    def __repr__(self):
+        return f"ApiFailure({self.kind}, code={self.code}, retry_after_s={self.retry_after_s})"
+
+
+def _error_body(error) -> dict:
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        return details.get("error", details)
+    return {}
+
+
+def _detail_items(error) -> list:
+    details = getattr(error, "details", None)
+    if isinstance(details, list):
+        return details  # fake_gemini.FakeAPIError
+    items = _error_body(error).get("details")
+    return items if isinstance(items, list) else []
+
+
+def _retry_after(error, message: str):
+    """Întârzierea cerută de server, în secunde (None dacă lipsește)"""
+    for item in _detail_items(error):
+        if str(item.get("@type", "")).endswith("RetryInfo"):
+            match = _DURATION_RE.match(str(item.get("retryDelay", "")))
+            if match:
+                return float(match.group(1))
+
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers:
+        try:
+            value = headers.get("retry-after")
+        except Exception:
+            value = None
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass  # formatul cu dată HTTP nu apare la Gemini
+
+    match = _RETRY_IN_RE.search(message)
+    if match:
+        value = float(match.group(1))
+        return value / 1000 if match.group(2).lower() == "ms" else value
+    return None
+
+
+def _daily_quota(error, message_lower: str) -> bool:
+    """429 pe o cotă zilnică (nu se reface în câteva secunde)"""
+    for item in _detail_items(error):
+        if str(item.get("@type", "")).endswith("QuotaFailure"):
+            for violation in item.get("violations", []) or []:
+                if "perday" in str(violation.get("quotaId", "")).lower():
+                    return True
+    return "per day" in message_lower or "perday" in message_lower
+
+
+def classify(error) -> ApiFailure:
+    """Tipul erorii, din cod/status și abia apoi din mesaj"""
+    if isinstance(error, ApiFailure):
+        return error
+    message = str(error)
+    message_lower = message.lower()
+    body = _error_body(error)
+    code = getattr(error, "code", None) or body.get("code")
+    code = code if isinstance(code, int) else None
+    status = str(getattr(error, "status", None) or body.get("status") or "").upper()
+    retry_after = _retry_after(error, message)
+
+    if code == 429 or status == "RESOURCE_EXHAUSTED" or "resource_exhausted" in message_lower:
+        kind = QUOTA_EXHAUSTED if _daily_quota(error, message_lower) else RATE_LIMITED
+    elif "api_key_invalid" in message_lower or "api key not valid" in message_lower \
+            or "api key expired" in message_lower:
+        kind = INVALID_KEY
+    elif "billing" in message_lower:
+        kind = QUOTA_EXHAUSTED
+    elif status in _STATUS_KINDS:
+        kind = _STATUS_KINDS[status]
+    elif code in _CODE_KINDS:
+        kind = _CODE_KINDS[code]
+    elif "timeout" in type(error).__name__.lower() or "timed out" in message_lower:
+        kind = DEADLINE
+    elif "overloaded" in message_lower or "unavailable" in message_lower:
+        kind = OVERLOADED
+    else:
+        kind = OTHER
+    return ApiFailure(kind, message, retry_after, code)
+
+
+def backoff_delay(attempt: int, retry_after_s: float = None) -> float:
+    """
+    Așteptarea înainte de reîncercarea `attempt` (de la 0): jitter complet
+    peste exponențial, dar niciodată sub întârzierea cerută de server
+    """
+    delay = random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * (2 ** attempt)))
+    if retry_after_s is not None:
+        delay = retry_after_s + random.uniform(0, min(retry_after_s * 0.1, 1.0) + 0.1)
+    return delay
+
+
+def call_with_retry(fn, max_attempts: int = MAX_ATTEMPTS, max_wait_s: float = MAX_WAIT_S,
+                    on_retry=None, sleep=time.sleep):
+    """
+    Apelează fn() și reîncearcă erorile RATE_LIMITED/OVERLOADED.
+    on_retry(failure, delay, attempt) e apelat înainte de fiecare așteptare.
+    Ridică eroarea originală când nu se mai reîncearcă.
+    """
+    waited = 0.0
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            failure = classify(e)
+            if not failure.retryable or attempt + 1 >= max_attempts:
+                raise
+            delay = backoff_delay(attempt, failure.retry_after_s)
+            if waited + delay > max_wait_s:
+                raise
+            if on_retry:
+                on_retry(failure, delay, attempt + 1)
+            sleep(delay)
+            waited += delay
+            attempt += 1
+
+
+# ============ CHEI EXCLUSE ============
+
+_excluded = {}
+_excluded_lock = threading.Lock()
+
+
+def exclude_key(api_key: str, failure: ApiFailure):
+    """Exclude cheia pentru erorile care țin de cheie (invalidă/epuizată)"""
+    if not api_key or not failure.key_fatal:
+        return
+    if failure.kind == INVALID_KEY:
+        until = INVALID_KEY_COOLDOWN_S
+    else:
+        until = time.time() + max(failure.retry_after_s or 0, QUOTA_COOLDOWN_S)
+    with _excluded_lock:
+        _excluded[api_key] = (until, failure.kind)
+
+
+def is_excluded(api_key: str) -> bool:
+    with _excluded_lock:
+        entry = _excluded.get(api_key)
+        if entry and entry[0] <= time.time():
+            del _excluded[api_key]
+            entry = None
+    return entry is not None
+
+
+def clear_exclusion(api_key: str):
+    with _excluded_lock:
+        _excluded.pop(api_key, None)
@@ -1,29 +1,28 @@
 import streamlit as st
-from google import genai
-from google.genai import types
+import time
 from typing import Tuple, Optional
 import database as db
+import api_errors
+import model_router
+from gemini_client import get_client, drop_client
 
 class APIKeyManager:
     """Gestionează cheile API Gemini cu rotație automată"""
     
-    # Erori care indică expirarea/invalidarea cheii
-    EXPIRY_ERRORS = [
-        "API_KEY_INVALID",
-        "QUOTA_EXCEEDED", 
-        "PERMISSION_DENIED",
-        "API key expired",
-        "API key not valid",
-        "quota",
-        "billing",
-        "exceeded"
-    ]
+    # Sondarea unei chei nu așteaptă mult după limitele de rată
+    PROBE_MAX_WAIT_S = 10
     
     def __init__(self):
         self.current_key = None
         self.current_key_index = 0
         self.client = None
-        self._load_keys_from_secrets()
+        self._keys_loaded = False
+    
+    def _ensure_keys_loaded(self):
+        """Încarcă cheile din secrets la prima utilizare, nu la import"""
+        if not self._keys_loaded:
+            self._keys_loaded = True
+            self._load_keys_from_secrets()
     
     def _load_keys_from_secrets(self):
         """Încarcă cheile din Streamlit secrets"""
@@ -45,11 +44,13 @@ class APIKeyManager:
             pass  # Nu există secrets configurate
     
     def get_available_keys(self) -> list:
-        """Returnează lista de chei disponibile"""
-        return db.get_active_api_keys()
+        """Returnează lista de chei disponibile (fără cele excluse temporar)"""
+        self._ensure_keys_loaded()
+        return [key for key in db.get_active_api_keys() if not api_errors.is_excluded(key)]
     
     def get_all_keys_status(self) -> list:
         """Returnează toate cheile cu statusul lor"""
+        self._ensure_keys_loaded()
         return db.get_all_api_keys()
     
     def add_user_key(self, api_key: str) -> bool:
@@ -59,10 +60,19 @@ class APIKeyManager:
             return True
         return False
     
-    def is_expiry_error(self, error_message: str) -> bool:
-        """Verifică dacă eroarea indică expirarea cheii"""
-        error_lower = str(error_message).lower()
-        return any(err.lower() in error_lower for err in self.EXPIRY_ERRORS)
+    def is_expiry_error(self, error) -> bool:
+        """Verifică dacă eroarea indică o cheie invalidă sau epuizată"""
+        return api_errors.classify(error).key_fatal
+    
+    def _exclude(self, key: str, failure):
+        """
+        Scoate cheia din rotație: cheile invalide se marchează expirate în
+        baza de date, cele cu cota epuizată doar pentru perioada de răcire
+        """
+        api_errors.exclude_key(key, failure)
+        if failure.kind == api_errors.INVALID_KEY:
+            db.mark_key_expired(key, failure.message)
+        drop_client(key)
     
     def get_working_key(self) -> Tuple[Optional[str], Optional[str]]:
         """
@@ -77,14 +87,19 @@ class APIKeyManager:
         
         errors = []
         for key in keys:
+            client = None
             try:
                 # Testează cheia
-                client = genai.Client(api_key=key)
+                client = get_client(key)
                 
-                # Test simplu
-                response = client.models.generate_content(
-                    model='gemini-2.0-flash-exp',
-                    contents='Test. Răspunde doar cu "OK".'
+                # Test simplu, cu cel mai ieftin model din rutare (modelele
+                # retrase nu trebuie să treacă drept chei nefuncționale)
+                response = api_errors.call_with_retry(
+                    lambda: client.models.generate_content(
+                        model=model_router.MODEL_TIERS[0],
+                        contents='Test. Răspunde doar cu "OK".'
+                    ),
+                    max_wait_s=self.PROBE_MAX_WAIT_S
                 )
                 
                 if response:
@@ -94,30 +109,43 @@ class APIKeyManager:
                     return key, None
                     
             except Exception as e:
-                error_msg = str(e)
-                errors.append(f"Cheie {key[:10]}...: {error_msg[:50]}")
+                failure = api_errors.classify(e)
+                if failure.kind == api_errors.RATE_LIMITED and client is not None:
+                    # Cheia e validă, doar limitată momentan
+                    self.current_key = key
+                    self.client = client
+                    return key, None
                 
-                if self.is_expiry_error(error_msg):
-                    db.mark_key_expired(key, error_msg)
+                errors.append(f"Cheie {key[:10]}...: {failure.message[:50]}")
+                self._exclude(key, failure)
                     
         return None, f"❌ Toate cheile au eșuat:\n" + "\n".join(errors)
     
     def get_client(self, api_key: str):
         """Returnează un client configurat cu cheia specificată"""
-        self.client = genai.Client(api_key=api_key)
+        self.client = get_client(api_key)
         self.current_key = api_key
         return self.client
     
-    def handle_api_error(self, error: Exception) -> Tuple[bool, str]:
+    def handle_api_error(self, error: Exception, attempt: int = 0) -> Tuple[bool, str]:
         """
         Gestionează o eroare API.
+        Limitele de rată și supraîncărcarea se reîncearcă pe aceeași cheie
+        după backoff; cheile invalide sau epuizate se schimbă.
         Returnează (should_retry, message)
         """
-        error_msg = str(error)
+        failure = api_errors.classify(error)
+        
+        if failure.retryable:
+            if attempt + 1 >= api_errors.MAX_ATTEMPTS:
+                return False, failure.user_message()
+            delay = api_errors.backoff_delay(attempt, failure.retry_after_s)
+            time.sleep(delay)
+            return True, f"⏳ API ocupat temporar, reîncercare după {delay:.0f}s"
         
-        if self.is_expiry_error(error_msg):
+        if failure.key_fatal:
             if self.current_key:
-                db.mark_key_expired(self.current_key, error_msg)
+                self._exclude(self.current_key, failure)
             
             # Încearcă următoarea cheie
             new_key, error = self.get_working_key()
@@ -126,7 +154,7 @@ class APIKeyManager:
             else:
                 return False, error
         
-        return False, f"❌ Eroare API: {error_msg}"
+        return False, failure.user_message()
 
-# Instanță globală
+# Instanță globală (cheile din secrets se încarcă la prima utilizare)
 api_manager = APIKeyManager()
@@ -3,45 +3,51 @@ import sqlite3
 import uuid
 from datetime import datetime
 from pathlib import Path
-import tempfile
 import os
+import shutil
 import time
 from io import BytesIO
 import json
 import re
-import requests
+import threading
 
-# Import Gemini
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    st.error("❌ google-generativeai nu este instalat")
-    GEMINI_AVAILABLE = False
+from lazy_imports import LazyModule, module_available
+from gemini_client import get_client, generate_complete
+import metrics
+import model_router
+import media
+import segments
+import exporters
+import docx_writer
+import session_export
+import retention
+import compression
+import scratch
+import media_cache
+import singleflight
+import api_errors
+import jobs
+import admission
+import eta
+import timestamps
+import probe
+import captions
 
-# Import python-docx
-try:
-    from docx import Document
-    from docx.shared import Inches, Pt
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-
-# Import pentru YouTube și procesare video
-try:
-    import yt_dlp
-    YTDLP_AVAILABLE = True
-except ImportError:
-    YTDLP_AVAILABLE = False
+# Dependențele grele se încarcă abia la prima utilizare; verificarea
+# disponibilității nu importă modulele
+GEMINI_AVAILABLE = module_available("google.genai")
+DOCX_AVAILABLE = module_available("docx")
+YTDLP_AVAILABLE = module_available("yt_dlp")
+GDRIVE_AVAILABLE = module_available("googleapiclient")
 
 try:
-    from googleapiclient.discovery import build
-    from googleapiclient.http import MediaIoBaseDownload
-    import io
-    GDRIVE_AVAILABLE = True
-except ImportError:
-    GDRIVE_AVAILABLE = False
+    from streamlit.runtime.scriptrunner import add_script_run_ctx
+except ImportError:  # versiuni Streamlit fără API-ul de context
+    add_script_run_ctx = None
+
+types = LazyModule("google.genai.types")
+yt_dlp = LazyModule("yt_dlp")
+requests = LazyModule("requests")
 
 # ==================== CONFIGURARE ====================
 
@@ -56,6 +62,12 @@ st.set_page_config(
 MAX_FILE_SIZE_MB = 1000  # Limită maximă aplicație (1GB)
 GEMINI_DIRECT_UPLOAD_LIMIT_MB = 200  # Limită pentru upload direct Gemini
 YOUTUBE_MAX_DURATION_MINUTES = 120  # Limită durată YouTube (2 ore)
+TRANSCRIPTION_LATENCY_TARGET_S = 300  # Ținta de latență pentru generare (alegerea modelului)
+CHAT_CONTEXT_CHARS = 300  # Caractere din fiecare transcriere recentă trimise în chat
+CHAT_CONTEXT_WINDOW_CHARS = 2000  # Caractere pentru o felie de timp cerută explicit
+CHAT_CONTEXT_BEFORE_S = 60  # Felia de timp: secunde înainte de momentul cerut
+CHAT_CONTEXT_AFTER_S = 120  # Felia de timp: secunde după momentul cerut
+SIDEBAR_STATS_TTL_S = 60  # Statisticile din sidebar se recalculează cel mult o dată pe minut
 
 # CSS
 st.markdown("""
@@ -159,7 +171,8 @@ def check_and_migrate_database():
             'file_size_mb': "REAL DEFAULT 0",
             'process_method': "TEXT DEFAULT 'direct'",
             'source_url': "TEXT",
-            'source_type': "TEXT DEFAULT 'upload'"
+            'source_type': "TEXT DEFAULT 'upload'",
+            'continuations': "INTEGER DEFAULT 0"
         }
         
         for col_name, col_def in columns_to_add.items():
@@ -180,6 +193,9 @@ def init_database():
     conn = sqlite3.connect(str(DB_FILE))
     cursor = conn.cursor()
     
+    # Are efect doar pe o bază nouă; bazele existente sunt convertite de retention
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS sessions (
             session_id TEXT PRIMARY KEY,
@@ -201,6 +217,7 @@ def init_database():
             process_method TEXT DEFAULT 'direct',
             source_url TEXT,
             source_type TEXT DEFAULT 'upload',
+            continuations INTEGER DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (session_id) REFERENCES sessions(session_id)
         )
@@ -230,7 +247,13 @@ def init_database():
     conn.commit()
     conn.close()
     
+    metrics.init_metrics_tables(DB_FILE)
+    segments.init_segments_table(DB_FILE)
+    jobs.init_jobs_table(DB_FILE)
     check_and_migrate_database()
+    segments.backfill_segments(DB_FILE)
+    retention.init_retention(DB_FILE)
+    retention.start_pruning_job(DB_FILE)
 
 # ==================== SESSION MANAGEMENT ====================
 
@@ -251,6 +274,7 @@ def init_session():
         st.session_state.session_id = url_session_id
         
         if 'session_loaded' not in st.session_state:
+            touch_session(url_session_id)
             st.session_state.messages = get_messages(url_session_id)
             st.session_state.transcriptions = get_transcriptions(url_session_id)
             st.session_state.session_loaded = True
@@ -288,12 +312,20 @@ def create_session(session_id):
     except Exception as e:
         st.error(f"Eroare la crearea sesiunii: {e}")
 
+def touch_session(session_id):
+    try:
+        conn = sqlite3.connect(str(DB_FILE))
+        retention.touch_session(conn, session_id)
+        conn.commit()
+        conn.close()
+    except Exception:
+        pass
+
 def delete_session_data(session_id):
+    """Șterge sesiunea cu mesaje, transcrieri și segmente (inclusiv rândul din sessions)"""
     try:
         conn = sqlite3.connect(str(DB_FILE))
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
-        cursor.execute("DELETE FROM transcriptions WHERE session_id = ?", (session_id,))
+        retention.delete_session(conn, session_id)
         conn.commit()
         conn.close()
     except Exception as e:
@@ -322,26 +354,43 @@ def get_api_keys_from_secrets():
     
     return keys
 
+# Sondarea unei chei nu așteaptă mult: o limită de rată persistentă
+# înseamnă totuși că cheia e validă
+PROBE_MAX_WAIT_S = 10
+
 def test_api_key(api_key):
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.5-flash-lite')
-        response = model.generate_content('Say "OK"')
+        client = get_client(api_key)
+        response = api_errors.call_with_retry(
+            lambda: client.models.generate_content(
+                model='gemini-2.5-flash-lite',
+                contents='Say "OK"'
+            ),
+            max_wait_s=PROBE_MAX_WAIT_S
+        )
+        metrics.record_token_usage(response, None, api_key, 'gemini-2.5-flash-lite', "probe", db_file=DB_FILE)
+        api_errors.clear_exclusion(api_key)
         return True, "✅ Cheie validă"
     except Exception as e:
-        error_msg = str(e)
-        if "quota" in error_msg.lower() or "billing" in error_msg.lower():
+        failure = api_errors.classify(e)
+        api_errors.exclude_key(api_key, failure)
+        if failure.kind == api_errors.RATE_LIMITED:
+            return True, "✅ Cheie validă (limită de rată temporară)"
+        elif failure.kind == api_errors.QUOTA_EXHAUSTED:
             return False, "❌ Cheie expirată (quota/billing)"
-        elif "api key" in error_msg.lower():
+        elif failure.kind == api_errors.INVALID_KEY:
             return False, "❌ Cheie invalidă"
         else:
-            return False, f"❌ Eroare: {error_msg[:100]}"
+            return False, f"❌ Eroare: {failure.message[:100]}"
 
 def get_working_api_key(keys):
     if not keys:
         return None, None, "Nu există chei API configurate"
     
     for i, key in enumerate(keys):
+        # Cheile invalide sau cu cota epuizată nu se mai sondează
+        if api_errors.is_excluded(key):
+            continue
         valid, msg = test_api_key(key)
         if valid:
             return key, i, msg
@@ -356,8 +405,9 @@ def save_message(session_id, role, content):
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO messages (session_id, role, content) VALUES (?, ?, ?)",
-            (session_id, role, content)
+            (session_id, role, compression.pack(content))
         )
+        retention.touch_session(conn, session_id)
         conn.commit()
         conn.close()
     except Exception as e:
@@ -371,14 +421,15 @@ def get_messages(session_id):
             "SELECT role, content, created_at FROM messages WHERE session_id = ? ORDER BY created_at",
             (session_id,)
         )
-        messages = [{"role": row[0], "content": row[1], "time": row[2]} for row in cursor.fetchall()]
+        messages = [{"role": row[0], "content": compression.unpack(row[1]), "time": row[2]} for row in cursor.fetchall()]
         conn.close()
         return messages
     except:
         return []
 
 def save_transcription(session_id, video_name, source_lang, target_lang, transcription, 
-                       file_size_mb=0, process_method="direct", source_url="", source_type="upload"):
+                       file_size_mb=0, process_method="direct", source_url="", source_type="upload",
+                       continuations=0):
     try:
         conn = sqlite3.connect(str(DB_FILE))
         cursor = conn.cursor()
@@ -386,13 +437,15 @@ def save_transcription(session_id, video_name, source_lang, target_lang, transcr
         cursor.execute('''
             INSERT INTO transcriptions 
             (session_id, video_name, source_language, target_language, transcription, 
-             status, file_size_mb, process_method, source_url, source_type) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (session_id, video_name, source_lang, target_lang, transcription, 
-              'completed', file_size_mb, process_method, source_url, source_type))
+             status, file_size_mb, process_method, source_url, source_type, continuations) 
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (session_id, video_name, source_lang, target_lang, compression.pack(transcription), 
+              'completed', file_size_mb, process_method, source_url, source_type, continuations))
+        transcription_id = cursor.lastrowid
+        segments.store_segments(conn, transcription_id, transcription)
+        retention.touch_session(conn, session_id)
         
         conn.commit()
-        transcription_id = cursor.lastrowid
         conn.close()
         return transcription_id
     except Exception as e:
@@ -420,7 +473,7 @@ def get_transcriptions(session_id):
                 "video_name": row[1],
                 "source_language": row[2],
                 "target_language": row[3],
-                "transcription": row[4],
+                "transcription": compression.unpack(row[4]),
                 "status": row[5],
                 "file_size_mb": row[6],
                 "process_method": row[7],
@@ -435,6 +488,74 @@ def get_transcriptions(session_id):
         st.error(f"Eroare citire transcrieri: {e}")
         return []
 
+def get_transcription_result(transcription_id):
+    """Transcrierea salvată de alt job, în forma folosită la partajarea rezultatului"""
+    try:
+        conn = sqlite3.connect(str(DB_FILE))
+        row = conn.execute('''
+            SELECT transcription, video_name, file_size_mb, source_type, source_url, continuations,
+                   process_method
+            FROM transcriptions WHERE id = ?
+        ''', (transcription_id,)).fetchone()
+        conn.close()
+    except Exception:
+        return None
+    if not row:
+        return None
+    return {
+        "transcription": compression.unpack(row[0]),
+        "video_name": row[1],
+        "file_size_mb": row[2],
+        "source_type": row[3],
+        "source_url": row[4],
+        "continuations": row[5] or 0,
+        "process_method": row[6] or "direct",
+    }
+
+def get_recent_transcription_refs(session_id, limit=2):
+    """Ultimele transcrieri, fără textul complet (id, nume, tip sursă)"""
+    try:
+        conn = sqlite3.connect(str(DB_FILE))
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, video_name, source_type
+            FROM transcriptions 
+            WHERE session_id = ? 
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', (session_id, limit))
+        refs = [{"id": row[0], "video_name": row[1], "source_type": row[2]} for row in cursor.fetchall()]
+        conn.close()
+        return refs
+    except Exception:
+        return []
+
+def build_chat_context(session_id, prompt):
+    """
+    Contextul pentru chat din segmentele indexate: dacă întrebarea conține
+    un moment (ex. 12:30), se trimite felia de timp din jurul lui,
+    altfel începutul ultimelor transcrieri.
+    """
+    clock = timestamps.CLOCK_RE.search(prompt)
+    context = ""
+    for t in get_recent_transcription_refs(session_id):
+        source_type = t.get('source_type') or 'upload'
+        if clock:
+            moment_ms = timestamps.match_seconds(clock) * 1000
+            text = segments.excerpt(
+                t['id'],
+                max(moment_ms - CHAT_CONTEXT_BEFORE_S * 1000, 0),
+                moment_ms + CHAT_CONTEXT_AFTER_S * 1000,
+                max_chars=CHAT_CONTEXT_WINDOW_CHARS,
+                db_file=DB_FILE
+            )
+            if text:
+                context += f"- {t['video_name']} ({source_type}), în jurul {timestamps.format_clock(moment_ms / 1000)}:\n{text}\n\n"
+                continue
+        text = segments.excerpt(t['id'], max_chars=CHAT_CONTEXT_CHARS, db_file=DB_FILE)
+        context += f"- {t['video_name']} ({source_type}): {text}...\n\n"
+    return "Transcrieri recente:\n" + context if context else ""
+
 # ==================== URL PROCESSING ====================
 
 def extract_video_id_youtube(url):
@@ -479,11 +600,9 @@ def detect_url_type(url):
     elif 'drive.google.com' in url_lower or 'docs.google.com' in url_lower:
         return 'gdrive'
     elif url_lower.startswith('http://') or url_lower.startswith('https://'):
-        # Verifică dacă e link direct către video
-        video_extensions = ['.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv', '.wmv']
-        for ext in video_extensions:
-            if ext in url_lower:
-                return 'direct'
+        # Link direct: extensia din calea URL-ului, nu oriunde în text
+        if probe.has_media_extension(url):
+            return 'direct'
         return 'other'
     
     return None
@@ -513,13 +632,20 @@ def get_youtube_info(video_id):
     except Exception as e:
         return None, str(e)
 
-def download_youtube_video(video_id, max_size_mb=200, progress_callback=None):
-    """Descarcă video YouTube"""
+def download_youtube_video(video_id, max_size_mb=200, progress_callback=None, job=None):
+    """Descarcă video YouTube (în directorul jobului scratch, dacă e dat)"""
+    key = media_cache.source_key('youtube', video_id, max_size_mb)
+    cached_path, cached_meta = media_cache.lookup(key, job)
+    if cached_path:
+        if progress_callback:
+            progress_callback(0.5, "♻️ Video din cache local")
+        return cached_path, cached_meta.get('video_name'), cached_meta.get('download_type')
+    
     if not YTDLP_AVAILABLE:
         return None, None, "yt-dlp nu este instalat"
     
     try:
-        output_path = tempfile.mktemp(suffix='.mp4')
+        output_path = scratch.new_path('.mp4', job)
         
         if progress_callback:
             progress_callback(0.1, "📥 Descărcare video YouTube...")
@@ -556,7 +682,9 @@ def download_youtube_video(video_id, max_size_mb=200, progress_callback=None):
                         if progress_callback:
                             progress_callback(0.5, f"✅ Video descărcat ({file_size_mb:.1f}MB)")
                         
-                        return output_path, info.get('title', 'YouTube Video'), None
+                        title = info.get('title', 'YouTube Video')
+                        media_cache.store(key, output_path, video_name=title, download_type=None)
+                        return output_path, title, None
                     
             except Exception as e:
                 continue
@@ -565,7 +693,7 @@ def download_youtube_video(video_id, max_size_mb=200, progress_callback=None):
         if progress_callback:
             progress_callback(0.3, "🎵 Încerc doar audio...")
         
-        audio_path = tempfile.mktemp(suffix='.m4a')
+        audio_path = scratch.new_path('.m4a', job)
         ydl_opts = {
             'format': 'bestaudio/best',
             'outtmpl': audio_path,
@@ -584,15 +712,24 @@ def download_youtube_video(video_id, max_size_mb=200, progress_callback=None):
                 if progress_callback:
                     progress_callback(0.7, "✅ Audio descărcat")
                 
-                return audio_path, info.get('title', 'YouTube Audio'), 'audio_only'
+                title = info.get('title', 'YouTube Audio')
+                media_cache.store(key, audio_path, video_name=title, download_type='audio_only')
+                return audio_path, title, 'audio_only'
         
         return None, None, "Nu s-a putut descărca video/audio"
         
     except Exception as e:
         return None, None, f"Eroare descărcare: {str(e)}"
 
-def download_gdrive_video(file_id, progress_callback=None):
-    """Descarcă video de pe Google Drive"""
+def download_gdrive_video(file_id, progress_callback=None, job=None):
+    """Descarcă video de pe Google Drive (în directorul jobului scratch, dacă e dat)"""
+    key = media_cache.source_key('gdrive', file_id)
+    cached_path, cached_meta = media_cache.lookup(key, job, max_age_s=media_cache.GDRIVE_TTL_S)
+    if cached_path:
+        if progress_callback:
+            progress_callback(0.9, "♻️ Fișier din cache local")
+        return cached_path, cached_meta.get('video_name'), None
+    
     try:
         if progress_callback:
             progress_callback(0.1, "📥 Descărcare de pe Google Drive...")
@@ -620,7 +757,7 @@ def download_gdrive_video(file_id, progress_callback=None):
         
         if response.status_code == 200:
             # Salvează fișierul
-            output_path = tempfile.mktemp(suffix='.mp4')
+            output_path = scratch.new_path('.mp4', job)
             
             total_size = int(response.headers.get('content-length', 0))
             downloaded = 0
@@ -640,20 +777,34 @@ def download_gdrive_video(file_id, progress_callback=None):
             if progress_callback:
                 progress_callback(0.9, f"✅ Descărcat ({file_size_mb:.1f}MB)")
             
-            return output_path, f"GDrive_{file_id[:8]}.mp4", None
+            video_name = f"GDrive_{file_id[:8]}.mp4"
+            media_cache.store(key, output_path, video_name=video_name)
+            return output_path, video_name, None
         else:
             return None, None, f"Eroare HTTP: {response.status_code}"
             
     except Exception as e:
         return None, None, f"Eroare descărcare GDrive: {str(e)}"
 
-def download_direct_video(url, progress_callback=None):
-    """Descarcă video de la URL direct"""
+def download_direct_video(url, progress_callback=None, job=None):
+    """Descarcă video de la URL direct (în directorul jobului scratch, dacă e dat)"""
     try:
         if progress_callback:
             progress_callback(0.1, "📥 Descărcare video...")
         
-        response = requests.get(url, stream=True)
+        # Revalidare condiționată: la 304 se folosește copia din cache
+        key = media_cache.source_key('direct', url)
+        cached_meta = media_cache.get_meta(key)
+        response = requests.get(url, stream=True, headers=media_cache.conditional_headers(cached_meta))
+        if response.status_code == 304:
+            response.close()
+            cached_path, cached_meta = media_cache.lookup(key, job)
+            if cached_path:
+                media_cache.refresh(key)
+                if progress_callback:
+                    progress_callback(0.9, "♻️ Video nemodificat, din cache local")
+                return cached_path, cached_meta.get('video_name'), None
+            response = requests.get(url, stream=True)
         
         if response.status_code == 200:
             # Determină extensia
@@ -662,7 +813,7 @@ def download_direct_video(url, progress_callback=None):
             if 'video/' in content_type:
                 ext = '.' + content_type.split('/')[-1].split(';')[0]
             
-            output_path = tempfile.mktemp(suffix=ext)
+            output_path = scratch.new_path(ext, job)
             
             total_size = int(response.headers.get('content-length', 0))
             downloaded = 0
@@ -682,6 +833,13 @@ def download_direct_video(url, progress_callback=None):
             if progress_callback:
                 progress_callback(0.9, "✅ Video descărcat")
             
+            # Se păstrează doar dacă serverul oferă validatori pentru revalidare
+            etag = response.headers.get('etag')
+            last_modified = response.headers.get('last-modified')
+            if etag or last_modified:
+                media_cache.store(key, output_path, video_name=file_name,
+                                  etag=etag, last_modified=last_modified)
+            
             return output_path, file_name, None
         else:
             return None, None, f"Eroare HTTP: {response.status_code}"
@@ -711,42 +869,27 @@ LANGUAGES = {
     "Auto-detect": "auto"
 }
 
-def process_and_transcribe(file_path, source_lang, target_lang, api_key, 
-                           file_size_mb=0, progress_callback=None, is_audio_only=False):
-    """Procesează și transcrie fișierul video/audio"""
-    try:
-        genai.configure(api_key=api_key)
-        
-        if is_audio_only:
-            # Pentru fișiere audio
-            if progress_callback:
-                progress_callback(0.3, "🎵 Procesare fișier audio...")
-            
-            audio_file = genai.upload_file(path=file_path)
-            
-            if progress_callback:
-                progress_callback(0.5, "⏳ Așteptare procesare...")
-            
-            # Așteaptă procesarea
-            max_wait = 60
-            wait_time = 0
-            while audio_file.state.name == "PROCESSING" and wait_time < max_wait:
-                time.sleep(2)
-                wait_time += 2
-                audio_file = genai.get_file(audio_file.name)
-            
-            if audio_file.state.name == "FAILED":
-                return None, "❌ Procesarea audio a eșuat"
-            
-            if progress_callback:
-                progress_callback(0.7, "🤖 Transcriere audio...")
-            
-            model = genai.GenerativeModel('gemini-2.5-pro')
-            
-            source = LANGUAGES.get(source_lang, "auto")
-            target = LANGUAGES.get(target_lang, "Romanian")
-            
-            prompt = f"""
+def build_transcription_prompt(source, target, is_audio_only, with_keyframes=False):
+    """Construiește prompt-ul de transcriere (limbile sunt deja traduse prin LANGUAGES)"""
+    if with_keyframes:
+        return f"""
+Primești pista audio a unui video și cadre cheie extrase din el (slide-uri,
+text pe ecran), fiecare precedat de momentul în care apare [MM:SS].
+
+INSTRUCȚIUNI:
+1. Limba sursă: {source} {'(detectează automat)' if source == 'auto' else ''}
+2. Limba țintă: {target}
+3. Transcrie COMPLET tot dialogul din audio
+4. Include timestamps [MM:SS] după audio
+5. {'TRADUCE în ' + target if source != target and source != 'auto' else 'Menține limba originală'}
+6. Folosește cadrele ca și context (termeni, nume, titluri de pe slide-uri)
+
+FORMAT:
+[MM:SS] Text transcris
+"""
+    
+    if is_audio_only:
+        return f"""
 Transcrie complet acest fișier audio.
 
 INSTRUCȚIUNI:
@@ -759,54 +902,8 @@ INSTRUCȚIUNI:
 Formatare:
 [MM:SS] Text transcris
 """
-            
-            response = model.generate_content([audio_file, prompt])
-            
-            # Cleanup
-            genai.delete_file(audio_file.name)
-            
-            if progress_callback:
-                progress_callback(1.0, "✅ Transcriere completă!")
-            
-            return response.text, None
-            
-        else:
-            # Pentru fișiere video
-            if file_size_mb > GEMINI_DIRECT_UPLOAD_LIMIT_MB:
-                return None, f"❌ Fișier prea mare ({file_size_mb:.1f}MB). Limita: {GEMINI_DIRECT_UPLOAD_LIMIT_MB}MB"
-            
-            if progress_callback:
-                progress_callback(0.3, "📤 Încărcare video...")
-            
-            video_file = genai.upload_file(path=file_path)
-            
-            if progress_callback:
-                progress_callback(0.5, "⏳ Procesare video...")
-            
-            # Așteaptă procesarea
-            max_wait = 180
-            wait_time = 0
-            while video_file.state.name == "PROCESSING" and wait_time < max_wait:
-                time.sleep(2)
-                wait_time += 2
-                video_file = genai.get_file(video_file.name)
-                
-                if progress_callback:
-                    progress = 0.5 + (0.2 * (wait_time / max_wait))
-                    progress_callback(progress, f"⏳ Procesare... ({wait_time}s)")
-            
-            if video_file.state.name == "FAILED":
-                return None, "❌ Procesarea video a eșuat"
-            
-            if progress_callback:
-                progress_callback(0.8, "🤖 Transcriere video...")
-            
-            model = genai.GenerativeModel('gemini-2.5-pro')
-            
-            source = LANGUAGES.get(source_lang, "auto")
-            target = LANGUAGES.get(target_lang, "Romanian")
-            
-            prompt = f"""
+    
+    return f"""
 Analizează acest video și transcrie tot conținutul audio/vocal.
 
 INSTRUCȚIUNI:
@@ -822,41 +919,319 @@ FORMAT:
 [MM:SS] [muzică de fundal]
 [MM:SS] Continuare dialog...
 """
-            
-            generation_config = genai.types.GenerationConfig(
-                temperature=0.3,
-                max_output_tokens=8192,
+
+def build_keyframe_parts(keyframes):
+    """Cadrele cheie ca părți inline, fiecare precedată de timestamp"""
+    parts = []
+    for seconds, frame_path in keyframes:
+        with open(frame_path, 'rb') as f:
+            parts.append(f"Cadru {timestamps.format_clock(seconds)}:")
+            parts.append(types.Part.from_bytes(data=f.read(), mime_type='image/jpeg'))
+    return parts
+
+def generate_with_fallback(client, models, contents, config_kwargs, duration_s=None,
+                           api_key=None, session_id=None, tracer=None, progress_callback=None):
+    """
+    Generează cu primul model din `models`; dacă eșuează sau depășește
+    timpul, trece la următorul. Răspunsurile trunchiate la max_output_tokens
+    sunt continuate de la ultimul timestamp (gemini_client.generate_complete).
+    Returnează (text, model, nr_continuări) sau ridică ultima eroare.
+    """
+    def on_retry(failure, delay, attempt):
+        if progress_callback:
+            reason = "Limită de rată" if failure.kind == api_errors.RATE_LIMITED else "Server ocupat"
+            progress_callback(0.85, f"⏳ {reason}, reîncerc în {delay:.0f}s ({attempt})...")
+    
+    last_error = None
+    for attempt, model_name in enumerate(models):
+        if attempt and progress_callback:
+            progress_callback(0.85, f"🔁 Reîncerc cu {model_name}...")
+        
+        timeout_ms = model_router.generation_timeout_s(model_name, duration_s) * 1000
+        config = types.GenerateContentConfig(
+            **config_kwargs,
+            http_options=types.HttpOptions(timeout=timeout_ms)
+        )
+        
+        def generate_once(call_contents, model_name, config):
+            with metrics.span(tracer, "generation", model=model_name) as generation_span:
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=call_contents,
+                    config=config
+                )
+                generation_span["input_tokens"], generation_span["output_tokens"] = metrics.usage_tokens(response)
+            metrics.record_token_usage(response, session_id, api_key, model_name, "transcribe", db_file=DB_FILE)
+            return response
+        
+        def generate(call_contents, model_name=model_name, config=config):
+            # Limitele de rată și supraîncărcarea trec după o scurtă așteptare
+            return api_errors.call_with_retry(
+                lambda: generate_once(call_contents, model_name, config),
+                on_retry=on_retry
             )
-            
-            response = model.generate_content(
-                [video_file, prompt],
-                generation_config=generation_config,
-                request_options={"timeout": 600}
+        
+        def on_continuation(count, resume_at):
+            if progress_callback:
+                progress_callback(0.9, f"📝 Continuare transcriere ({count}) de la {timestamps.format_clock(resume_at)}...")
+        
+        try:
+            text, continuations = generate_complete(generate, contents, on_continuation=on_continuation)
+            if not text:
+                raise ValueError(f"Răspuns gol de la {model_name}")
+            return text, model_name, continuations
+        except Exception as e:
+            last_error = e
+            if not model_router.should_fallback(e):
+                break
+    
+    raise last_error
+
+def build_captions_prompt(target, translate, automatic):
+    """Prompt-ul pentru prelucrarea subtitrărilor (doar text)"""
+    return f"""
+Textul de mai sus reprezintă subtitrările {'generate automat' if automatic else 'existente'} ale unui video.
+
+INSTRUCȚIUNI:
+1. {'TRADUCE în ' + target if translate else 'Menține limba originală'}
+2. Corectează punctuația, majusculele și cuvintele recunoscute greșit
+3. Păstrează timestamp-urile existente, câte unul la începutul fiecărui paragraf
+4. Nu rezuma și nu omite nimic
+5. Răspunde doar cu transcrierea, fără comentarii
+
+FORMAT:
+[MM:SS] Text transcris
+"""
+
+def transcribe_from_captions(video_id, source_lang, target_lang, api_key, polish=True,
+                             progress_callback=None, client=None, tracer=None, session_id=None,
+                             job_info=None):
+    """
+    Transcriere din subtitrările existente ale unui video YouTube, fără
+    descărcarea video-ului. Un model text ieftin corectează textul (polish)
+    sau îl traduce; fără traducere și fără polish se folosesc subtitrările
+    ca atare. Returnează (rezultat, None) sau (None, motiv) când trebuie
+    folosită calea media.
+    """
+    source = LANGUAGES.get(source_lang, "auto")
+    target = LANGUAGES.get(target_lang, "Romanian")
+    
+    if progress_callback:
+        progress_callback(0.1, "📝 Caut subtitrări existente...")
+    with metrics.span(tracer, "download") as download_span:
+        result, reason = captions.fetch_captions(video_id, captions.LANGUAGE_CODES.get(source))
+        if result:
+            download_span["bytes"] = result["bytes"]
+        else:
+            download_span["outcome"] = "skipped"
+    if not result:
+        return None, reason
+    
+    if tracer is not None:
+        tracer.annotate(duration_s=result["duration_s"])
+    translate = result["language"] != captions.LANGUAGE_CODES.get(target)
+    transcription = result["text"]
+    
+    if translate or polish:
+        if progress_callback:
+            progress_callback(0.5, "🌐 Traducere subtitrări..." if translate else "✨ Corectare subtitrări...")
+        try:
+            transcription, model_name, continuations = generate_with_fallback(
+                client or get_client(api_key),
+                model_router.plan_text_models(session_id, api_key, DB_FILE),
+                [result["text"], build_captions_prompt(target, translate, result["automatic"])],
+                {"temperature": 0.2, "max_output_tokens": 8192},
+                duration_s=result["duration_s"],
+                api_key=api_key,
+                session_id=session_id,
+                tracer=tracer,
+                progress_callback=progress_callback
             )
-            
-            # Cleanup
-            genai.delete_file(video_file.name)
-            
+        except Exception as e:
+            failure = api_errors.classify(e)
+            api_errors.exclude_key(api_key, failure)
+            if translate:
+                return None, f"Traducerea subtitrărilor a eșuat ({failure.message})"
+            # Corectarea e opțională: rămân subtitrările originale
+            model_name, continuations = None, 0
+        if job_info is not None:
+            job_info.update(model=model_name, continuations=continuations)
+    
+    if progress_callback:
+        progress_callback(1.0, "✅ Transcriere din subtitrări completă!")
+    return {
+        "transcription": transcription,
+        "video_name": result["title"],
+        "automatic": result["automatic"],
+    }, None
+
+def process_and_transcribe(file_path, source_lang, target_lang, api_key, 
+                           file_size_mb=0, progress_callback=None, is_audio_only=False,
+                           client=None, tracer=None, session_id=None, duration_s=None,
+                           media_mode="full", job_info=None, job=None):
+    """
+    Procesează și transcrie fișierul video/audio.
+    `client` permite injectarea unui backend de model (ex. fake_gemini.FakeClient);
+    implicit se folosește backend-ul activ din gemini_client.
+    `tracer` (metrics.Tracer) primește span-uri pentru upload, procesare și generare.
+    Tokenii consumați se contabilizează pe `session_id` și pe cheie.
+    Modelul se alege după durată (`duration_s` sau ffprobe), traducere și
+    ținta de latență, cu modele de rezervă la eșec.
+    Cu media_mode="keyframes" se trimit pista audio și cadrele cheie în loc
+    de video-ul complet.
+    Dacă se dă `job_info` (dict), primește modelul folosit, numărul de
+    continuări cerute pentru răspunsurile trunchiate și metoda (direct/keyframes).
+    Fișierele intermediare stau în `job` (scratch.ScratchJob) sau într-un
+    job propriu, șters la final.
+    """
+    uploaded_file = None
+    work_dir = None
+    own_job = job is None
+    try:
+        # Client explicit per cheie: sesiunile concurente nu își mai
+        # suprascriu cheia una alteia
+        client = client or get_client(api_key)
+        file_bytes = os.path.getsize(file_path)
+        
+        # Modul cadre cheie: audio + câteva imagini, o fracțiune din bytes
+        # și tokenii media ai video-ului complet
+        upload_path = file_path
+        keyframes = []
+        if media_mode == "keyframes" and not is_audio_only and media.ffmpeg_available():
             if progress_callback:
-                progress_callback(1.0, "✅ Transcriere completă!")
+                progress_callback(0.25, "🖼️ Extragere audio și cadre cheie...")
+            
+            if own_job:
+                job = scratch.start_job(file_bytes)
+            work_dir = job.mkdtemp("keyframes_")
+            with metrics.span(tracer, "preprocess", bytes=file_bytes) as preprocess_span:
+                audio_path = os.path.join(work_dir, "audio.m4a")
+                if media.extract_audio(file_path, audio_path):
+                    upload_path = audio_path
+                    keyframes = media.extract_keyframes(file_path, work_dir)
+                    preprocess_span["bytes"] = os.path.getsize(audio_path) + sum(
+                        os.path.getsize(frame_path) for _, frame_path in keyframes
+                    )
+                else:
+                    preprocess_span["outcome"] = "skipped"
+        
+        use_keyframes = upload_path != file_path
+        upload_bytes = os.path.getsize(upload_path)
+        
+        if not is_audio_only and not use_keyframes and file_size_mb > GEMINI_DIRECT_UPLOAD_LIMIT_MB:
+            return None, f"❌ Fișier prea mare ({file_size_mb:.1f}MB). Limita: {GEMINI_DIRECT_UPLOAD_LIMIT_MB}MB"
+        
+        source = LANGUAGES.get(source_lang, "auto")
+        target = LANGUAGES.get(target_lang, "Romanian")
+        
+        if duration_s is None:
+            duration_s = media.probe_duration(file_path)
+        if tracer is not None and "duration_s" not in tracer.job:
+            tracer.annotate(duration_s=duration_s)
+        
+        # Modele rapide pentru clipuri scurte, pro doar pentru cazurile grele;
+        # limitarea de buget se aplică fiecărui model din plan
+        models = model_router.plan_models(
+            duration_s,
+            is_audio_only,
+            needs_translation=(source != 'auto' and source != target),
+            latency_target_s=TRANSCRIPTION_LATENCY_TARGET_S,
+            session_id=session_id,
+            api_key=api_key,
+            db_file=DB_FILE
+        )
+        
+        if progress_callback:
+            progress_callback(0.3, "🎵 Procesare fișier audio..." if is_audio_only else "📤 Încărcare video...")
+        
+        with metrics.span(tracer, "upload", bytes=upload_bytes):
+            uploaded_file = api_errors.call_with_retry(lambda: client.files.upload(file=upload_path))
+        
+        if progress_callback:
+            progress_callback(0.5, "⏳ Așteptare procesare..." if is_audio_only else "⏳ Procesare video...")
+        
+        # Așteaptă procesarea
+        max_wait = 60 if (is_audio_only or use_keyframes) else 180
+        wait_time = 0
+        with metrics.span(tracer, "processing", bytes=upload_bytes) as processing_span:
+            while uploaded_file.state.name == "PROCESSING" and wait_time < max_wait:
+                time.sleep(2)
+                wait_time += 2
+                uploaded_file = client.files.get(name=uploaded_file.name)
+                
+                if progress_callback and not is_audio_only:
+                    progress = 0.5 + (0.2 * (wait_time / max_wait))
+                    progress_callback(progress, f"⏳ Procesare... ({wait_time}s)")
             
-            return response.text, None
+            if uploaded_file.state.name == "FAILED":
+                processing_span["outcome"] = "failed"
+                return None, "❌ Procesarea audio a eșuat" if is_audio_only else "❌ Procesarea video a eșuat"
+        
+        if progress_callback:
+            if is_audio_only:
+                progress_callback(0.7, f"🤖 Transcriere audio ({models[0]})...")
+            else:
+                progress_callback(0.8, f"🤖 Transcriere video ({models[0]})...")
+        
+        prompt = build_transcription_prompt(source, target, is_audio_only, with_keyframes=use_keyframes)
+        config_kwargs = {} if is_audio_only else {"temperature": 0.3, "max_output_tokens": 8192}
+        contents = [uploaded_file] + build_keyframe_parts(keyframes) + [prompt]
+        
+        transcription, model_name, continuations = generate_with_fallback(
+            client,
+            models,
+            contents,
+            config_kwargs,
+            duration_s=duration_s,
+            api_key=api_key,
+            session_id=session_id,
+            tracer=tracer,
+            progress_callback=progress_callback
+        )
+        if job_info is not None:
+            job_info.update(model=model_name, continuations=continuations,
+                            process_method="keyframes" if use_keyframes else "direct")
+        
+        if progress_callback:
+            progress_callback(1.0, "✅ Transcriere completă!")
+        
+        return transcription, None
             
     except Exception as e:
-        error_msg = str(e)
-        if "quota" in error_msg.lower():
-            return None, "❌ Quota API depășită"
-        else:
-            return None, f"❌ Eroare procesare: {error_msg}"
+        failure = api_errors.classify(e)
+        api_errors.exclude_key(api_key, failure)
+        if failure.kind == api_errors.OTHER:
+            return None, f"❌ Eroare procesare: {failure.message}"
+        return None, failure.user_message()
+    finally:
+        # Cleanup
+        if uploaded_file is not None:
+            try:
+                client.files.delete(name=uploaded_file.name)
+            except Exception:
+                pass
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        if own_job and job is not None:
+            job.cleanup()
 
 # ==================== WORD EXPORT ====================
 
 def create_word_document(transcription, video_name, source_lang, target_lang, 
-                        file_size_mb=0, source_type="upload", source_url=""):
+                        file_size_mb=0, source_type="upload", source_url="", bulk=True):
+    """
+    Document Word cu antet, conținut și subsol. Cu bulk=True corpul se scrie
+    dintr-o singură trecere (docx_writer); bulk=False adaugă paragrafele
+    unul câte unul prin python-docx (folosit ca referință în benchmark).
+    """
     if not DOCX_AVAILABLE:
         return None
     
     try:
+        from docx import Document
+        from docx.shared import Pt
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        
         doc = Document()
         
         title = doc.add_heading('Transcriere Video', 0)
@@ -884,10 +1259,13 @@ def create_word_document(transcription, video_name, source_lang, target_lang,
         
         doc.add_heading('Conținut Transcris', level=1)
         
-        for line in transcription.split('\n'):
-            if line.strip():
-                para = doc.add_paragraph(line)
-                para.paragraph_format.space_after = Pt(6)
+        if bulk:
+            doc.add_paragraph(docx_writer.BODY_PLACEHOLDER)
+        else:
+            for line in transcription.split('\n'):
+                if line.strip():
+                    para = doc.add_paragraph(line)
+                    para.paragraph_format.space_after = Pt(6)
         
         doc.add_paragraph()
         doc.add_paragraph('─' * 60)
@@ -899,13 +1277,36 @@ def create_word_document(transcription, video_name, source_lang, target_lang,
         doc.save(doc_io)
         doc_io.seek(0)
         
+        if bulk:
+            return docx_writer.fill_body(doc_io, transcription.split('\n'))
         return doc_io
     except Exception as e:
         st.error(f"Eroare creare document: {e}")
         return None
 
+def render_export_button(export_file, export_format, base_name, key=None):
+    """Buton de descărcare pentru un export din exporters.EXPORT_FORMATS"""
+    mime, extension = exporters.EXPORT_FORMATS[export_format]
+    st.download_button(
+        f"📥 {export_format.upper()}",
+        export_file,
+        f"{base_name}.{extension}",
+        mime=mime,
+        key=key
+    )
+
 # ==================== UI COMPONENTS ====================
 
+@st.cache_data(ttl=SIDEBAR_STATS_TTL_S, show_spinner=False)
+def cached_stage_latency_stats(days: int):
+    """Latența pe etape, partajată între reruns și sesiuni (expanderul rulează mereu)"""
+    return metrics.stage_latency_stats(days=days, db_file=DB_FILE)
+
+@st.cache_data(ttl=SIDEBAR_STATS_TTL_S, show_spinner=False)
+def cached_key_token_rollup(days: int):
+    """Consumul zilnic pe chei (toate sesiunile), partajat între reruns"""
+    return metrics.daily_token_rollup(days=days, by_key=True, db_file=DB_FILE)
+
 def render_sidebar():
     with st.sidebar:
         st.markdown("## ⚙️ Configurare")
@@ -972,12 +1373,54 @@ def render_sidebar():
                 else:
                     st.warning(f"⚠️ {lib}")
         
+        # Latență pe etape (ultimele 7 zile)
+        with st.expander("📈 Performanță pipeline"):
+            try:
+                stats = cached_stage_latency_stats(7)
+            except sqlite3.Error:
+                stats = []
+            if stats:
+                st.dataframe(stats, hide_index=True, use_container_width=True)
+            else:
+                st.caption("Nu există încă date")
+        
+        # Consum de tokeni: sesiunea și fiecare cheie
+        with st.expander("💰 Consum tokeni"):
+            session_tokens = metrics.tokens_today(session_id=st.session_state.session_id, db_file=DB_FILE)
+            st.progress(
+                min(session_tokens / model_router.SESSION_DAILY_TOKEN_BUDGET, 1.0),
+                text=f"Azi: {session_tokens:,} / {model_router.SESSION_DAILY_TOKEN_BUDGET:,} tokeni"
+            )
+            try:
+                rollup = metrics.daily_token_rollup(days=7, session_id=st.session_state.session_id, db_file=DB_FILE)
+                key_rollup = cached_key_token_rollup(7)
+            except sqlite3.Error:
+                rollup, key_rollup = [], []
+            if rollup:
+                st.dataframe(rollup, hide_index=True, use_container_width=True)
+            
+            all_keys = st.session_state.get('temp_api_keys', []) + keys
+            if all_keys:
+                st.markdown("**Pe chei**")
+                labels = {}
+                for index, api_key in enumerate(all_keys):
+                    labels[metrics.key_fingerprint(api_key)] = f"Cheia {index + 1}"
+                    key_tokens = metrics.tokens_today(api_key=api_key, db_file=DB_FILE)
+                    st.progress(
+                        min(key_tokens / model_router.KEY_DAILY_TOKEN_BUDGET, 1.0),
+                        text=f"Cheia {index + 1}, azi: {key_tokens:,} / {model_router.KEY_DAILY_TOKEN_BUDGET:,} tokeni"
+                    )
+                key_rows = [dict(row, key=labels[row["key"]]) for row in key_rollup if row["key"] in labels]
+                if key_rows:
+                    st.dataframe(key_rows, hide_index=True, use_container_width=True)
+        
         st.markdown("---")
         
         col1, col2 = st.columns(2)
         with col1:
             if st.button("🔄 Reset", use_container_width=True):
                 delete_session_data(st.session_state.session_id)
+                create_session(st.session_state.session_id)
                 st.session_state.messages = []
                 st.session_state.transcriptions = []
                 st.success("✅ Resetat!")
@@ -994,6 +1437,189 @@ def render_sidebar():
                 set_session_id_in_url(new_id)
                 st.rerun()
 
+def start_eta_countdown(placeholder, remaining_fn):
+    """
+    Actualizează în fiecare secundă timpul rămas estimat, și în timpul
+    apelurilor blocante (ex. generarea). Se oprește cu .set() pe rezultat.
+    """
+    stop = threading.Event()
+    
+    def run():
+        while not stop.wait(1.0):
+            try:
+                placeholder.caption(f"⏱️ Timp rămas estimat: {eta.format_eta(remaining_fn())}")
+            except Exception:
+                return  # sesiunea s-a închis
+    
+    if add_script_run_ctx is None:
+        return stop
+    thread = threading.Thread(target=run, name="eta-countdown", daemon=True)
+    add_script_run_ctx(thread)
+    thread.start()
+    return stop
+
+def render_transcription_result(transcription, transcription_id, video_name, source_lang, target_lang,
+                                file_size_mb, source_type, source_url, tracer=None):
+    """Transcrierea finalizată și butoanele de descărcare"""
+    st.markdown("### 📝 Transcriere")
+    st.markdown(f"""
+    <div class="transcription-box">
+{transcription}
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Butoane descărcare
+    col1, col2, col3, col4, col5 = st.columns(5)
+    
+    with col1:
+        with metrics.span(tracer, "export") as export_span:
+            word_doc = create_word_document(
+                transcription, 
+                video_name,
+                source_lang, 
+                target_lang,
+                file_size_mb,
+                source_type,
+                source_url
+            )
+            if word_doc:
+                export_span["bytes"] = word_doc.getbuffer().nbytes
+        if word_doc:
+            st.download_button(
+                "📥 Descarcă Word",
+                word_doc,
+                f"transcriere_{video_name.split('.')[0]}.docx",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            )
+    
+    with col2:
+        st.download_button(
+            "📥 Descarcă Text",
+            transcription,
+            f"transcriere_{video_name.split('.')[0]}.txt",
+            mime="text/plain"
+        )
+    
+    export_meta = {"video_name": video_name, "source_language": source_lang, "target_language": target_lang}
+    for column, export_format in zip((col3, col4, col5), ("srt", "vtt", "json")):
+        with column:
+            with metrics.span(tracer, "export") as export_span:
+                rows = (segments.iter_segments(transcription_id, db_file=DB_FILE)
+                        if transcription_id else segments.parse_segments(transcription))
+                export_file = exporters.export_buffer(export_format, rows, export_meta)
+                export_span["bytes"] = export_file.getbuffer().nbytes
+            render_export_button(export_file, export_format, f"transcriere_{video_name.split('.')[0]}")
+
+def follow_flight(flight, source_lang, target_lang):
+    """
+    Urmărește un job identic pornit de altă sesiune și salvează rezultatul
+    lui în sesiunea curentă, fără a descărca sau transcrie din nou.
+    Returnează False dacă liderul a renunțat (jobul trebuie reluat).
+    """
+    st.info("🔗 Același video se transcrie deja în altă sesiune; aștept rezultatul...")
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    
+    deadline = time.time() + singleflight.FOLLOW_TIMEOUT_S
+    while not flight.wait(timeout=0.5):
+        progress_bar.progress(min(flight.progress, 1.0))
+        status_text.text(flight.status)
+        if time.time() > deadline:
+            st.error("❌ Jobul urmărit nu s-a terminat la timp")
+            return True
+    
+    if flight.abandoned:
+        progress_bar.empty()
+        status_text.empty()
+        return False
+    
+    if flight.error:
+        st.error(f"❌ Jobul urmărit a eșuat: {flight.error}")
+        return True
+    
+    progress_bar.progress(1.0)
+    status_text.text("✅ Transcriere completă!")
+    save_shared_result(flight.result, source_lang, target_lang)
+    return True
+
+def follow_remote_job(job_key, job, update_progress):
+    """
+    Urmărește jobul rulat de alt proces (replică) până la final.
+    Returnează (rezultat, None, None), (None, None, eroare) sau
+    (None, lease, None) dacă procesul acela a murit și jobul a fost preluat aici.
+    """
+    deadline = time.time() + singleflight.FOLLOW_TIMEOUT_S
+    update_progress(job["progress"] or 0, "🔗 Același video se transcrie pe alt server; aștept rezultatul...")
+    while time.time() < deadline:
+        if job and job["status"] == jobs.DONE:
+            result = get_transcription_result(job["transcription_id"])
+            if result:
+                return result, None, None
+            return None, None, "Rezultatul jobului nu mai există"
+        if job and job["status"] == jobs.FAILED:
+            return None, None, job["error"]
+        if job is None or jobs.lease_expired(job):
+            lease, claimed = jobs.claim(job_key, st.session_state.session_id, db_file=DB_FILE)
+            if lease:
+                return None, lease, None
+            # Alt urmăritor a preluat jobul: se așteaptă și se recitește rândul
+            time.sleep(jobs.POLL_S)
+            job = jobs.get_job(job_key, db_file=DB_FILE) or claimed
+            continue
+        
+        if job["status_text"]:
+            update_progress(job["progress"] or 0, job["status_text"])
+        time.sleep(jobs.POLL_S)
+        job = jobs.get_job(job_key, db_file=DB_FILE)
+    
+    return None, None, "Jobul urmărit nu s-a terminat la timp"
+
+def save_shared_result(result, source_lang, target_lang):
+    """Salvează în sesiunea curentă rezultatul unui job rulat de altcineva și îl afișează"""
+    transcription_id = save_transcription(
+        st.session_state.session_id,
+        result["video_name"],
+        source_lang,
+        target_lang,
+        result["transcription"],
+        result["file_size_mb"],
+        result["process_method"],
+        result["source_url"],
+        result["source_type"],
+        continuations=result["continuations"]
+    )
+    
+    st.success("🎉 Video transcris cu succes!")
+    render_transcription_result(
+        result["transcription"], transcription_id, result["video_name"], source_lang, target_lang,
+        result["file_size_mb"], result["source_type"], result["source_url"]
+    )
+
+def render_probe(source_type, source_data):
+    """
+    Sondează sursa remote înainte de descărcare și afișează rezultatul.
+    Returnează info (poate fi parțial) sau None dacă sursa e respinsă.
+    """
+    with st.spinner("🔎 Verific fișierul..."):
+        info, error = probe.probe_source(source_type, source_data)
+    if error:
+        st.warning(f"⚠️ Nu am putut verifica fișierul înainte de descărcare: {error}")
+        return probe.empty_info()
+    
+    route, reason = probe.route(info, GEMINI_DIRECT_UPLOAD_LIMIT_MB, MAX_FILE_SIZE_MB)
+    if route == probe.REJECT:
+        st.error(f"❌ {reason}")
+        return None
+    
+    summary = probe.describe(info)
+    if info.get('is_media'):
+        st.success(f"✅ {'Audio' if route == probe.AUDIO_ONLY else 'Video'} detectat" + (f": {summary}" if summary else ""))
+    elif summary:
+        st.caption(f"📄 {summary}")
+    if reason:
+        st.info(f"💡 {reason}")
+    return info
+
 def render_upload_tab():
     # Selector tip input
     input_type = st.radio(
@@ -1047,11 +1673,14 @@ def render_upload_tab():
                     st.info("💡 Folosește tab-ul YouTube pentru link-uri YouTube")
                 elif url_type == 'gdrive':
                     st.info("💡 Folosește tab-ul Google Drive pentru link-uri Drive")
-                elif url_type == 'direct':
-                    st.success(f"✅ Link video detectat")
-                    video_source = ('direct', video_url, 0)
                 else:
-                    st.warning("⚠️ Verifică să fie un link direct către fișier video")
+                    # Și linkurile fără extensie se sondează: decide Content-Type / ffprobe
+                    info = render_probe('direct', video_url)
+                    if info is not None:
+                        video_source = ('direct', video_url, info.get('size_mb') or 0)
+                        video_info = {'duration': info.get('duration_s')}
+                    elif url_type != 'direct':
+                        st.warning("⚠️ Verifică să fie un link direct către fișier video")
         
         elif input_type == "🎬 YouTube":
             st.markdown("### 🎬 YouTube Video")
@@ -1114,7 +1743,10 @@ def render_upload_tab():
                 if file_id:
                     st.success(f"✅ File ID: {file_id[:20]}...")
                     st.info("📌 Asigură-te că fișierul este public sau 'Anyone with link'")
-                    video_source = ('gdrive', file_id, 0)
+                    info = render_probe('gdrive', file_id)
+                    if info is not None:
+                        video_source = ('gdrive', file_id, info.get('size_mb') or 0)
+                        video_info = {'duration': info.get('duration_s')}
                 else:
                     st.error("❌ Nu am putut extrage ID-ul fișierului")
     
@@ -1135,16 +1767,53 @@ def render_upload_tab():
             key="tgt_lang"
         )
         
+        trim_silence = st.checkbox(
+            "✂️ Elimină pauzele lungi",
+            value=False,
+            disabled=not media.ffmpeg_available(),
+            help="Taie liniștea și pauzele înainte de upload (necesită ffmpeg). "
+                 "Timestamp-urile sunt readuse la timpul original."
+        )
+        
+        video_mode = st.radio(
+            "🖼️ Mod video",
+            ["Video complet", "Audio + cadre cheie"],
+            index=0,
+            disabled=not media.ffmpeg_available(),
+            help="„Audio + cadre cheie” trimite pista audio și imagini la schimbările "
+                 "de scenă (slide-uri) în loc de video-ul complet: mult mai puțini bytes și tokeni."
+        )
+        
+        use_captions = polish_captions = False
+        if video_source and video_source[0] == 'youtube':
+            use_captions = st.checkbox(
+                "📝 Folosește subtitrările existente",
+                value=True,
+                help="Dacă video-ul are subtitrări (manuale sau automate în limba vorbită), "
+                     "transcrierea se face din ele în câteva secunde, fără descărcarea video-ului. "
+                     "Altfel se transcrie din video."
+            )
+            polish_captions = st.checkbox(
+                "✨ Corectează subtitrările cu AI",
+                value=True,
+                disabled=not use_captions,
+                help="Un model text rapid corectează punctuația și cuvintele greșite. "
+                     "Traducerea în limba țintă se face oricum când e nevoie."
+            )
+        
         if video_source:
-            # Estimare timp
-            source_type = video_source[0]
-            est_times = {
-                'upload': "1-3 minute",
-                'youtube': "2-5 minute",
-                'gdrive': "2-5 minute",
-                'direct': "2-5 minute"
-            }
-            st.info(f"⏱️ Estimare: {est_times.get(source_type, '2-5 minute')}")
+            # Estimare timp, din timpii joburilor anterioare (eta.py)
+            estimate_s = eta.estimate_total(
+                video_source[0],
+                video_source[2] or None,
+                video_info.get('duration'),
+                preprocess=trim_silence or video_mode == "Audio + cadre cheie",
+                db_file=DB_FILE
+            )
+            st.info(f"⏱️ Estimare: {eta.format_eta(estimate_s)}")
+            
+            load = admission.snapshot()
+            st.caption(f"🚦 Server: {load['running']}/{load['capacity']} joburi active, {load['queued']} în coadă")
     
     # Buton transcriere
     if video_source:
@@ -1158,43 +1827,220 @@ def render_upload_tab():
                 st.error("❌ Nu există chei API!")
                 return
             
-            working_key, _, msg = get_working_api_key(keys)
+            working_key, key_index, msg = get_working_api_key(keys)
             
             if not working_key:
                 st.error(f"❌ {msg}")
                 return
             
+            # Un job identic deja în lucru (altă sesiune) se urmărește, nu se repetă
+            job_key = singleflight.job_key(video_source[0], video_source[1], source_lang, target_lang,
+                                           trim_silence, video_mode, use_captions, polish_captions)
+            while True:
+                flight, is_leader = singleflight.join(job_key, st.session_state.session_id)
+                if is_leader:
+                    break
+                if follow_flight(flight, source_lang, target_lang):
+                    return
+            
             progress_bar = st.progress(0)
             status_text = st.empty()
+            lease = None
             
             def update_progress(value, text):
                 progress_bar.progress(min(value, 1.0))
                 status_text.text(text)
+                flight.publish(value, text)
+                if lease:
+                    lease.publish(value, text)
             
+            # Același job poate rula deja în alt proces care folosește aceeași bază
             try:
+                lease, remote_job = jobs.claim(job_key, st.session_state.session_id, db_file=DB_FILE)
+                if not lease:
+                    result, lease, error = follow_remote_job(job_key, remote_job, update_progress)
+                    if error:
+                        flight.fail(error)
+                        st.error(f"❌ Jobul urmărit a eșuat: {error}")
+                        return
+                    if result:
+                        flight.finish(result)
+                        update_progress(1.0, "✅ Transcriere completă!")
+                        save_shared_result(result, source_lang, target_lang)
+                        return
+            except sqlite3.Error as e:
+                # Baza ocupată (BEGIN IMMEDIATE): urmăritorii primesc motivul real
+                error = f"Baza de date a joburilor nu răspunde: {e}"
+                flight.fail(error)
+                st.error(f"❌ {error}")
+                return
+            finally:
+                if not lease and not flight.done:
+                    flight.fail("Job întrerupt")
+            
+            tracer = metrics.Tracer(
+                st.session_state.session_id,
+                video_source[0],
+                key_index=key_index,
+                db_file=DB_FILE
+            )
+            job_error = None
+            ticket = None
+            scratch_job = None
+            stop_countdown = None
+            preprocess = trim_silence or video_mode == "Audio + cadre cheie"
+            media_mode = "keyframes" if video_mode == "Audio + cadre cheie" else "full"
+            eta_text = st.empty()
+            
+            def publish_result(transcription, video_name, file_size_mb, source_type, source_url,
+                               process_method, continuations=0):
+                """Salvează transcrierea, încheie jobul și afișează rezultatul"""
+                lease.check()
+                with tracer.span("persistence", bytes=len(transcription.encode('utf-8'))):
+                    transcription_id = save_transcription(
+                        st.session_state.session_id,
+                        video_name,
+                        source_lang,
+                        target_lang,
+                        transcription,
+                        file_size_mb,
+                        process_method,
+                        source_url,
+                        source_type,
+                        continuations=continuations
+                    )
+                
+                if not lease.complete(transcription_id):
+                    # Preluat de alt proces în timpul salvării: rezultatul rămâne
+                    # în această sesiune, dar rândul jobului e al celuilalt proces
+                    tracer.annotate(lease="lost")
+                    st.warning("⚠️ Jobul a fost preluat între timp de alt proces; "
+                               "rezultatul e salvat doar în această sesiune.")
+                flight.finish({
+                    "transcription": transcription,
+                    "video_name": video_name,
+                    "file_size_mb": file_size_mb,
+                    "source_type": source_type,
+                    "source_url": source_url,
+                    "continuations": continuations,
+                    "process_method": process_method,
+                })
+                
+                update_progress(1.0, "✅ Transcriere completă!")
+                st.success(f"🎉 Video transcris cu succes!")
+                
+                render_transcription_result(
+                    transcription, transcription_id, video_name, source_lang, target_lang,
+                    file_size_mb, source_type, source_url, tracer=tracer
+                )
+            
+            try:
+                # Sondare înainte de orice transfer mare (rezultatul din interfață
+                # e în cache): respingere sau alt mod de trimitere
+                if video_source[0] in ('direct', 'gdrive'):
+                    with tracer.span("probe") as probe_span:
+                        probe_info, probe_error = probe.probe_source(video_source[0], video_source[1])
+                        if probe_error:
+                            probe_span["outcome"] = "error"
+                            probe_span["error"] = probe_error
+                    media_route, reason = probe.route(probe_info, GEMINI_DIRECT_UPLOAD_LIMIT_MB, MAX_FILE_SIZE_MB)
+                    if media_route == probe.REJECT:
+                        job_error = reason
+                        st.error(f"❌ {reason}")
+                        return
+                    if media_route == probe.KEYFRAMES:
+                        media_mode = "keyframes"
+                        preprocess = True
+                
+                # Admitere: locuri limitate pe proces și pe sesiune, jobul cel
+                # mai scurt primul; peste capacitate se respinge imediat
+                ticket, reason = admission.submit(
+                    st.session_state.session_id,
+                    admission.estimate_job_seconds(
+                        video_source[0], video_source[2], video_info.get('duration'),
+                        preprocess=preprocess, db_file=DB_FILE
+                    ),
+                    label=video_source[0]
+                )
+                if not ticket:
+                    # Limita ține de sesiunea liderului: jobul se eliberează fără
+                    # eșec, iar un urmăritor (aici sau în alt proces) îl preia
+                    job_error = reason
+                    flight.abandon()
+                    lease.release()
+                    st.error(f"🚦 {reason}")
+                    return
+                while not ticket.wait(timeout=1.0):
+                    eta_minutes = max(1, round(ticket.eta_s() / 60))
+                    update_progress(0.0, f"⏳ În coadă: poziția {ticket.position()}, start estimat în ~{eta_minutes} min")
+                lease.check()
+                
+                job_estimate = eta.estimate(
+                    video_source[0], video_source[2] or None, video_info.get('duration'),
+                    preprocess=preprocess, db_file=DB_FILE
+                )
+                stop_countdown = start_eta_countdown(eta_text, lambda: eta.remaining(job_estimate, tracer))
+                
                 source_type, source_data, file_size_mb = video_source
                 
+                # Calea rapidă: subtitrările existente, fără descărcarea video-ului
+                if source_type == 'youtube' and use_captions:
+                    job_info = {}
+                    caption_result, reason = transcribe_from_captions(
+                        source_data,
+                        source_lang,
+                        target_lang,
+                        working_key,
+                        polish=polish_captions,
+                        progress_callback=update_progress,
+                        tracer=tracer,
+                        session_id=st.session_state.session_id,
+                        job_info=job_info
+                    )
+                    if caption_result:
+                        # Timpii căii rapide nu intră în estimările pentru video YouTube
+                        tracer.source_type = "youtube_captions"
+                        publish_result(
+                            caption_result["transcription"], caption_result["video_name"], 0,
+                            source_type, f"https://youtube.com/watch?v={source_data}",
+                            "captions", job_info.get("continuations", 0)
+                        )
+                        return
+                    update_progress(0.05, f"ℹ️ {reason}: transcriu din video...")
+                
+                lease.check()
+                scratch_job = scratch.start_job(int((video_source[2] or 0) * 1024 * 1024))
+                
                 # Procesare în funcție de tip
                 if source_type == 'upload':
                     # Upload direct
                     update_progress(0.1, "📁 Salvare fișier...")
                     
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{source_data.name.split('.')[-1]}") as tmp:
-                        tmp.write(source_data.getbuffer())
-                        file_path = tmp.name
+                    with tracer.span("staging", bytes=source_data.size):
+                        file_path = scratch_job.path(f".{source_data.name.split('.')[-1]}")
+                        with open(file_path, 'wb') as tmp:
+                            tmp.write(source_data.getbuffer())
                     
                     video_name = source_data.name
                     source_url = ""
                     
                 elif source_type == 'youtube':
                     # Descarcă de pe YouTube
-                    file_path, video_name, download_type = download_youtube_video(
-                        source_data, 
-                        max_size_mb=GEMINI_DIRECT_UPLOAD_LIMIT_MB,
-                        progress_callback=update_progress
-                    )
+                    with tracer.span("download") as download_span:
+                        file_path, video_name, download_type = download_youtube_video(
+                            source_data, 
+                            max_size_mb=GEMINI_DIRECT_UPLOAD_LIMIT_MB,
+                            progress_callback=update_progress,
+                            job=scratch_job
+                        )
+                        if file_path:
+                            download_span["bytes"] = os.path.getsize(file_path)
+                        else:
+                            download_span["outcome"] = "error"
+                            download_span["error"] = download_type
                     
                     if not file_path:
+                        job_error = download_type
                         st.error(f"❌ Nu s-a putut descărca: {download_type}")
                         return
                     
@@ -1206,12 +2052,20 @@ def render_upload_tab():
                 
                 elif source_type == 'gdrive':
                     # Descarcă de pe Google Drive
-                    file_path, video_name, error = download_gdrive_video(
-                        source_data,
-                        progress_callback=update_progress
-                    )
+                    with tracer.span("download") as download_span:
+                        file_path, video_name, error = download_gdrive_video(
+                            source_data,
+                            progress_callback=update_progress,
+                            job=scratch_job
+                        )
+                        if file_path:
+                            download_span["bytes"] = os.path.getsize(file_path)
+                        else:
+                            download_span["outcome"] = "error"
+                            download_span["error"] = error
                     
                     if not file_path:
+                        job_error = error
                         st.error(f"❌ Nu s-a putut descărca: {error}")
                         return
                     
@@ -1220,27 +2074,82 @@ def render_upload_tab():
                 
                 elif source_type == 'direct':
                     # Descarcă de la URL direct
-                    file_path, video_name, error = download_direct_video(
-                        source_data,
-                        progress_callback=update_progress
-                    )
+                    with tracer.span("download") as download_span:
+                        file_path, video_name, error = download_direct_video(
+                            source_data,
+                            progress_callback=update_progress,
+                            job=scratch_job
+                        )
+                        if file_path:
+                            download_span["bytes"] = os.path.getsize(file_path)
+                        else:
+                            download_span["outcome"] = "error"
+                            download_span["error"] = error
                     
                     if not file_path:
+                        job_error = error
                         st.error(f"❌ Nu s-a putut descărca: {error}")
                         return
                     
                     file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
                     source_url = source_data
                 
-                # Verifică dimensiunea
-                if file_size_mb > GEMINI_DIRECT_UPLOAD_LIMIT_MB:
-                    st.error(f"❌ Fișier prea mare după descărcare: {file_size_mb:.1f}MB")
-                    os.unlink(file_path)
+                lease.check()
+                
+                # Pistele reale ale fișierului local: dimensiune, audio, durată
+                local_info = probe.probe_file(file_path)
+                media_route, reason = probe.route(local_info, GEMINI_DIRECT_UPLOAD_LIMIT_MB, MAX_FILE_SIZE_MB)
+                if media_route == probe.REJECT:
+                    job_error = reason
+                    st.error(f"❌ {reason}")
                     return
+                if media_route == probe.KEYFRAMES:
+                    media_mode = "keyframes"
                 
                 # Procesare și transcriere
-                is_audio = source_type == 'youtube' and 'is_audio_only' in locals() and is_audio_only
+                is_audio = media_route == probe.AUDIO_ONLY or (
+                    source_type == 'youtube' and 'is_audio_only' in locals() and is_audio_only
+                )
+                duration_s = video_info.get('duration') or local_info.get('duration_s')
+                
+                # Dimensiunea reală e cunoscută acum: estimarea se reface
+                tracer.annotate(file_size_mb=file_size_mb, duration_s=duration_s)
+                job_estimate = eta.estimate(source_type, file_size_mb, duration_s,
+                                            preprocess=preprocess, db_file=DB_FILE)
+                
+                # Eliminarea pauzelor: se încarcă mai puține secunde, iar
+                # timestamp-urile se refac la final după time_map
+                time_map = None
+                if trim_silence:
+                    update_progress(0.25, "✂️ Eliminare pauze...")
+                    trim_key = media_cache.derived_key(
+                        media_cache.source_key(source_type, source_data, GEMINI_DIRECT_UPLOAD_LIMIT_MB), "trim"
+                    )
+                    with tracer.span("preprocess", bytes=os.path.getsize(file_path)) as preprocess_span:
+                        trimmed_path, trim_meta = media_cache.lookup(trim_key, scratch_job)
+                        if trimmed_path:
+                            time_map = media.TimeMap([tuple(span) for span in trim_meta['spans']])
+                            preprocess_span["outcome"] = "cached"
+                        else:
+                            trimmed_path, time_map = media.trim_silence(
+                                file_path,
+                                scratch_job.path(os.path.splitext(file_path)[1] or '.mp4')
+                            )
+                            if trimmed_path:
+                                media_cache.store(trim_key, trimmed_path, spans=time_map.spans)
+                        if trimmed_path:
+                            preprocess_span["bytes"] = os.path.getsize(trimmed_path)
+                        elif preprocess_span.get("outcome") != "cached":
+                            preprocess_span["outcome"] = "skipped"
+                    
+                    if trimmed_path:
+                        os.unlink(file_path)
+                        file_path = trimmed_path
+                        file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+                        duration_s = time_map.kept_seconds
                 
+                lease.check()
+                job_info = {}
                 transcription, error = process_and_transcribe(
                     file_path, 
                     source_lang, 
@@ -1248,7 +2157,13 @@ def render_upload_tab():
                     working_key,
                     file_size_mb,
                     update_progress,
-                    is_audio_only=is_audio
+                    is_audio_only=is_audio,
+                    tracer=tracer,
+                    session_id=st.session_state.session_id,
+                    duration_s=duration_s,
+                    media_mode=media_mode,
+                    job_info=job_info,
+                    job=scratch_job
                 )
                 
                 # Cleanup
@@ -1258,68 +2173,120 @@ def render_upload_tab():
                     pass
                 
                 if error:
+                    job_error = error
                     st.error(error)
                     return
                 
                 if not transcription:
+                    job_error = "empty transcription"
                     st.error("❌ Nu s-a putut genera transcrierea")
                     return
                 
+                if time_map:
+                    transcription = timestamps.remap_timestamps(transcription, time_map.to_original)
+                
                 # Salvează în DB
-                save_transcription(
-                    st.session_state.session_id,
-                    video_name,
-                    source_lang,
-                    target_lang,
-                    transcription,
-                    file_size_mb,
-                    source_type,
-                    source_url,
-                    source_type
+                publish_result(
+                    transcription, video_name, file_size_mb, source_type, source_url,
+                    job_info.get("process_method", "direct"), job_info.get("continuations", 0)
                 )
                 
-                update_progress(1.0, "✅ Transcriere completă!")
-                st.success(f"🎉 Video transcris cu succes!")
-                
-                # Afișează rezultatul
-                st.markdown("### 📝 Transcriere")
-                st.markdown(f"""
-                <div class="transcription-box">
-{transcription}
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Butoane descărcare
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    word_doc = create_word_document(
-                        transcription, 
-                        video_name,
-                        source_lang, 
-                        target_lang,
-                        file_size_mb,
-                        source_type,
-                        source_url
-                    )
-                    if word_doc:
-                        st.download_button(
-                            "📥 Descarcă Word",
-                            word_doc,
-                            f"transcriere_{video_name.split('.')[0]}.docx",
-                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                        )
-                
-                with col2:
-                    st.download_button(
-                        "📥 Descarcă Text",
-                        transcription,
-                        f"transcriere_{video_name.split('.')[0]}.txt",
-                        mime="text/plain"
-                    )
-                
+            except jobs.LeaseLost as e:
+                # Altă replică rulează jobul: rezultatul ei ajunge la urmăritori
+                job_error = str(e)
+                st.warning(f"⚠️ {e}. Reîncercați pentru a prelua rezultatul.")
             except Exception as e:
+                job_error = str(e)
                 st.error(f"❌ Eroare: {str(e)}")
+            finally:
+                if stop_countdown:
+                    stop_countdown.set()
+                eta_text.empty()
+                tracer.annotate(outcome="error" if job_error else "ok")
+                if not lease.done:
+                    lease.fail(job_error)
+                if not flight.done:
+                    flight.fail(job_error)
+                if scratch_job:
+                    scratch_job.cleanup()
+                if ticket:
+                    admission.release(ticket)
+                tracer.flush()
+                metrics.record_key_usage(
+                    key_index,
+                    "error" if job_error else "ok",
+                    job_error,
+                    db_file=DB_FILE
+                )
+
+def build_session_docx(text, info):
+    """Documentul Word al unei transcrieri din arhiva sesiunii"""
+    return create_word_document(
+        text,
+        info['video_name'],
+        info.get('source_language') or '',
+        info.get('target_language') or '',
+        info.get('file_size_mb') or 0,
+        info.get('source_type') or 'upload',
+        info.get('source_url') or ''
+    )
+
+def render_session_zip_export(session_id, count):
+    """Arhiva ZIP cu toate transcrierile sesiunii, construită la cerere pe disc"""
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        if st.button(f"📦 Pregătește arhiva ({count} transcrieri)", key="zip_prepare"):
+            with st.spinner("Construiesc arhiva..."):
+                zip_path = scratch.new_path(".zip")
+                with open(zip_path, "wb") as zip_file:
+                    session_export.write_session_zip(
+                        session_id, zip_file, db_file=DB_FILE,
+                        build_docx=build_session_docx if DOCX_AVAILABLE else None
+                    )
+            old_path = st.session_state.get('session_zip_path')
+            if old_path and os.path.exists(old_path):
+                os.unlink(old_path)
+            st.session_state.session_zip_path = zip_path
+    
+    zip_path = st.session_state.get('session_zip_path')
+    if zip_path and os.path.exists(zip_path):
+        with col2:
+            with open(zip_path, "rb") as zip_file:
+                st.download_button(
+                    f"📥 Descarcă tot ({os.path.getsize(zip_path) / (1024 * 1024):.1f}MB)",
+                    zip_file,
+                    f"sesiune_{session_id}.zip",
+                    mime="application/zip",
+                    key="zip_download"
+                )
+
+HISTORY_EXPORT_FORMATS = ("docx", "srt", "vtt", "json")
+
+def build_history_export(trans, export_format):
+    """
+    Exportul unei transcrieri din istoric (Word sau exporters.EXPORT_FORMATS),
+    ca bytes păstrați în session_state între rerun-uri (None la eșec)
+    """
+    if export_format == "docx":
+        word_doc = create_word_document(
+            trans['transcription'],
+            trans['video_name'],
+            trans.get('source_language', ''),
+            trans.get('target_language', ''),
+            trans.get('file_size_mb', 0),
+            trans.get('source_type', ''),
+            trans.get('source_url', '')
+        )
+        return word_doc.getvalue() if word_doc else None
+    export_meta = {
+        "transcription_id": trans['id'],
+        "video_name": trans['video_name'],
+        "source_language": trans.get('source_language'),
+        "target_language": trans.get('target_language'),
+    }
+    return exporters.export_buffer(
+        export_format, segments.iter_segments(trans['id'], db_file=DB_FILE), export_meta
+    ).getvalue()
 
 def render_history_tab():
     st.markdown("### 📜 Istoric Transcrieri")
@@ -1329,6 +2296,8 @@ def render_history_tab():
     if not transcriptions:
         st.info("📭 Nu există transcrieri încă")
     else:
+        render_session_zip_export(st.session_state.session_id, len(transcriptions))
+        
         for i, trans in enumerate(transcriptions):
             # Icon pentru tip sursă
             source_icon = {
@@ -1368,28 +2337,10 @@ def render_history_tab():
                     label_visibility="collapsed"
                 )
                 
-                # Descărcări
-                col1, col2 = st.columns(2)
+                # Descărcări: textul e deja încărcat; celelalte formate se
+                # construiesc doar la cerere, nu la fiecare rerun
+                col1, col2, col3 = st.columns(3)
                 with col1:
-                    word_doc = create_word_document(
-                        trans['transcription'],
-                        trans['video_name'],
-                        trans.get('source_language', ''),
-                        trans.get('target_language', ''),
-                        trans.get('file_size_mb', 0),
-                        trans.get('source_type', ''),
-                        trans.get('source_url', '')
-                    )
-                    if word_doc:
-                        st.download_button(
-                            "📥 Word",
-                            word_doc,
-                            f"trans_{trans['id']}.docx",
-                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                            key=f"w_{trans['id']}"
-                        )
-                
-                with col2:
                     st.download_button(
                         "📥 Text",
                         trans['transcription'],
@@ -1397,6 +2348,36 @@ def render_history_tab():
                         mime="text/plain",
                         key=f"t_{trans['id']}"
                     )
+                
+                with col2:
+                    export_format = st.selectbox(
+                        "Format export",
+                        HISTORY_EXPORT_FORMATS,
+                        format_func=lambda name: "WORD" if name == "docx" else name.upper(),
+                        key=f"fmt_{trans['id']}",
+                        label_visibility="collapsed"
+                    )
+                
+                with col3:
+                    prepared_key = f"export_{trans['id']}"
+                    prepared = st.session_state.get(prepared_key)
+                    if not (prepared and prepared[0] == export_format):
+                        prepared = None
+                        if st.button("⚙️ Pregătește", key=f"prep_{trans['id']}"):
+                            prepared = (export_format, build_history_export(trans, export_format))
+                            st.session_state[prepared_key] = prepared
+                    if prepared and prepared[1]:
+                        if export_format == "docx":
+                            st.download_button(
+                                "📥 Word",
+                                prepared[1],
+                                f"trans_{trans['id']}.docx",
+                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                                key=f"w_{trans['id']}"
+                            )
+                        else:
+                            render_export_button(prepared[1], export_format, f"trans_{trans['id']}",
+                                                 key=f"{export_format}_{trans['id']}")
 
 def render_chat_tab():
     st.markdown("### 💬 Chat cu AI despre Transcrieri")
@@ -1428,17 +2409,10 @@ def render_chat_tab():
                     return
                 
                 try:
-                    genai.configure(api_key=working_key)
-                    model = genai.GenerativeModel('gemini-2.5-flash-lite')
+                    client = get_client(working_key)
                     
                     # Context
-                    recent = get_transcriptions(st.session_state.session_id)[:2]
-                    context = ""
-                    if recent:
-                        context = "Transcrieri recente:\n"
-                        for t in recent:
-                            source_type = t.get('source_type', 'upload')
-                            context += f"- {t['video_name']} ({source_type}): {t['transcription'][:300]}...\n\n"
+                    context = build_chat_context(st.session_state.session_id, prompt)
                     
                     full_prompt = f"""
 {context}
@@ -1448,14 +2422,30 @@ Utilizator: {prompt}
 Răspunde în română. Dacă întrebarea e despre transcrieri, folosește contextul de mai sus.
 """
                     
-                    response = model.generate_content(full_prompt)
+                    chat_model, _ = model_router.route_model(
+                        'gemini-2.5-flash-lite', st.session_state.session_id, working_key, db_file=DB_FILE
+                    )
+                    response = api_errors.call_with_retry(
+                        lambda: client.models.generate_content(
+                            model=chat_model,
+                            contents=full_prompt
+                        )
+                    )
+                    metrics.record_token_usage(
+                        response, st.session_state.session_id, working_key, chat_model, "chat", db_file=DB_FILE
+                    )
                     response_text = response.text
                     
                     st.markdown(response_text)
                     save_message(st.session_state.session_id, "assistant", response_text)
                     
                 except Exception as e:
-                    st.error(f"❌ Eroare: {e}")
+                    failure = api_errors.classify(e)
+                    api_errors.exclude_key(working_key, failure)
+                    if failure.kind == api_errors.OTHER:
+                        st.error(f"❌ Eroare: {e}")
+                    else:
+                        st.error(failure.user_message())
 
 # ==================== MAIN ====================
 
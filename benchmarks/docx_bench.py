@@ -0,0 +1,108 @@
+"""
+Benchmark pentru exportul Word al transcrierilor lungi.
+
+Compară create_word_document(bulk=False) (un paragraf python-docx per linie)
+cu scrierea bulk din docx_writer, pe transcrieri sintetice de N linii.
+Raportează timpul (cea mai bună din --runs), memoria maximă alocată
+(tracemalloc) și verifică faptul că ambele documente au aceleași paragrafe.
+
+Utilizare:
+    python benchmarks/docx_bench.py
+    python benchmarks/docx_bench.py --lines 1000,10000 --runs 5 --json docx.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+WORDS = ["transcriere", "video", "audio", "exemplu", "segment", "vorbitor",
+         "timp", "limba", "română", "text", "model", "sesiune", "&", "<notă>"]
+
+
+def synthetic_transcript(line_count: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = []
+    for i in range(line_count):
+        seconds = i * 3
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18)))
+        lines.append(f"[{seconds // 60:02d}:{seconds % 60:02d}] {words}")
+        if i % 50 == 49:
+            lines.append("")
+    return "\n".join(lines)
+
+
+def measure(build, runs: int) -> dict:
+    best = None
+    for _ in range(max(runs, 1)):
+        start = time.perf_counter()
+        result = build()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "peak_mb": peak / (1024 * 1024), "bytes": result.getbuffer().nbytes, "doc": result}
+
+
+def body_paragraphs(doc_io) -> list:
+    from docx import Document
+    doc_io.seek(0)
+    return [(p.text, p.paragraph_format.space_after) for p in Document(doc_io).paragraphs]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark export Word: python-docx vs bulk")
+    parser.add_argument("--lines", default="10000", help="Numărul de linii, separate prin virgulă")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", dest="json_path", help="Scrie rezultatele în fișierul JSON dat")
+    args = parser.parse_args()
+    json_path = Path(args.json_path).resolve() if args.json_path else None
+
+    # app.py creează data/ la import; benchmark-ul rulează într-un director temporar
+    workdir = tempfile.mkdtemp(prefix="docx_bench_")
+    os.chdir(workdir)
+    import app
+
+    if not app.DOCX_AVAILABLE:
+        print("❌ python-docx nu este instalat")
+        return 1
+
+    results = []
+    failed = False
+    for line_count in [int(value) for value in args.lines.split(",") if value.strip()]:
+        text = synthetic_transcript(line_count)
+
+        def build(bulk):
+            return lambda: app.create_word_document(text, "bench.mp4", "Auto-detect", "Română",
+                                                    12.5, "upload", "", bulk=bulk)
+
+        legacy = measure(build(False), args.runs)
+        bulk = measure(build(True), args.runs)
+        same = body_paragraphs(legacy.pop("doc")) == body_paragraphs(bulk.pop("doc"))
+        failed = failed or not same
+
+        speedup = legacy["seconds"] / bulk["seconds"] if bulk["seconds"] else float("inf")
+        print(f"📄 {line_count} linii")
+        print(f"  python-docx: {legacy['seconds']:.3f}s, {legacy['peak_mb']:.1f}MB, {legacy['bytes'] / 1024:.0f}KB")
+        print(f"  bulk:        {bulk['seconds']:.3f}s, {bulk['peak_mb']:.1f}MB, {bulk['bytes'] / 1024:.0f}KB")
+        print(f"  {speedup:.1f}x mai rapid, {'✅ aceleași paragrafe' if same else '❌ paragrafe diferite'}")
+        results.append({"lines": line_count, "legacy": legacy, "bulk": bulk,
+                        "speedup": speedup, "same_paragraphs": same})
+
+    if json_path:
+        json_path.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Buget de pornire la rece pentru app.py.
+
+Rulează `python -X importtime -c "import app"` într-un proces nou și eșuează
+dacă timpul cumulat de import depășește bugetul sau dacă la pornire se
+încarcă vreuna dintre dependențele grele (acestea trebuie încărcate leneș).
+
+Utilizare:
+    python benchmarks/import_budget.py
+    python benchmarks/import_budget.py --budget-ms 1500 --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Bugetul implicit poate fi suprascris din mediu (ex. în CI)
+DEFAULT_BUDGET_MS = int(os.environ.get("IMPORT_BUDGET_MS", "2000"))
+
+# Module care NU au voie să fie importate la pornire
+HEAVY_MODULES = [
+    "google.generativeai",
+    "google.genai",
+    "docx",
+    "yt_dlp",
+    "googleapiclient",
+]
+
+
+def measure_once(module: str) -> dict:
+    """Rulează un import la rece și returnează timpii per modul (în µs)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importul {module} a eșuat:\n{result.stderr[-2000:]}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0])
+            cumulative_us = int(parts[1])
+        except ValueError:
+            continue  # linia de antet
+        timings[parts[2].strip()] = (self_us, cumulative_us)
+    return timings
+
+
+def find_heavy_imports(timings: dict) -> list:
+    """Returnează modulele grele importate la pornire"""
+    found = []
+    for name in timings:
+        for heavy in HEAVY_MODULES:
+            if name == heavy or name.startswith(heavy + "."):
+                found.append(name)
+    return sorted(found)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Buget de pornire la rece pentru app.py")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--budget-ms", type=int, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", dest="json_path", help="Scrie rezultatele în fișierul JSON dat")
+    args = parser.parse_args()
+
+    runs = [measure_once(args.module) for _ in range(max(args.runs, 1))]
+    # Cea mai bună rulare elimină zgomotul sistemului
+    best = min(runs, key=lambda t: t.get(args.module, (0, 0))[1])
+    total_ms = best.get(args.module, (0, 0))[1] / 1000
+    heavy = find_heavy_imports(best)
+
+    slowest = sorted(best.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+
+    print(f"⏱️ Import {args.module}: {total_ms:.0f}ms (buget {args.budget_ms}ms, cea mai bună din {len(runs)})")
+    print("Cele mai lente module (timp propriu):")
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"  {self_us / 1000:8.1f}ms  {cumulative_us / 1000:8.1f}ms  {name}")
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps({
+            "module": args.module,
+            "total_ms": total_ms,
+            "budget_ms": args.budget_ms,
+            "heavy_imports": heavy,
+            "slowest": [
+                {"module": name, "self_ms": s / 1000, "cumulative_ms": c / 1000}
+                for name, (s, c) in slowest
+            ],
+        }, indent=2, ensure_ascii=False))
+
+    failed = False
+    if heavy:
+        print(f"❌ Module grele importate la pornire: {', '.join(heavy)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"❌ Buget depășit: {total_ms:.0f}ms > {args.budget_ms}ms")
+        failed = True
+    if not failed:
+        print("✅ În buget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
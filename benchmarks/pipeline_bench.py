@@ -0,0 +1,291 @@
+"""
+Benchmark end-to-end al pipeline-ului de transcriere, cu timpi per etapă.
+
+Rulează pipeline-ul real din app.py peste un corpus de fișiere media sintetice:
+    download_direct_video (server HTTP local) -> staging în fișier temporar ->
+    upload -> polling procesare -> generare (FakeClient) ->
+    save_transcription (SQLite) -> create_word_document
+
+Pentru fiecare etapă raportează timpul, debitul și RSS-ul maxim; rezultatul
+se scrie în JSON pentru comparație între versiuni.
+
+Utilizare:
+    python benchmarks/pipeline_bench.py --sizes 1,10,50 --out bench.json
+    python benchmarks/pipeline_bench.py --compare bench_vechi.json
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+STAGES = ["download", "staging", "upload", "polling", "generation", "persistence", "export"]
+
+# Regresie semnalată când o etapă devine mai lentă decât pragul (ex. 1.25 = +25%)
+DEFAULT_REGRESSION_THRESHOLD = 1.25
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_media_server(directory: Path):
+    """Pornește un server HTTP local care servește corpusul"""
+    handler = functools.partial(_QuietHandler, directory=str(directory))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def build_corpus(directory: Path, sizes_mb: list) -> list:
+    """Generează fișiere media sintetice (conținut aleator) de dimensiunile date"""
+    files = []
+    for size_mb in sizes_mb:
+        path = directory / f"synthetic_{size_mb}mb.mp4"
+        remaining = int(size_mb * 1024 * 1024)
+        with open(path, "wb") as f:
+            while remaining > 0:
+                chunk = min(remaining, 1024 * 1024)
+                f.write(os.urandom(chunk))
+                remaining -= chunk
+        files.append(path)
+    return files
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss este în KB pe Linux și în bytes pe macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class TimingClient:
+    """Învelește un client de model și măsoară upload, polling și generare"""
+
+    def __init__(self, client):
+        self._client = client
+        self.files = self
+        self.models = self
+        self.reset()
+
+    def reset(self):
+        self.upload_seconds = 0.0
+        self.upload_end = None
+        self.generate_start = None
+        self.generation_seconds = 0.0
+        self.output_tokens = 0
+
+    def upload(self, file, config=None):
+        start = time.perf_counter()
+        result = self._client.files.upload(file=file)
+        self.upload_end = time.perf_counter()
+        self.upload_seconds += self.upload_end - start
+        return result
+
+    def get(self, name):
+        return self._client.files.get(name=name)
+
+    def delete(self, name):
+        return self._client.files.delete(name=name)
+
+    def generate_content(self, model, contents, config=None):
+        self.generate_start = time.perf_counter()
+        response = self._client.models.generate_content(model=model, contents=contents, config=config)
+        self.generation_seconds += time.perf_counter() - self.generate_start
+        usage = getattr(response, "usage_metadata", None)
+        self.output_tokens += getattr(usage, "candidates_token_count", 0) or 0
+        return response
+
+
+def run_job(app, client, url: str, size_mb: float, media_seconds: float) -> dict:
+    stages = {}
+
+    start = time.perf_counter()
+    file_path, video_name, error = app.download_direct_video(url)
+    stages["download"] = time.perf_counter() - start
+    if error:
+        raise RuntimeError(error)
+
+    start = time.perf_counter()
+    with open(file_path, "rb") as src, tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp:
+        tmp.write(src.read())
+        staged_path = tmp.name
+    stages["staging"] = time.perf_counter() - start
+
+    client.reset()
+    try:
+        transcription, error = app.process_and_transcribe(
+            staged_path, "Auto-detect", "Română", "bench-key",
+            file_size_mb=size_mb, client=client
+        )
+    finally:
+        os.unlink(staged_path)
+        os.unlink(file_path)
+    if error:
+        raise RuntimeError(error)
+
+    stages["upload"] = client.upload_seconds
+    stages["polling"] = (client.generate_start - client.upload_end) if client.upload_end and client.generate_start else 0.0
+    stages["generation"] = client.generation_seconds
+
+    start = time.perf_counter()
+    app.save_transcription("bench", video_name, "Auto-detect", "Română", transcription,
+                           size_mb, "direct", url, "direct")
+    stages["persistence"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    doc = app.create_word_document(transcription, video_name, "Auto-detect", "Română", size_mb, "direct", url)
+    stages["export"] = time.perf_counter() - start
+    docx_bytes = len(doc.getvalue()) if doc else 0
+
+    lines = transcription.count("\n") + 1
+    return {
+        "size_mb": size_mb,
+        "media_seconds": media_seconds,
+        "transcript_lines": lines,
+        "output_tokens": client.output_tokens,
+        "docx_bytes": docx_bytes,
+        "stages": {
+            name: {
+                "seconds": round(seconds, 6),
+                "mb_per_s": round(size_mb / seconds, 2) if seconds > 0 and name in ("download", "staging", "upload") else None,
+            }
+            for name, seconds in stages.items()
+        },
+        "total_seconds": round(sum(stages.values()), 6),
+        "lines_per_s_export": round(lines / stages["export"], 1) if stages["export"] > 0 else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def summarize(jobs: list) -> dict:
+    summary = {}
+    for stage in STAGES:
+        values = [job["stages"][stage]["seconds"] for job in jobs if stage in job["stages"]]
+        if values:
+            summary[stage] = {
+                "mean_s": round(statistics.mean(values), 6),
+                "p50_s": round(statistics.median(values), 6),
+                "max_s": round(max(values), 6),
+                "total_s": round(sum(values), 6),
+            }
+    return summary
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Returnează etapele care au regresat față de baseline"""
+    regressions = []
+    print(f"\n📊 Comparație cu {baseline.get('revision') or 'baseline'}:")
+    for stage in STAGES:
+        old = baseline.get("summary", {}).get(stage, {}).get("total_s")
+        new = current["summary"].get(stage, {}).get("total_s")
+        if not old or new is None:
+            continue
+        ratio = new / old
+        marker = "❌" if ratio > threshold else "✅"
+        print(f"  {marker} {stage:12s} {old:9.3f}s -> {new:9.3f}s  ({ratio:.2f}x)")
+        if ratio > threshold:
+            regressions.append(stage)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end al pipeline-ului de transcriere")
+    parser.add_argument("--sizes", default="1,10,50", help="Dimensiuni corpus în MB, separate prin virgulă")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--model-time-scale", type=float, default=0.0,
+                        help="Scalare pentru latențele simulate ale modelului (0 = doar overhead-ul nostru)")
+    parser.add_argument("--processing-polls", type=int, default=1)
+    parser.add_argument("--out", default="bench_output.json")
+    parser.add_argument("--compare", help="Fișier JSON anterior pentru comparație")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    sizes = [float(s) for s in args.sizes.split(",") if s.strip()]
+    out_path = Path(args.out).resolve()
+    baseline_path = Path(args.compare).resolve() if args.compare else None
+
+    workdir = Path(tempfile.mkdtemp(prefix="transcriber_bench_"))
+    corpus_dir = workdir / "corpus"
+    corpus_dir.mkdir()
+    # app.py creează ./data la import; lucrăm într-un director izolat
+    os.chdir(workdir)
+
+    try:
+        import app
+        from fake_gemini import FakeClient
+
+        app.DB_FILE = workdir / "bench.db"
+        app.init_database()
+        # Fiecare rulare măsoară descărcarea reală, nu cache-ul media
+        app.media_cache.ENABLED = False
+
+        fake = FakeClient(time_scale=args.model_time_scale, processing_polls=args.processing_polls)
+        client = TimingClient(fake)
+
+        corpus = build_corpus(corpus_dir, sizes)
+        server, base_url = start_media_server(corpus_dir)
+
+        jobs = []
+        try:
+            for _ in range(max(args.repeat, 1)):
+                for size_mb, path in zip(sizes, corpus):
+                    media_seconds = path.stat().st_size / fake.media_bytes_per_second
+                    job = run_job(app, client, f"{base_url}/{path.name}", size_mb, media_seconds)
+                    jobs.append(job)
+                    stage_text = "  ".join(f"{name}={data['seconds']:.3f}s" for name, data in job["stages"].items())
+                    print(f"📦 {size_mb:g}MB: {stage_text}  rss={job['peak_rss_mb']}MB")
+        finally:
+            server.shutdown()
+
+        result = {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {
+                "sizes_mb": sizes,
+                "repeat": args.repeat,
+                "model_time_scale": args.model_time_scale,
+                "processing_polls": args.processing_polls,
+            },
+            "jobs": jobs,
+            "summary": summarize(jobs),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+        out_path.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        print(f"\n💾 Rezultate scrise în {out_path}")
+
+        if baseline_path:
+            baseline = json.loads(baseline_path.read_text())
+            if compare(result, baseline, args.threshold):
+                return 1
+        return 0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Subtitrările existente ale unui video YouTube, ca transcriere [MM:SS].
+
+Multe videoclipuri au subtitrări manuale sau generate automat. yt-dlp le
+listează fără descărcarea video-ului (subtitles / automatic_captions); se
+alege o pistă în limba vorbită, se descarcă (json3, cu vtt ca rezervă) și
+replicile se grupează în paragrafe cu timestamp-ul primei replici.
+
+Subtitrările manuale au prioritate. Dintre cele automate se acceptă doar
+pista în limba originală: celelalte sunt traduceri automate, mai slabe
+decât o traducere făcută de model pe textul original.
+"""
+import html
+import json
+import re
+
+import timestamps
+from lazy_imports import LazyModule
+
+yt_dlp = LazyModule("yt_dlp")
+requests = LazyModule("requests")
+
+FETCH_TIMEOUT_S = 30
+FORMAT_PREFERENCE = ("json3", "vtt")
+
+# Un paragraf nou începe după atâtea secunde, sau la final de propoziție
+PARAGRAPH_S = 20
+PARAGRAPH_MIN_S = 6
+# Sub atâtea replici, pista e considerată goală
+MIN_CUES = 3
+
+# Numele din app.LANGUAGES -> coduri ISO 639-1 folosite de YouTube
+LANGUAGE_CODES = {
+    "Romanian": "ro",
+    "English": "en",
+    "Spanish": "es",
+    "French": "fr",
+    "German": "de",
+    "Italian": "it",
+    "Portuguese": "pt",
+    "Russian": "ru",
+    "Chinese": "zh",
+    "Japanese": "ja",
+    "Korean": "ko",
+    "Arabic": "ar",
+    "Hindi": "hi",
+    "Turkish": "tr",
+}
+
+_VTT_TIME_RE = re.compile(r'(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})\s+-->')
+_TAG_RE = re.compile(r'<[^>]+>')
+_SENTENCE_END_RE = re.compile(r'[.!?…]["\')\]]?$')
+
+
+def _base_code(code: str) -> str:
+    """en-US, en-orig -> en"""
+    return (code or "").split("-")[0].lower()
+
+
+def _pick_format(formats: list):
+    for ext in FORMAT_PREFERENCE:
+        for entry in formats or []:
+            if entry.get("ext") == ext and entry.get("url"):
+                return entry
+    return None
+
+
+def choose_track(info: dict, language: str = None):
+    """
+    Pista de subtitrare pentru video: (cod, intrare_format, automată) sau None.
+    `language`: codul limbii vorbite, dacă e cunoscut; altfel limba
+    declarată a video-ului.
+    """
+    spoken = _base_code(language or info.get("language"))
+    manual = info.get("subtitles") or {}
+    automatic = info.get("automatic_captions") or {}
+
+    # Manuale: limba vorbită; fără limbă cunoscută, doar dacă există o singură pistă
+    candidates = [code for code in manual if code != "live_chat" and (not spoken or _base_code(code) == spoken)]
+    if candidates and (spoken or len(candidates) == 1):
+        code = min(candidates, key=len)
+        entry = _pick_format(manual[code])
+        if entry:
+            return code, entry, False
+
+    # Automate: pista originală (cod "-orig"), sau limba vorbită
+    originals = [code for code in automatic if code.endswith("-orig")]
+    if not originals and spoken:
+        originals = [code for code in automatic if code == spoken]
+    for code in originals:
+        if spoken and _base_code(code) != spoken:
+            continue
+        entry = _pick_format(automatic[code])
+        if entry:
+            return code, entry, True
+    return None
+
+
+def parse_json3(text: str) -> list:
+    """Replicile (secunde, text) din formatul json3 al YouTube"""
+    cues = []
+    for event in json.loads(text).get("events", []):
+        if "segs" not in event:
+            continue
+        line = "".join(seg.get("utf8", "") for seg in event["segs"]).replace("\n", " ").strip()
+        if line:
+            cues.append((event.get("tStartMs", 0) / 1000, line))
+    return cues
+
+
+def parse_vtt(text: str) -> list:
+    """
+    Replicile (secunde, text) dintr-un fișier WebVTT. Subtitrările automate
+    repetă rândul anterior în fiecare replică; repetițiile se elimină.
+    """
+    cues = []
+    previous = set()
+    for block in re.split(r'\n\s*\n', text.replace("\r\n", "\n")):
+        lines = block.strip().split("\n")
+        for index, line in enumerate(lines):
+            match = _VTT_TIME_RE.match(line)
+            if not match:
+                continue
+            hours, minutes, seconds, millis = match.groups()
+            start = int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+            current = [html.unescape(_TAG_RE.sub("", raw)).strip() for raw in lines[index + 1:]]
+            current = [raw for raw in current if raw]
+            fresh = [raw for raw in current if raw not in previous]
+            if fresh:
+                cues.append((start, " ".join(fresh)))
+            previous = set(current)
+            break
+    return cues
+
+
+def to_transcript(cues: list, paragraph_s: float = PARAGRAPH_S) -> str:
+    """Grupează replicile în paragrafe [MM:SS] text"""
+    lines = []
+    start = None
+    words = []
+    for seconds, text in cues:
+        if words:
+            elapsed = seconds - start
+            if elapsed >= paragraph_s or (elapsed >= PARAGRAPH_MIN_S and _SENTENCE_END_RE.search(words[-1])):
+                lines.append(f"{timestamps.format_clock(start)} {' '.join(words)}")
+                words = []
+        if not words:
+            start = seconds
+        words.append(text)
+    if words:
+        lines.append(f"{timestamps.format_clock(start)} {' '.join(words)}")
+    return "\n".join(lines)
+
+
+def fetch_captions(video_id: str, language: str = None):
+    """
+    Subtitrările video-ului ca transcriere. Returnează (rezultat, None) sau
+    (None, motiv) dacă nu există o pistă potrivită. Rezultatul: text, limba
+    pistei, automată, titlu, durată, număr de replici, bytes descărcați.
+    """
+    try:
+        with yt_dlp.YoutubeDL({"quiet": True, "no_warnings": True, "skip_download": True}) as ydl:
+            info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+    except Exception as e:
+        return None, f"Informațiile video nu sunt disponibile: {e}"
+
+    track = choose_track(info, language)
+    if not track:
+        return None, "Video-ul nu are subtitrări în limba vorbită"
+    code, entry, automatic = track
+
+    try:
+        response = requests.get(entry["url"], timeout=FETCH_TIMEOUT_S)
+        response.raise_for_status()
+        body = response.text
+        cues = parse_json3(body) if entry["ext"] == "json3" else parse_vtt(body)
+    except Exception as e:
+        return None, f"Descărcarea subtitrărilor a eșuat: {e}"
+
+    if len(cues) < MIN_CUES:
+        return None, "Subtitrările sunt goale"
+    return {
+        "text": to_transcript(cues),
+        "language": _base_code(code),
+        "automatic": automatic,
+        "title": info.get("title") or "YouTube Video",
+        "duration_s": info.get("duration"),
+        "cue_count": len(cues),
+        "bytes": len(body.encode("utf-8")),
+    }, None
@@ -0,0 +1,118 @@
+"""
+Compresia transparentă a textelor mari din sessions.db
+(transcriptions.transcription și messages.content).
+
+pack() transformă textul într-un BLOB zlib cu antet, dacă textul depășește
+COMPRESS_MIN_BYTES și compresia chiar economisește spațiu; altfel textul
+rămâne TEXT. unpack() acceptă ambele forme, deci rândurile vechi și cele noi
+pot coexista. Antetul este b"Z" + id-ul dicționarului preset (0 = fără):
+dicționarul cu fragmente frecvente de transcriere în română și engleză
+ajută mai ales textele scurte (mesajele de chat). Un dicționar publicat nu
+se mai modifică; unul nou primește alt id.
+
+compress_existing rescrie rândurile TEXT existente în loturi.
+Compresia se poate dezactiva cu STORAGE_COMPRESSION=0.
+"""
+import os
+import sqlite3
+import zlib
+
+ENABLED = os.environ.get("STORAGE_COMPRESSION", "1") != "0"
+
+COMPRESS_MIN_BYTES = 256
+COMPRESS_LEVEL = 6
+MIGRATION_BATCH = 100
+
+MAGIC = b"Z"
+
+# Coloanele comprimate: tabel -> coloană
+COMPRESSED_COLUMNS = {
+    "transcriptions": "transcription",
+    "messages": "content",
+}
+
+# Fragmentele cele mai frecvente stau la final (zlib preferă distanțele mici)
+_DICTIONARY_1 = (
+    " the and of to in is that it for you this was with on are be have not"
+    " we they what but can just so like there about do know going think"
+    " [muzică] [music] [râsete] [laughter] [aplauze] [applause] [pauză]"
+    " Vorbitor 1: Vorbitor 2: Speaker 1: Speaker 2: Transcrieri recente:"
+    " Răspunde în română. Transcriere Traducere Rezumat"
+    " acest această aceste care pentru sunt este există avem trebuie foarte"
+    " deci adică atunci când dacă pentru că ceea ce despre după până doar"
+    " mai mult cum unde aici acolo noi voi ei ele el ea eu tu da nu"
+    " să se și în la cu de pe din un o ca că mai ce a al ai ale"
+    "\n[00:0\n[00:1\n[00:2\n[00:3\n[00:4\n[00:5\n[01:\n[02:\n[03:\n[04:\n[05:"
+).encode("utf-8")
+
+DICTIONARIES = {
+    0: None,
+    1: _DICTIONARY_1,
+}
+CURRENT_DICTIONARY = 1
+
+
+def _compressor(dictionary_id: int):
+    dictionary = DICTIONARIES[dictionary_id]
+    if dictionary:
+        return zlib.compressobj(COMPRESS_LEVEL, zdict=dictionary)
+    return zlib.compressobj(COMPRESS_LEVEL)
+
+
+def pack(text):
+    """Textul pentru stocare: BLOB comprimat sau textul neschimbat"""
+    if not ENABLED or not isinstance(text, str):
+        return text
+    raw = text.encode("utf-8")
+    if len(raw) < COMPRESS_MIN_BYTES:
+        return text
+    compressor = _compressor(CURRENT_DICTIONARY)
+    packed = MAGIC + bytes([CURRENT_DICTIONARY]) + compressor.compress(raw) + compressor.flush()
+    return packed if len(packed) < len(raw) else text
+
+
+def unpack(value):
+    """Textul original dintr-o valoare stocată (TEXT sau BLOB comprimat)"""
+    if not isinstance(value, (bytes, memoryview)):
+        return value
+    value = bytes(value)
+    if value[:1] != MAGIC or len(value) < 2 or value[1] not in DICTIONARIES:
+        return value.decode("utf-8", errors="replace")
+    dictionary = DICTIONARIES[value[1]]
+    decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+    return (decompressor.decompress(value[2:]) + decompressor.flush()).decode("utf-8")
+
+
+def compress_existing(conn, batch: int = MIGRATION_BATCH, max_batches: int = None) -> int:
+    """
+    Rescrie ca BLOB rândurile TEXT mari din COMPRESSED_COLUMNS, câte `batch`
+    pe tranzacție. Returnează numărul de rânduri comprimate.
+    """
+    if not ENABLED:
+        return 0
+    compressed = 0
+    for table, column in COMPRESSED_COLUMNS.items():
+        last_id = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            try:
+                rows = conn.execute(f'''
+                    SELECT id, {column} FROM {table}
+                    WHERE id > ? AND typeof({column}) = 'text' AND length({column}) >= ?
+                    ORDER BY id LIMIT ?
+                ''', (last_id, COMPRESS_MIN_BYTES // 4, batch)).fetchall()
+            except sqlite3.OperationalError:
+                break  # tabelul nu există încă
+            if not rows:
+                break
+            updates = []
+            for row_id, text in rows:
+                packed = pack(text)
+                if isinstance(packed, bytes):
+                    updates.append((packed, row_id))
+            conn.executemany(f"UPDATE {table} SET {column} = ? WHERE id = ?", updates)
+            conn.commit()
+            compressed += len(updates)
+            last_id = rows[-1][0]
+            batches += 1
+    return compressed
@@ -1,5 +1,6 @@
 import sqlite3
 import json
+import compression
 from datetime import datetime
 from pathlib import Path
 
@@ -113,7 +114,7 @@ def save_message(session_id: str, role: str, content: str):
     cursor = conn.cursor()
     cursor.execute(
         "INSERT INTO messages (session_id, role, content) VALUES (?, ?, ?)",
-        (session_id, role, content)
+        (session_id, role, compression.pack(content))
     )
     conn.commit()
     conn.close()
@@ -126,7 +127,7 @@ def get_messages(session_id: str) -> list:
         "SELECT role, content, created_at FROM messages WHERE session_id = ? ORDER BY created_at",
         (session_id,)
     )
-    messages = [{"role": row[0], "content": row[1], "time": row[2]} for row in cursor.fetchall()]
+    messages = [{"role": row[0], "content": compression.unpack(row[1]), "time": row[2]} for row in cursor.fetchall()]
     conn.close()
     return messages
 
@@ -149,7 +150,7 @@ def save_transcription(session_id: str, video_name: str, original_lang: str,
         INSERT INTO transcriptions 
         (session_id, video_name, original_language, target_language, transcription, status)
         VALUES (?, ?, ?, ?, ?, ?)
-    ''', (session_id, video_name, original_lang, target_lang, transcription, status))
+    ''', (session_id, video_name, original_lang, target_lang, compression.pack(transcription), status))
     conn.commit()
     transcription_id = cursor.lastrowid
     conn.close()
@@ -174,7 +175,7 @@ def get_transcriptions(session_id: str) -> list:
             "video_name": row[1],
             "original_language": row[2],
             "target_language": row[3],
-            "transcription": row[4],
+            "transcription": compression.unpack(row[4]),
             "status": row[5],
             "created_at": row[6]
         })
@@ -0,0 +1,88 @@
+"""
+Scriere rapidă a corpului unui document Word.
+
+python-docx creează câte un obiect (paragraf, run, formatare) pentru fiecare
+linie, ceea ce durează secunde pentru transcrieri de mii de linii. Aici
+documentul este construit o singură dată cu python-docx ca șablon (antet,
+separatoare, subsol și un paragraf BODY_PLACEHOLDER), iar paragraful
+placeholder din word/document.xml este înlocuit cu XML-ul corpului, generat
+într-o singură trecere și scris direct în arhiva finală.
+"""
+import re
+import zipfile
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+BODY_PLACEHOLDER = "{{TRANSCRIPT_BODY}}"
+
+DOCUMENT_PART = "word/document.xml"
+
+# Aceeași formatare ca paragraph_format.space_after = Pt(6) (în twips)
+SPACE_AFTER_TWIPS = 120
+
+_PLACEHOLDER_RE = re.compile(
+    r'<w:p\b(?:(?!</w:p>).)*?' + re.escape(BODY_PLACEHOLDER) + r'.*?</w:p>',
+    re.DOTALL
+)
+
+# Caracterele de control nu sunt permise în XML
+_INVALID_XML_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _text_runs(text: str) -> str:
+    parts = []
+    for index, chunk in enumerate(_INVALID_XML_RE.sub("", text).split("\t")):
+        if index:
+            parts.append("<w:tab/>")
+        if chunk:
+            preserve = ' xml:space="preserve"' if chunk != chunk.strip() else ""
+            parts.append(f"<w:t{preserve}>{escape(chunk)}</w:t>")
+    return "".join(parts)
+
+
+def paragraph_xml(line: str, space_after: int = SPACE_AFTER_TWIPS) -> str:
+    """Echivalentul XML pentru doc.add_paragraph(line) cu space_after"""
+    return (f'<w:p><w:pPr><w:spacing w:after="{space_after}"/></w:pPr>'
+            f'<w:r>{_text_runs(line)}</w:r></w:p>')
+
+
+def iter_body_xml(lines):
+    """XML-ul corpului; liniile goale sunt sărite, ca în create_word_document"""
+    for line in lines:
+        if line.strip():
+            yield paragraph_xml(line)
+
+
+def fill_body(template: BytesIO, lines) -> BytesIO:
+    """
+    Copiază documentul șablon și înlocuiește paragraful BODY_PLACEHOLDER cu
+    câte un paragraf pe linie. Ridică ValueError dacă placeholder-ul lipsește.
+    """
+    output = BytesIO()
+    template.seek(0)
+    with zipfile.ZipFile(template) as source, \
+            zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            data = source.read(item.filename)
+            if item.filename != DOCUMENT_PART:
+                target.writestr(item, data)
+                continue
+
+            document = data.decode("utf-8")
+            match = _PLACEHOLDER_RE.search(document)
+            if not match:
+                raise ValueError("Șablonul nu conține paragraful pentru corp")
+            info = zipfile.ZipInfo(item.filename, item.date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with target.open(info, "w") as part:
+                part.write(document[:match.start()].encode("utf-8"))
+                batch = []
+                for paragraph in iter_body_xml(lines):
+                    batch.append(paragraph)
+                    if len(batch) >= 500:
+                        part.write("".join(batch).encode("utf-8"))
+                        batch = []
+                part.write("".join(batch).encode("utf-8"))
+                part.write(document[match.end():].encode("utf-8"))
+    output.seek(0)
+    return output
@@ -0,0 +1,271 @@
+"""
+Estimări ETA învățate din timpii joburilor anterioare (tabelul job_timings).
+
+Pentru fiecare etapă se potrivește o regresie liniară ridge pe
+[1, dimensiune în MB, durata media în minute]: generarea separat pe model,
+celelalte etape separat pe tip de sursă. Cu prea puține exemple generarea
+folosește datele tuturor modelelor, iar restul valori a priori. Dimensiunea sau durata lipsă
+(ex. YouTube înainte de descărcare) se completează din raportul MB/minut
+observat pentru sursă; dacă lipsesc amândouă, din valorile tipice.
+
+Modelul se reantrenează leneș, cel mult o dată la REFRESH_S, și alimentează
+estimarea dinaintea pornirii, numărătoarea inversă din timpul jobului
+(remaining) și ordinea din coada admission.py.
+
+    python eta.py            # coeficienții curenți pe etapă
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import model_router
+
+DB_FILE = Path("data") / "sessions.db"
+
+STAGE_ORDER = ("probe", "download", "staging", "preprocess", "upload", "processing", "generation", "persistence")
+
+MIN_SAMPLES = 5
+RIDGE = 1.0
+HISTORY_DAYS = 60
+HISTORY_LIMIT = 2000
+REFRESH_S = 15 * 60
+
+# Valori tipice când nu există istoric
+DEFAULT_MB_PER_MINUTE = 8.0
+DEFAULT_FILE_SIZE_MB = 50.0
+DEFAULT_MODEL = model_router.MODEL_TIERS[1]
+
+# Coeficienți a priori: (secunde fixe, secunde per MB, secunde per minut media)
+PRIORS = {
+    "probe": (1.0, 0.0, 0.0),
+    "download": (5.0, 0.5, 0.0),
+    "staging": (0.5, 0.02, 0.0),
+    "preprocess": (3.0, 0.3, 0.0),
+    "upload": (2.0, 0.3, 0.0),
+    "processing": (5.0, 0.2, 0.0),
+    "persistence": (0.5, 0.0, 0.0),
+}
+GENERATION_PRIOR_S = 10.0
+
+
+def _solve(matrix: list, vector: list) -> list:
+    """Eliminare Gauss cu pivotare parțială (sisteme mici)"""
+    size = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(size)]
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(rows[r][col]))
+        if abs(rows[pivot][col]) < 1e-12:
+            return None
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(size):
+            if r != col:
+                factor = rows[r][col] / rows[col][col]
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[col])]
+    return [rows[i][size] / rows[i][i] for i in range(size)]
+
+
+def fit_ridge(samples: list) -> tuple:
+    """Coeficienții (fix, per MB, per minut) pentru exemple (mb, minute, secunde)"""
+    xtx = [[0.0] * 3 for _ in range(3)]
+    xty = [0.0] * 3
+    for size_mb, minutes, seconds in samples:
+        x = (1.0, size_mb, minutes)
+        for i in range(3):
+            xty[i] += x[i] * seconds
+            for j in range(3):
+                xtx[i][j] += x[i] * x[j]
+    # Termenul liber nu se penalizează
+    for i in (1, 2):
+        xtx[i][i] += RIDGE
+    return tuple(_solve(xtx, xty) or (sum(s for _, _, s in samples) / len(samples), 0.0, 0.0))
+
+
+def _median(values: list, default: float) -> float:
+    values = sorted(v for v in values if v)
+    return values[len(values) // 2] if values else default
+
+
+class EtaModel:
+    def __init__(self, rows: list = ()):
+        """rows: (source_type, model, file_size_mb, duration_s, stage_seconds_json, total_s)"""
+        self.coefficients = {}
+        self.samples = {}
+        self.mb_per_minute = {}
+        self.typical_size_mb = {}
+        self.trained_at = time.time()
+
+        grouped = {}
+        sizes = {}
+        ratios = {}
+        for source_type, model, size_mb, duration_s, stage_json, _ in rows:
+            source_type = source_type or "upload"
+            if size_mb:
+                sizes.setdefault(source_type, []).append(size_mb)
+            if size_mb and duration_s:
+                ratios.setdefault(source_type, []).append(size_mb / (duration_s / 60))
+            if not size_mb or not duration_s:
+                continue
+            try:
+                stages = json.loads(stage_json or "{}")
+            except ValueError:
+                continue
+            for stage, seconds in stages.items():
+                group = model if stage == "generation" else source_type
+                sample = (size_mb, duration_s / 60, seconds)
+                grouped.setdefault((stage, group), []).append(sample)
+                if stage == "generation":
+                    grouped.setdefault((stage, None), []).append(sample)
+
+        for key, samples in grouped.items():
+            if len(samples) >= MIN_SAMPLES:
+                self.coefficients[key] = fit_ridge(samples)
+                self.samples[key] = len(samples)
+        for source_type, values in ratios.items():
+            self.mb_per_minute[source_type] = _median(values, DEFAULT_MB_PER_MINUTE)
+        for source_type, values in sizes.items():
+            self.typical_size_mb[source_type] = _median(values, DEFAULT_FILE_SIZE_MB)
+
+    def _prior(self, stage: str, source_type: str, model: str) -> tuple:
+        if stage == "download" and source_type == "upload":
+            return 0.0, 0.0, 0.0
+        if stage == "probe" and source_type not in ("direct", "gdrive"):
+            return 0.0, 0.0, 0.0
+        if stage == "staging" and source_type != "upload":
+            return 0.0, 0.0, 0.0
+        if stage == "generation":
+            rate = model_router.GENERATION_SECONDS_PER_MEDIA_MINUTE.get(
+                model, model_router.GENERATION_SECONDS_PER_MEDIA_MINUTE[DEFAULT_MODEL])
+            return GENERATION_PRIOR_S, 0.0, rate
+        return PRIORS.get(stage, (0.0, 0.0, 0.0))
+
+    def coefficients_for(self, stage: str, source_type: str, model: str) -> tuple:
+        group = model if stage == "generation" else source_type
+        if (stage, group) in self.coefficients:
+            return self.coefficients[(stage, group)]
+        if stage == "generation" and (stage, None) in self.coefficients:
+            return self.coefficients[(stage, None)]
+        return self._prior(stage, source_type, model)
+
+    def features(self, source_type: str, file_size_mb=None, duration_s=None) -> tuple:
+        """(MB, minute), cu valorile lipsă completate"""
+        ratio = self.mb_per_minute.get(source_type, DEFAULT_MB_PER_MINUTE)
+        if not file_size_mb and not duration_s:
+            file_size_mb = self.typical_size_mb.get(source_type, DEFAULT_FILE_SIZE_MB)
+        if not duration_s:
+            return file_size_mb, file_size_mb / ratio
+        minutes = duration_s / 60
+        return (file_size_mb or minutes * ratio), minutes
+
+    def estimate(self, source_type: str, file_size_mb=None, duration_s=None, model=None,
+                 preprocess: bool = False) -> dict:
+        """
+        Secundele estimate pe etapă, în ordinea pipeline-ului. Preprocesarea
+        (pauze, cadre cheie) se include doar cu preprocess=True.
+        """
+        source_type = source_type or "upload"
+        model = model or DEFAULT_MODEL
+        size_mb, minutes = self.features(source_type, file_size_mb, duration_s)
+        stages = {}
+        for stage in STAGE_ORDER:
+            if stage == "preprocess" and not preprocess:
+                continue
+            base, per_mb, per_minute = self.coefficients_for(stage, source_type, model)
+            seconds = base + per_mb * size_mb + per_minute * minutes
+            if seconds > 0.05:
+                stages[stage] = seconds
+        return stages
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def load_history(db_file=None) -> list:
+    conn = sqlite3.connect(str(db_file or DB_FILE))
+    try:
+        return conn.execute('''
+            SELECT source_type, model, file_size_mb, duration_s, stage_seconds, total_s
+            FROM job_timings
+            WHERE outcome = 'ok' AND created_at >= datetime('now', ?)
+            ORDER BY id DESC LIMIT ?
+        ''', (f"-{HISTORY_DAYS} days", HISTORY_LIMIT)).fetchall()
+    except sqlite3.Error:
+        return []
+    finally:
+        conn.close()
+
+
+def get_model(db_file=None, refresh: bool = False) -> EtaModel:
+    """Modelul curent, reantrenat dacă e mai vechi de REFRESH_S"""
+    global _model
+    with _model_lock:
+        if refresh or _model is None or time.time() - _model.trained_at > REFRESH_S:
+            _model = EtaModel(load_history(db_file))
+        return _model
+
+
+def estimate(source_type: str, file_size_mb=None, duration_s=None, model=None,
+             preprocess: bool = False, db_file=None) -> dict:
+    return get_model(db_file).estimate(source_type, file_size_mb, duration_s, model, preprocess)
+
+
+def estimate_total(source_type: str, file_size_mb=None, duration_s=None, model=None,
+                   preprocess: bool = False, db_file=None) -> float:
+    return sum(estimate(source_type, file_size_mb, duration_s, model, preprocess, db_file).values())
+
+
+def remaining(stages: dict, tracer) -> float:
+    """
+    Secundele rămase pentru un job în curs: etapele dinaintea celei curente
+    sunt considerate terminate, etapa curentă își scade timpul scurs
+    """
+    done = tracer.stage_seconds()
+    current = tracer.current_stage
+    reached = [STAGE_ORDER.index(stage) for stage in list(done) + [current] if stage in STAGE_ORDER]
+    position = max(reached, default=-1)
+
+    left = 0.0
+    for stage, expected in stages.items():
+        index = STAGE_ORDER.index(stage)
+        if index < position:
+            continue
+        if index == position:
+            if stage != current:
+                continue
+            elapsed = done.get(stage, 0.0) + time.perf_counter() - tracer.current_started
+            left += max(expected - elapsed, 0.0)
+        else:
+            left += expected
+    return left
+
+
+def format_eta(seconds: float) -> str:
+    if seconds < 10:
+        return "câteva secunde"
+    if seconds < 90:
+        return f"~{int(round(seconds / 10) * 10)} secunde"
+    return f"~{int(round(seconds / 60))} minute"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Modelul ETA antrenat pe job_timings")
+    parser.add_argument("--db", default=str(DB_FILE))
+    args = parser.parse_args()
+
+    model = get_model(args.db, refresh=True)
+    if not model.coefficients:
+        print(f"📭 Sub {MIN_SAMPLES} joburi reușite pe etapă; se folosesc valorile a priori")
+        return 0
+    print(f"{'etapă':12s} {'grup':24s} {'n':>5s} {'fix s':>8s} {'s/MB':>8s} {'s/min':>8s}")
+    for (stage, group), (base, per_mb, per_minute) in sorted(model.coefficients.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+        print(f"{stage:12s} {str(group or '*'):24s} {model.samples[(stage, group)]:5d} "
+              f"{base:8.2f} {per_mb:8.3f} {per_minute:8.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Exporturi SRT, WebVTT și JSON din segmentele unei transcrieri.
+
+Fiecare format este un generator care primește rânduri de segmente
+(segments.iter_segments sau segments.parse_segments) și produce bucăți de
+text, fără a construi documentul întreg ca un singur string. write_export
+scrie bucățile direct într-un fișier sau buffer.
+
+    python exporters.py 42 --format srt > video.srt
+"""
+import argparse
+import json
+import sys
+from io import BytesIO
+
+import segments
+
+# format -> (mime, extensie)
+EXPORT_FORMATS = {
+    "srt": ("application/x-subrip", "srt"),
+    "vtt": ("text/vtt", "vtt"),
+    "json": ("application/json", "json"),
+}
+
+# Durata ultimului cue (fără timestamp următor) și durata minimă a unui cue
+LAST_CUE_MS = 5000
+MIN_CUE_MS = 1000
+
+
+def iter_cues(rows):
+    """
+    Grupează segmentele în cue-uri (start_ms, end_ms, speaker, text).
+    Liniile fără timestamp se lipesc de cue-ul anterior; cele de dinaintea
+    primului timestamp formează un cue cu start_ms None. Liniile goale se ignoră.
+    """
+    cue = None
+    for _, start_ms, end_ms, speaker, text, prefix in rows:
+        text = text.strip()
+        if prefix:
+            if cue and cue[3]:
+                yield tuple(cue)
+            cue = [start_ms, end_ms, speaker, text]
+        elif text:
+            if cue is None:
+                cue = [None, None, None, text]
+            else:
+                cue[3] = f"{cue[3]}\n{text}" if cue[3] else text
+    if cue and cue[3]:
+        yield tuple(cue)
+
+
+def _timed_cues(rows):
+    """Cue-urile cu timp, cu sfârșit garantat după început"""
+    for start_ms, end_ms, speaker, text in iter_cues(rows):
+        if start_ms is None:
+            continue
+        if end_ms is None:
+            end_ms = start_ms + LAST_CUE_MS
+        yield start_ms, max(end_ms, start_ms + MIN_CUE_MS), speaker, text
+
+
+def _clock(ms: int, separator: str) -> str:
+    # Orele nu sunt limitate: [75:30] devine 01:15:30
+    seconds, millis = divmod(int(ms), 1000)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def srt_clock(ms: int) -> str:
+    return _clock(ms, ",")
+
+
+def vtt_clock(ms: int) -> str:
+    return _clock(ms, ".")
+
+
+def iter_srt(rows):
+    for index, (start_ms, end_ms, speaker, text) in enumerate(_timed_cues(rows), start=1):
+        if speaker:
+            text = f"{speaker}: {text}"
+        yield f"{index}\n{srt_clock(start_ms)} --> {srt_clock(end_ms)}\n{text}\n\n"
+
+
+def iter_vtt(rows):
+    yield "WEBVTT\n\n"
+    for start_ms, end_ms, speaker, text in _timed_cues(rows):
+        # "-->" nu poate apărea în textul unui cue
+        text = text.replace("-->", "->")
+        if speaker:
+            text = f"<v {speaker}>{text}"
+        yield f"{vtt_clock(start_ms)} --> {vtt_clock(end_ms)}\n{text}\n\n"
+
+
+def iter_json(rows, meta: dict = None):
+    """Un obiect JSON {..meta, "segments": [...]}, produs segment cu segment"""
+    head = json.dumps(meta or {}, ensure_ascii=False)
+    yield head[:-1] + (", " if len(head) > 2 else "") + '"segments": ['
+    for index, (start_ms, end_ms, speaker, text) in enumerate(iter_cues(rows)):
+        item = {
+            "start_ms": start_ms,
+            "end_ms": end_ms,
+            "start": srt_clock(start_ms).replace(",", ".") if start_ms is not None else None,
+            "speaker": speaker,
+            "text": text,
+        }
+        yield ("," if index else "") + "\n  " + json.dumps(item, ensure_ascii=False)
+    yield "\n]}\n"
+
+
+def iter_export(export_format: str, rows, meta: dict = None):
+    if export_format == "srt":
+        return iter_srt(rows)
+    if export_format == "vtt":
+        return iter_vtt(rows)
+    if export_format == "json":
+        return iter_json(rows, meta)
+    raise ValueError(f"Format necunoscut: {export_format}")
+
+
+def write_export(chunks, fileobj) -> int:
+    """Scrie bucățile (UTF-8) în fileobj; returnează numărul de bytes"""
+    written = 0
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        fileobj.write(data)
+        written += len(data)
+    return written
+
+
+def export_buffer(export_format: str, rows, meta: dict = None) -> BytesIO:
+    """Exportul într-un BytesIO gata pentru st.download_button"""
+    buffer = BytesIO()
+    write_export(iter_export(export_format, rows, meta), buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Exportă o transcriere ca subtitrare sau JSON")
+    parser.add_argument("transcription_id", type=int)
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="srt")
+    parser.add_argument("--db", default=None, help="Calea bazei de date (implicit data/sessions.db)")
+    args = parser.parse_args()
+
+    rows = segments.iter_segments(args.transcription_id, db_file=args.db)
+    write_export(iter_export(args.format, rows, {"transcription_id": args.transcription_id}),
+                 sys.stdout.buffer)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
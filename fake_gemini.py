@@ -0,0 +1,352 @@
+"""
+Backend Gemini local și determinist, pentru teste de încărcare și latență.
+
+FakeClient imită suprafața google.genai.Client folosită de aplicație:
+    client.files.upload(file=...) / files.get(name=...) / files.delete(name=...)
+    client.models.generate_content(model=..., contents=..., config=...)
+
+Se activează cu GEMINI_BACKEND=fake; parametrii se citesc din variabilele
+FAKE_GEMINI_* (vezi FakeClient.from_env). Cu FAKE_GEMINI_REPLAY=cale.jsonl
+răspunsurile sunt redate dintr-o înregistrare făcută cu RecordingClient
+(GEMINI_RECORD_PATH=cale.jsonl pe backend-ul real).
+"""
+import enum
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+
+# Estimări aproximative de tokeni media (documentația Gemini)
+VIDEO_TOKENS_PER_SECOND = 300
+AUDIO_TOKENS_PER_SECOND = 32
+IMAGE_TOKENS = 258
+CHARS_PER_TOKEN = 4
+
+AUDIO_EXTENSIONS = ('.m4a', '.mp3', '.wav', '.aac', '.ogg', '.flac', '.opus')
+
+# Cererile de continuare (gemini_client.CONTINUATION_INSTRUCTIONS) încep de la acest timestamp
+CONTINUATION_RE = re.compile(r'Continuă transcrierea de la \[(\d+):(\d{2})(?::(\d{2}))?\]')
+
+WORDS = (
+    "așadar", "în", "continuare", "vom", "discuta", "despre", "rezultatele",
+    "proiectului", "și", "următorii", "pași", "the", "next", "slide", "shows",
+    "how", "data", "flows", "through", "pipeline", "important", "este", "că",
+    "avem", "nevoie", "de", "mai", "multe", "exemple", "practice"
+)
+
+
+class FileState(enum.Enum):
+    STATE_UNSPECIFIED = 0
+    PROCESSING = 1
+    ACTIVE = 2
+    FAILED = 10
+
+
+class FinishReason(enum.Enum):
+    STOP = 1
+    MAX_TOKENS = 2
+    SAFETY = 3
+    OTHER = 5
+
+
+class FakeAPIError(Exception):
+    """Eroare cu aceeași formă ca google.genai.errors.APIError"""
+
+    def __init__(self, code: int, status: str, message: str, details=None):
+        self.code = code
+        self.status = status
+        self.message = message
+        self.details = details or []
+        super().__init__(f"{code} {status}. {message}")
+
+
+class FakeFile:
+    def __init__(self, name, size_bytes, mime_type, state):
+        self.name = name
+        self.size_bytes = size_bytes
+        self.mime_type = mime_type
+        self.state = state
+        self.uri = f"https://fake.local/{name}"
+
+
+class FakeUsage:
+    def __init__(self, prompt_token_count, candidates_token_count, cached_content_token_count=0):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.cached_content_token_count = cached_content_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+
+class FakeCandidate:
+    def __init__(self, finish_reason):
+        self.finish_reason = finish_reason
+
+
+class FakeResponse:
+    def __init__(self, text, finish_reason, usage_metadata):
+        self.text = text
+        self.candidates = [FakeCandidate(finish_reason)]
+        self.usage_metadata = usage_metadata
+
+
+class _FakeFiles:
+    def __init__(self, client):
+        self._client = client
+
+    def upload(self, file, config=None):
+        return self._client._upload(file)
+
+    def get(self, name):
+        return self._client._get_file(name)
+
+    def delete(self, name):
+        self._client._delete_file(name)
+
+
+class _FakeModels:
+    def __init__(self, client):
+        self._client = client
+
+    def generate_content(self, model, contents, config=None):
+        return self._client._generate(model, contents, config)
+
+
+class FakeClient:
+    """Client Gemini simulat, sigur pentru utilizare din mai multe fire"""
+
+    def __init__(self, api_key="fake", latency_s=0.5, tokens_per_second=150.0,
+                 upload_mbps=50.0, processing_polls=2, processing_fail_rate=0.0,
+                 quota_error_rate=0.0, rate_limit_retry_s=10, media_bytes_per_second=250_000,
+                 seconds_per_line=10, time_scale=1.0, replay_path=None, seed=0):
+        self.api_key = api_key
+        self.latency_s = latency_s
+        self.tokens_per_second = tokens_per_second
+        self.upload_mbps = upload_mbps
+        self.processing_polls = processing_polls
+        self.processing_fail_rate = processing_fail_rate
+        self.quota_error_rate = quota_error_rate
+        self.rate_limit_retry_s = rate_limit_retry_s
+        self.media_bytes_per_second = media_bytes_per_second
+        self.seconds_per_line = seconds_per_line
+        self.time_scale = time_scale
+        self.seed = seed
+
+        self.files = _FakeFiles(self)
+        self.models = _FakeModels(self)
+
+        self._lock = threading.Lock()
+        self._files = {}
+        self._rng = random.Random(seed)
+        self._replay = None
+        if replay_path:
+            with open(replay_path, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            self._replay = itertools.cycle(records) if records else None
+
+    @classmethod
+    def from_env(cls, api_key="fake"):
+        """Construiește clientul din variabilele de mediu FAKE_GEMINI_*"""
+        env = os.environ
+
+        def number(name, default, cast=float):
+            value = env.get(f"FAKE_GEMINI_{name}")
+            return cast(value) if value not in (None, "") else default
+
+        return cls(
+            api_key=api_key,
+            latency_s=number("LATENCY_S", 0.5),
+            tokens_per_second=number("TOKENS_PER_SECOND", 150.0),
+            upload_mbps=number("UPLOAD_MBPS", 50.0),
+            processing_polls=number("PROCESSING_POLLS", 2, int),
+            processing_fail_rate=number("PROCESSING_FAIL_RATE", 0.0),
+            quota_error_rate=number("QUOTA_ERROR_RATE", 0.0),
+            rate_limit_retry_s=number("RATE_LIMIT_RETRY_S", 10, int),
+            time_scale=number("TIME_SCALE", 1.0),
+            replay_path=env.get("FAKE_GEMINI_REPLAY") or None,
+            seed=number("SEED", 0, int),
+        )
+
+    # ---------- utilitare ----------
+
+    def _sleep(self, seconds):
+        if seconds > 0 and self.time_scale > 0:
+            time.sleep(seconds * self.time_scale)
+
+    def _random(self):
+        with self._lock:
+            return self._rng.random()
+
+    # ---------- fișiere ----------
+
+    def _upload(self, file):
+        if isinstance(file, (str, os.PathLike)):
+            path = os.fspath(file)
+            size = os.path.getsize(path)
+        else:
+            path = getattr(file, "name", "") or ""
+            size = len(file.read())
+
+        mime_type = "audio/mp4" if path.lower().endswith(AUDIO_EXTENSIONS) else "video/mp4"
+        self._sleep(size / (self.upload_mbps * 1024 * 1024 / 8) if self.upload_mbps else 0)
+
+        name = f"files/{uuid.uuid4().hex[:12]}"
+        state = FileState.PROCESSING if self.processing_polls > 0 else FileState.ACTIVE
+        with self._lock:
+            self._files[name] = {"size": size, "mime_type": mime_type, "polls_left": self.processing_polls}
+        return FakeFile(name, size, mime_type, state)
+
+    def _get_file(self, name):
+        with self._lock:
+            entry = self._files.get(name)
+            if entry is None:
+                raise FakeAPIError(404, "NOT_FOUND", f"File {name} not found")
+            if entry["polls_left"] > 0:
+                entry["polls_left"] -= 1
+            polls_left = entry["polls_left"]
+
+        if polls_left > 0:
+            state = FileState.PROCESSING
+        elif self.processing_fail_rate and self._random() < self.processing_fail_rate:
+            state = FileState.FAILED
+        else:
+            state = FileState.ACTIVE
+        return FakeFile(name, entry["size"], entry["mime_type"], state)
+
+    def _delete_file(self, name):
+        with self._lock:
+            self._files.pop(name, None)
+
+    # ---------- generare ----------
+
+    def _prompt_tokens(self, contents):
+        if not isinstance(contents, (list, tuple)):
+            contents = [contents]
+
+        tokens = 0
+        media_seconds = 0.0
+        for item in contents:
+            if isinstance(item, str):
+                tokens += len(item) // CHARS_PER_TOKEN + 1
+            elif isinstance(item, FakeFile):
+                seconds = item.size_bytes / self.media_bytes_per_second
+                media_seconds += seconds
+                per_second = AUDIO_TOKENS_PER_SECOND if item.mime_type.startswith("audio/") else VIDEO_TOKENS_PER_SECOND
+                tokens += int(seconds * per_second)
+            else:
+                tokens += IMAGE_TOKENS
+        return tokens, media_seconds
+
+    def _continuation_start(self, contents):
+        """Secunda de la care se cere continuarea (0 pentru o cerere normală)"""
+        for item in contents if isinstance(contents, (list, tuple)) else [contents]:
+            if isinstance(item, str):
+                match = CONTINUATION_RE.search(item)
+                if match:
+                    first, second, third = match.groups()
+                    if third is not None:
+                        return int(first) * 3600 + int(second) * 60 + int(third)
+                    return int(first) * 60 + int(second)
+        return 0
+
+    def _synthetic_transcript(self, media_seconds, seed, start_seconds=0):
+        # Fiecare linie depinde doar de indexul ei, deci continuările repetă
+        # exact aceleași linii
+        lines = []
+        line_count = max(1, int(media_seconds // self.seconds_per_line))
+        for i in range(line_count):
+            seconds = i * self.seconds_per_line
+            if seconds < start_seconds:
+                continue
+            rng = random.Random(f"{seed}:{i}")
+            words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20)))
+            lines.append(f"[{seconds // 60:02d}:{seconds % 60:02d}] {words.capitalize()}.")
+        return "\n".join(lines)
+
+    def _generate(self, model, contents, config):
+        if self.quota_error_rate and self._random() < self.quota_error_rate:
+            raise FakeAPIError(
+                429, "RESOURCE_EXHAUSTED",
+                "Resource has been exhausted (e.g. check quota).",
+                details=[{
+                    "@type": "type.googleapis.com/google.rpc.RetryInfo",
+                    "retryDelay": f"{self.rate_limit_retry_s}s"
+                }]
+            )
+
+        prompt_tokens, media_seconds = self._prompt_tokens(contents)
+
+        if self._replay is not None:
+            with self._lock:
+                record = next(self._replay)
+            text = record.get("text", "")
+            finish_reason = FinishReason.__members__.get(record.get("finish_reason"), FinishReason.STOP)
+            usage = record.get("usage_metadata") or {}
+            prompt_tokens = usage.get("prompt_token_count", prompt_tokens)
+        else:
+            if media_seconds:
+                text = self._synthetic_transcript(
+                    media_seconds, f"{self.seed}:{media_seconds}", self._continuation_start(contents)
+                )
+            else:
+                text = "OK"
+            finish_reason = FinishReason.STOP
+
+        max_output_tokens = getattr(config, "max_output_tokens", None) if config is not None else None
+        if max_output_tokens and len(text) > max_output_tokens * CHARS_PER_TOKEN:
+            cut = text[:max_output_tokens * CHARS_PER_TOKEN]
+            text = cut[:cut.rfind("\n")] if "\n" in cut else cut
+            finish_reason = FinishReason.MAX_TOKENS
+
+        output_tokens = len(text) // CHARS_PER_TOKEN + 1
+        generation_time = self.latency_s
+        if self.tokens_per_second:
+            generation_time += output_tokens / self.tokens_per_second
+        self._sleep(generation_time)
+
+        return FakeResponse(text, finish_reason, FakeUsage(prompt_tokens, output_tokens))
+
+
+class RecordingClient:
+    """Învelește un client real și salvează răspunsurile pentru redare ulterioară"""
+
+    def __init__(self, client, record_path):
+        self._client = client
+        self._record_path = record_path
+        self._lock = threading.Lock()
+        self.files = client.files
+        self.models = self
+
+    def generate_content(self, model, contents, config=None):
+        response = self._client.models.generate_content(model=model, contents=contents, config=config)
+        record_response(self._record_path, response, self._lock)
+        return response
+
+
+def record_response(path, response, lock=None):
+    """Adaugă un răspuns într-un fișier JSONL, în formatul citit de FakeClient"""
+    usage = getattr(response, "usage_metadata", None)
+    candidates = getattr(response, "candidates", None) or []
+    finish_reason = getattr(candidates[0], "finish_reason", None) if candidates else None
+    record = {
+        "text": response.text or "",
+        "finish_reason": getattr(finish_reason, "name", "STOP") or "STOP",
+        "usage_metadata": {
+            "prompt_token_count": getattr(usage, "prompt_token_count", None) or 0,
+            "candidates_token_count": getattr(usage, "candidates_token_count", None) or 0,
+        },
+    }
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    if lock:
+        with lock:
+            _append(path, line)
+    else:
+        _append(path, line)
+
+
+def _append(path, line):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
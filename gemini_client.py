@@ -0,0 +1,157 @@
+"""
+Clienți Gemini expliciți per cheie API (fără genai.configure global).
+
+Backend-ul de model este interschimbabil. Orice backend returnează un obiect
+cu aceeași suprafață ca google.genai.Client:
+    client.files.upload(file=...), files.get(name=...), files.delete(name=...)
+    client.models.generate_content(model=..., contents=..., config=...)
+Backend-uri disponibile: "gemini" (implicit) și "fake" (fake_gemini.FakeClient,
+pentru teste offline). Selecția se face cu GEMINI_BACKEND sau set_backend().
+
+generate_complete detectează răspunsurile trunchiate la max_output_tokens și
+cere continuarea după ultimul timestamp emis.
+"""
+import os
+import threading
+from lazy_imports import LazyModule
+import timestamps
+
+genai = LazyModule("google.genai")
+
+
+def _gemini_backend(api_key: str):
+    client = genai.Client(api_key=api_key)
+    record_path = os.environ.get("GEMINI_RECORD_PATH")
+    if record_path:
+        from fake_gemini import RecordingClient
+        client = RecordingClient(client, record_path)
+    return client
+
+
+def _fake_backend(api_key: str):
+    from fake_gemini import FakeClient
+    return FakeClient.from_env(api_key=api_key)
+
+
+_backends = {
+    "gemini": _gemini_backend,
+    "fake": _fake_backend,
+}
+_active_backend = os.environ.get("GEMINI_BACKEND", "gemini")
+
+# Numărul maxim de cereri de continuare pentru o transcriere trunchiată
+MAX_CONTINUATIONS = 6
+
+CONTINUATION_INSTRUCTIONS = """
+
+IMPORTANT: Transcrierea anterioară a fost întreruptă.
+Continuă transcrierea de la {clock} (inclusiv) până la final.
+Nu repeta nimic din ce este înainte de {clock}. Păstrează același format.
+"""
+
+# Un client per (backend, cheie); fiecare își păstrează conexiunile HTTP
+# keep-alive. Modulul este importat (nu re-executat) la fiecare rerun
+# Streamlit, deci cache-ul supraviețuiește între rerun-uri și este partajat
+# între sesiuni.
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def register_backend(name: str, factory):
+    """Înregistrează un backend nou: factory(api_key) -> client"""
+    _backends[name] = factory
+
+
+def set_backend(name: str):
+    """Schimbă backend-ul activ și golește cache-ul de clienți"""
+    global _active_backend
+    if name not in _backends:
+        raise ValueError(f"Backend necunoscut: {name}")
+    with _clients_lock:
+        _active_backend = name
+        _clients.clear()
+
+
+def get_backend_name() -> str:
+    return _active_backend
+
+
+def get_client(api_key: str):
+    """
+    Returnează clientul pentru cheia dată, creat o singură dată.
+    Clientul nu modifică starea globală și poate fi folosit concurent
+    din mai multe fire de execuție.
+    """
+    cache_key = (_active_backend, api_key)
+    client = _clients.get(cache_key)
+    if client is None:
+        with _clients_lock:
+            cache_key = (_active_backend, api_key)
+            client = _clients.get(cache_key)
+            if client is None:
+                client = _backends[_active_backend](api_key)
+                _clients[cache_key] = client
+    return client
+
+
+def drop_client(api_key: str):
+    """Elimină clientul din cache (ex. cheie expirată sau ștearsă)"""
+    with _clients_lock:
+        client = _clients.pop((_active_backend, api_key), None)
+
+    close = getattr(client, "close", None)
+    if close:
+        try:
+            close()
+        except Exception:
+            pass
+
+
+def finish_reason_name(response) -> str:
+    """Numele finish_reason pentru primul candidat ("" dacă lipsește)"""
+    candidates = getattr(response, "candidates", None) or []
+    if not candidates:
+        return ""
+    reason = getattr(candidates[0], "finish_reason", None)
+    return getattr(reason, "name", None) or str(reason or "")
+
+
+def is_truncated(response) -> bool:
+    return finish_reason_name(response) == "MAX_TOKENS"
+
+
+def generate_complete(generate, contents: list, max_continuations: int = MAX_CONTINUATIONS,
+                      on_continuation=None):
+    """
+    Apelează generate(contents) și, cât timp răspunsul e trunchiat, cere
+    continuarea pe același fișier încărcat, de la ultimul timestamp emis.
+    Ultimul element din `contents` trebuie să fie prompt-ul text.
+    Bucățile se unesc fără duplicate. Returnează (text, nr_continuări).
+    """
+    response = generate(contents)
+    text = response.text or ""
+    continuations = 0
+    last_resume = -1
+
+    while is_truncated(response) and continuations < max_continuations:
+        kept, resume_at = timestamps.split_for_continuation(text)
+        if resume_at is None or resume_at <= last_resume:
+            break  # Fără timestamps sau fără progres față de continuarea anterioară
+        last_resume = resume_at
+
+        continuations += 1
+        if on_continuation:
+            on_continuation(continuations, resume_at)
+
+        prompt = contents[-1] + CONTINUATION_INSTRUCTIONS.format(clock=timestamps.format_clock(resume_at))
+        try:
+            response = generate(contents[:-1] + [prompt])
+        except Exception:
+            break  # Se păstrează ce s-a transcris până acum
+
+        merged = timestamps.merge_continuation(kept, response.text or "", resume_at)
+        if len(merged) <= len(kept):
+            break  # Continuarea nu a adus nimic nou
+        text = merged
+
+    return text, continuations
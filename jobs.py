@@ -0,0 +1,240 @@
+"""
+Revendicarea joburilor de transcriere între procese.
+
+Mai multe procese Streamlit (replici) pot folosi aceeași data/sessions.db.
+Tabelul jobs are un rând per cheie de job (singleflight.job_key): procesul
+care revendică cheia primește o închiriere (lease) de LEASE_S secunde,
+reînnoită de un fir de heartbeat la fiecare HEARTBEAT_S împreună cu
+progresul. Revendicarea rulează în BEGIN IMMEDIATE, deci două procese nu pot
+lua aceeași cheie. Celelalte procese urmăresc rândul și, la final, copiază
+rezultatul (transcription_id) în sesiunea lor. Dacă procesul care lucra a
+murit, închirierea expiră și primul urmăritor care revendică preia jobul.
+
+Procesul care lucrează verifică închirierea între etape (Lease.check): dacă
+a fost preluată de alt proces sau nu a mai putut fi reînnoită de LEASE_S
+secunde, jobul se abandonează cu LeaseLost în loc să ruleze de două ori.
+
+Câte joburi rulează simultan într-un proces decide admission.py.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+DB_FILE = Path("data") / "sessions.db"
+
+LEASE_S = 45
+HEARTBEAT_S = 5
+POLL_S = 1.0
+# Un rezultat reușit se refolosește atât timp după final
+FINISHED_TTL_S = 120
+# Rândurile terminate se șterg după atât timp
+KEEP_FINISHED_S = 24 * 3600
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+def get_connection(db_file=None):
+    return sqlite3.connect(str(db_file or DB_FILE), timeout=30, isolation_level=None)
+
+
+def init_jobs_table(db_file=None):
+    conn = get_connection(db_file)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_key TEXT NOT NULL UNIQUE,
+            session_id TEXT,
+            status TEXT NOT NULL,
+            worker_id TEXT,
+            lease_expires_at REAL,
+            attempts INTEGER DEFAULT 0,
+            progress REAL DEFAULT 0,
+            status_text TEXT,
+            transcription_id INTEGER,
+            error TEXT,
+            started_at REAL,
+            finished_at REAL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, finished_at)")
+    conn.close()
+
+
+def _row_dict(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)} if row else None
+
+
+def get_job(job_key: str, db_file=None):
+    conn = get_connection(db_file)
+    try:
+        cursor = conn.execute("SELECT * FROM jobs WHERE job_key = ?", (job_key,))
+        return _row_dict(cursor, cursor.fetchone())
+    finally:
+        conn.close()
+
+
+def lease_expired(job: dict, now: float = None) -> bool:
+    return job["status"] == RUNNING and (job["lease_expires_at"] or 0) < (now or time.time())
+
+
+class LeaseLost(Exception):
+    """Jobul nu mai aparține procesului curent"""
+
+
+class Lease:
+    """Închirierea unui job deținut de procesul curent"""
+
+    def __init__(self, job_id: int, job_key: str, db_file=None):
+        self.job_id = job_id
+        self.job_key = job_key
+        self.db_file = db_file
+        self.worker_id = WORKER_ID
+        self.progress = 0.0
+        self.status_text = ""
+        self.renewed_at = time.time()
+        self._taken = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._heartbeat, name=f"lease-{job_id}", daemon=True)
+        self._thread.start()
+
+    @property
+    def done(self) -> bool:
+        return self._stop.is_set()
+
+    @property
+    def lost(self) -> bool:
+        """Preluat de alt proces, sau fără reînnoire de LEASE_S (poate fi preluat)"""
+        return self._taken or time.time() - self.renewed_at > LEASE_S
+
+    def check(self):
+        """Între etape: LeaseLost dacă jobul nu mai e al procesului"""
+        if self.lost:
+            raise LeaseLost("Jobul a fost preluat de alt proces")
+
+    def publish(self, value: float, text: str):
+        """Progresul, scris în baza de date la următorul heartbeat"""
+        self.progress = value
+        self.status_text = text
+
+    def renew(self) -> bool:
+        """Prelungește închirierea; False dacă jobul a fost preluat de alt proces"""
+        conn = get_connection(self.db_file)
+        try:
+            updated = conn.execute('''
+                UPDATE jobs SET lease_expires_at = ?, progress = ?, status_text = ?
+                WHERE id = ? AND worker_id = ? AND status = ?
+            ''', (time.time() + LEASE_S, self.progress, self.status_text,
+                  self.job_id, self.worker_id, RUNNING)).rowcount
+        finally:
+            conn.close()
+        if updated:
+            self.renewed_at = time.time()
+        else:
+            self._taken = True
+        return bool(updated)
+
+    def _heartbeat(self):
+        while not self._stop.wait(HEARTBEAT_S):
+            try:
+                if not self.renew():
+                    return
+            except sqlite3.Error:
+                pass  # baza ocupată: se reîncearcă la următorul heartbeat
+
+    def _finish(self, status: str, transcription_id=None, error=None) -> int:
+        """Rândurile actualizate: 0 dacă jobul a fost preluat între timp"""
+        self._stop.set()
+        conn = get_connection(self.db_file)
+        try:
+            updated = conn.execute('''
+                UPDATE jobs SET status = ?, transcription_id = ?, error = ?,
+                    progress = ?, finished_at = ?, lease_expires_at = NULL
+                WHERE id = ? AND worker_id = ? AND status = ?
+            ''', (status, transcription_id, error, 1.0 if status == DONE else self.progress,
+                  time.time(), self.job_id, self.worker_id, RUNNING)).rowcount
+        finally:
+            conn.close()
+        if not updated:
+            self._taken = True
+        return updated
+
+    def release(self):
+        """Renunță la job fără rezultat: urmăritorii îl văd expirat și îl preiau"""
+        self._stop.set()
+        conn = get_connection(self.db_file)
+        try:
+            conn.execute('''
+                UPDATE jobs SET lease_expires_at = 0
+                WHERE id = ? AND worker_id = ? AND status = ?
+            ''', (self.job_id, self.worker_id, RUNNING))
+        finally:
+            conn.close()
+
+    def complete(self, transcription_id: int) -> bool:
+        """False dacă jobul nu mai era al procesului (rândul nu s-a schimbat)"""
+        return bool(self._finish(DONE, transcription_id=transcription_id))
+
+    def fail(self, error: str) -> bool:
+        return bool(self._finish(FAILED, error=error or "Job întrerupt"))
+
+
+def claim(job_key: str, session_id: str = None, db_file=None):
+    """
+    Revendică jobul. Returnează (Lease, None) dacă procesul curent trebuie să
+    îl ruleze, sau (None, job) dacă îl rulează alt proces ori are deja un
+    rezultat recent. Un job eșuat, vechi sau cu închirierea expirată se preia.
+    """
+    conn = get_connection(db_file)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.execute("SELECT * FROM jobs WHERE job_key = ?", (job_key,))
+        job = _row_dict(cursor, cursor.fetchone())
+        now = time.time()
+
+        if job and job["status"] == RUNNING and not lease_expired(job, now):
+            conn.execute("COMMIT")
+            return None, job
+        if job and job["status"] == DONE and job["transcription_id"] \
+                and now - (job["finished_at"] or 0) <= FINISHED_TTL_S:
+            conn.execute("COMMIT")
+            return None, job
+
+        if job:
+            conn.execute('''
+                UPDATE jobs SET session_id = ?, status = ?, worker_id = ?, lease_expires_at = ?,
+                    attempts = attempts + 1, progress = 0, status_text = NULL,
+                    transcription_id = NULL, error = NULL, started_at = ?, finished_at = NULL
+                WHERE id = ?
+            ''', (session_id, RUNNING, WORKER_ID, now + LEASE_S, now, job["id"]))
+            job_id = job["id"]
+        else:
+            job_id = conn.execute('''
+                INSERT INTO jobs (job_key, session_id, status, worker_id, lease_expires_at, attempts, started_at)
+                VALUES (?, ?, ?, ?, ?, 1, ?)
+            ''', (job_key, session_id, RUNNING, WORKER_ID, now + LEASE_S, now)).lastrowid
+        conn.execute("COMMIT")
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return Lease(job_id, job_key, db_file), None
+
+
+def prune_finished(conn, dry_run: bool = False) -> int:
+    """Șterge rândurile terminate mai vechi de KEEP_FINISHED_S"""
+    cutoff = (time.time() - KEEP_FINISHED_S,)
+    condition = "status != 'running' AND finished_at < ?"
+    if dry_run:
+        return conn.execute(f"SELECT COUNT(*) FROM jobs WHERE {condition}", cutoff).fetchone()[0]
+    removed = conn.execute(f"DELETE FROM jobs WHERE {condition}", cutoff).rowcount
+    conn.commit()
+    return removed
@@ -0,0 +1,35 @@
+"""Încărcare leneșă a dependențelor grele (Gemini, python-docx, yt-dlp...)"""
+import importlib
+import importlib.util
+import threading
+
+
+def module_available(name: str) -> bool:
+    """Verifică dacă un modul poate fi importat, fără a-l importa efectiv"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule:
+    """Proxy care importă modulul abia la primul acces la un atribut"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "încărcat" if self._module is not None else "neîncărcat"
+        return f"<LazyModule {self._name} ({state})>"
@@ -0,0 +1,285 @@
+"""Utilitare ffmpeg/ffprobe pentru fișierele media"""
+import bisect
+import json
+import os
+import re
+import shutil
+import subprocess
+from typing import Optional
+
+FFPROBE_TIMEOUT_S = 30
+FFMPEG_TIMEOUT_S = 1800
+
+# Detecția pauzelor (ffmpeg silencedetect)
+SILENCE_NOISE_DB = -35       # sub acest nivel se consideră liniște
+SILENCE_MIN_SECONDS = 2.0    # doar pauzele mai lungi sunt eliminate
+SILENCE_KEEP_PADDING = 0.3   # margine păstrată în jurul vorbirii
+SILENCE_MIN_SAVING = 0.1     # fișierul se rescrie doar dacă scade cu cel puțin 10%
+
+# Modul cadre cheie: audio + imagini la schimbările de scenă
+KEYFRAME_SCENE_THRESHOLD = 0.3     # pragul ffmpeg pentru schimbare de scenă
+KEYFRAME_FALLBACK_INTERVAL_S = 30  # interval fix dacă scenele nu se schimbă
+KEYFRAME_MAX_FRAMES = 60
+KEYFRAME_WIDTH = 768
+AUDIO_BITRATE = "64k"
+
+_SILENCE_START_RE = re.compile(r'silence_start:\s*(-?[\d.]+)')
+_SILENCE_END_RE = re.compile(r'silence_end:\s*(-?[\d.]+)')
+_PTS_TIME_RE = re.compile(r'pts_time:\s*(-?[\d.]+)')
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def ffprobe_available() -> bool:
+    return shutil.which("ffprobe") is not None
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """Durata fișierului în secunde (None dacă ffprobe lipsește sau eșuează)"""
+    if not ffprobe_available():
+        return None
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", path],
+            capture_output=True, text=True, timeout=FFPROBE_TIMEOUT_S
+        )
+        return float(json.loads(result.stdout)["format"]["duration"])
+    except (subprocess.SubprocessError, OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def probe_streams(path: str) -> Optional[dict]:
+    """
+    Formatul, durata și codecurile primului stream video/audio.
+    Merge și pe începutul unui fișier (durata poate lipsi). None dacă
+    ffprobe lipsește sau nu recunoaște fișierul.
+    """
+    if not ffprobe_available():
+        return None
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries",
+             "format=format_name,duration:stream=codec_type,codec_name,width,height",
+             "-of", "json", path],
+            capture_output=True, text=True, timeout=FFPROBE_TIMEOUT_S
+        )
+        data = json.loads(result.stdout or "{}")
+    except (subprocess.SubprocessError, OSError, ValueError):
+        return None
+    streams = data.get("streams") or []
+    if not streams and not data.get("format"):
+        return None
+
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    try:
+        duration = float(data.get("format", {}).get("duration"))
+    except (TypeError, ValueError):
+        duration = None
+    return {
+        "format_name": data.get("format", {}).get("format_name"),
+        "duration_s": duration,
+        "has_video": video is not None,
+        "has_audio": audio is not None,
+        "video_codec": video.get("codec_name") if video else None,
+        "audio_codec": audio.get("codec_name") if audio else None,
+        "width": video.get("width") if video else None,
+        "height": video.get("height") if video else None,
+    }
+
+
+def probe_has_video(path: str) -> bool:
+    """Verifică dacă fișierul are un stream video"""
+    if not ffprobe_available():
+        return True
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "v", "-show_entries", "stream=codec_type", "-of", "json", path],
+            capture_output=True, text=True, timeout=FFPROBE_TIMEOUT_S
+        )
+        return bool(json.loads(result.stdout).get("streams"))
+    except (subprocess.SubprocessError, OSError, ValueError):
+        return True
+
+
+# ============ ELIMINARE PAUZE ============
+
+class TimeMap:
+    """Corespondența dintre timpul din fișierul tăiat și timpul original"""
+
+    def __init__(self, spans: list):
+        # spans: intervalele (start, end) păstrate din fișierul original
+        self.spans = spans
+        self.new_starts = []
+        position = 0.0
+        for start, end in spans:
+            self.new_starts.append(position)
+            position += end - start
+        self.kept_seconds = position
+
+    def to_original(self, seconds: float) -> float:
+        """Timpul original pentru o poziție din fișierul tăiat"""
+        if not self.spans:
+            return seconds
+        index = max(bisect.bisect_right(self.new_starts, seconds) - 1, 0)
+        start, end = self.spans[index]
+        return min(start + (seconds - self.new_starts[index]), end)
+
+
+def detect_silences(path: str, noise_db: float = SILENCE_NOISE_DB,
+                    min_silence: float = SILENCE_MIN_SECONDS) -> list:
+    """Intervalele (start, end) de liniște detectate de ffmpeg silencedetect"""
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-nostats", "-i", path, "-vn",
+         "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}", "-f", "null", "-"],
+        capture_output=True, text=True, timeout=FFMPEG_TIMEOUT_S
+    )
+
+    silences = []
+    start = None
+    for line in result.stderr.splitlines():
+        match = _SILENCE_START_RE.search(line)
+        if match:
+            start = max(float(match.group(1)), 0.0)
+            continue
+        match = _SILENCE_END_RE.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    if start is not None:
+        silences.append((start, None))  # liniște până la final
+    return silences
+
+
+def speech_spans(silences: list, duration: float, padding: float = SILENCE_KEEP_PADDING) -> list:
+    """Complementul pauzelor: intervalele cu vorbire, cu o margine de siguranță"""
+    spans = []
+    position = 0.0
+    for start, end in silences:
+        end = duration if end is None else end
+        cut_start = start + padding
+        cut_end = end - padding
+        if cut_end <= cut_start:
+            continue
+        if cut_start > position:
+            spans.append((position, cut_start))
+        position = cut_end
+    if position < duration:
+        spans.append((position, duration))
+    return spans
+
+
+def trim_silence(path: str, output_path: str, noise_db: float = SILENCE_NOISE_DB,
+                 min_silence: float = SILENCE_MIN_SECONDS, padding: float = SILENCE_KEEP_PADDING):
+    """
+    Elimină pauzele lungi din fișier (audio și video rămân sincronizate).
+    Returnează (output_path, TimeMap) sau (None, None) dacă nu merită
+    sau ffmpeg nu e disponibil.
+    """
+    if not ffmpeg_available():
+        return None, None
+    duration = probe_duration(path)
+    if not duration:
+        return None, None
+
+    try:
+        spans = speech_spans(detect_silences(path, noise_db, min_silence), duration, padding)
+    except (subprocess.SubprocessError, OSError):
+        return None, None
+
+    time_map = TimeMap(spans)
+    if not spans or time_map.kept_seconds > duration * (1 - SILENCE_MIN_SAVING):
+        return None, None
+
+    expression = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in spans)
+    command = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", path]
+    if probe_has_video(path):
+        command += ["-vf", f"select='{expression}',setpts=N/FRAME_RATE/TB"]
+    else:
+        command += ["-vn"]
+    command += ["-af", f"aselect='{expression}',asetpts=N/SR/TB", output_path]
+
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=FFMPEG_TIMEOUT_S)
+        succeeded = result.returncode == 0
+    except (subprocess.SubprocessError, OSError):
+        succeeded = False
+    if not succeeded:
+        _remove_quietly(output_path)
+        return None, None
+    return output_path, time_map
+
+
+# ============ CADRE CHEIE ============
+
+def extract_audio(path: str, output_path: str) -> bool:
+    """Extrage pista audio (mono, AAC) într-un fișier .m4a"""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", path,
+             "-vn", "-ac", "1", "-c:a", "aac", "-b:a", AUDIO_BITRATE, output_path],
+            capture_output=True, text=True, timeout=FFMPEG_TIMEOUT_S
+        )
+        if result.returncode == 0:
+            return True
+    except (subprocess.SubprocessError, OSError):
+        pass
+    _remove_quietly(output_path)
+    return False
+
+
+def _run_frame_filter(path: str, output_dir: str, video_filter: str) -> list:
+    """Rulează ffmpeg cu filtrul dat și returnează [(secunde, cale_jpg)]"""
+    pattern = os.path.join(output_dir, "frame_%04d.jpg")
+    result = subprocess.run(
+        ["ffmpeg", "-y", "-hide_banner", "-i", path, "-an",
+         "-vf", f"{video_filter},showinfo,scale={KEYFRAME_WIDTH}:-2",
+         "-vsync", "vfr", "-q:v", "4", pattern],
+        capture_output=True, text=True, timeout=FFMPEG_TIMEOUT_S
+    )
+    if result.returncode != 0:
+        return []
+
+    times = [float(m.group(1)) for m in _PTS_TIME_RE.finditer(result.stderr)]
+    frames = []
+    for index, seconds in enumerate(times, start=1):
+        frame_path = pattern % index
+        if os.path.exists(frame_path):
+            frames.append((seconds, frame_path))
+    return frames
+
+
+def extract_keyframes(path: str, output_dir: str, scene_threshold: float = KEYFRAME_SCENE_THRESHOLD,
+                      interval_s: float = KEYFRAME_FALLBACK_INTERVAL_S,
+                      max_frames: int = KEYFRAME_MAX_FRAMES) -> list:
+    """
+    Extrage cadre la schimbările de scenă (plus primul cadru), sau la interval
+    fix dacă video-ul e aproape static. Returnează [(secunde, cale_jpg)],
+    cel mult `max_frames`, eșantionate uniform.
+    """
+    try:
+        frames = _run_frame_filter(path, output_dir, f"select='eq(n,0)+gt(scene,{scene_threshold})'")
+        if len(frames) < 2:
+            for _, frame_path in frames:
+                _remove_quietly(frame_path)
+            frames = _run_frame_filter(path, output_dir, f"fps=1/{interval_s}")
+    except (subprocess.SubprocessError, OSError):
+        return []
+
+    if len(frames) > max_frames:
+        step = len(frames) / max_frames
+        keep = {int(i * step) for i in range(max_frames)}
+        for index, (_, frame_path) in enumerate(frames):
+            if index not in keep:
+                _remove_quietly(frame_path)
+        frames = [frame for index, frame in enumerate(frames) if index in keep]
+    return frames
+
+
+def _remove_quietly(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -0,0 +1,152 @@
+"""
+Cache local pentru media descărcată (și preprocesată) din surse remote.
+
+Cheile identifică sursa:
+    youtube:<video_id>:<max_size_mb>   video/audio descărcat cu yt-dlp
+    gdrive:<file_id>                   valid GDRIVE_TTL_S (Drive nu oferă validatori)
+    url:<url>                          revalidat cu If-None-Match / If-Modified-Since
+Variantele preprocesate (ex. fără pauze) folosesc derived_key(cheie_sursă,
+variantă), care include versiunea intrării sursă: o sursă descărcată din nou
+invalidează automat variantele vechi.
+
+Fișierele stau în zona "media" a managerului scratch, cu un fișier .json de
+metadate alături. Un hit nu copiază datele: jobul primește un hard link
+(sau o copie, dacă sistemul de fișiere nu permite), deci ștergerea din job
+nu atinge cache-ul. Zona este limitată la MEDIA_CACHE_MAX_MB, evacuată LRU.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import scratch
+
+ZONE = "media"
+MEDIA_CACHE_MAX_MB = float(os.environ.get("MEDIA_CACHE_MAX_MB", "2000"))
+ENABLED = os.environ.get("MEDIA_CACHE", "1") != "0"
+
+GDRIVE_TTL_S = 24 * 3600
+
+
+def cache_key(kind: str, *parts) -> str:
+    return ":".join([kind] + [str(part) for part in parts])
+
+
+def source_key(source_type: str, source_data, max_size_mb=None):
+    """Cheia pentru o sursă din render_upload_tab (None pentru upload)"""
+    if source_type == "youtube":
+        return cache_key("youtube", source_data, max_size_mb)
+    if source_type == "gdrive":
+        return cache_key("gdrive", source_data)
+    if source_type == "direct":
+        return cache_key("url", source_data)
+    return None
+
+
+def _entry_paths(key: str):
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    directory = scratch.manager.cache_dir(ZONE)
+    return directory / f"{digest}.json", directory / digest
+
+
+def get_meta(key: str):
+    """Metadatele intrării (chiar dacă e expirată), sau None"""
+    if not ENABLED or not key:
+        return None
+    meta_path, data_path = _entry_paths(key)
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if meta.get("key") != key or not data_path.with_suffix(meta.get("suffix", "")).exists():
+        return None
+    return meta
+
+
+def derived_key(key: str, variant: str):
+    """Cheia unei variante preprocesate, legată de versiunea sursei"""
+    meta = get_meta(key)
+    if not meta:
+        return None
+    return f"{key}|{variant}|{meta['version']}"
+
+
+def conditional_headers(meta) -> dict:
+    """Antetele pentru o cerere condiționată din validatorii salvați"""
+    headers = {}
+    if meta and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta and meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
+def _link_into(source: str, target: str):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def lookup(key: str, job=None, max_age_s: float = None):
+    """
+    Returnează (cale_în_job, meta) pentru un hit, altfel (None, None).
+    Cu max_age_s, intrările mai vechi sunt tratate ca lipsă.
+    """
+    meta = get_meta(key)
+    if not meta:
+        return None, None
+    if max_age_s is not None and time.time() - meta.get("created", 0) > max_age_s:
+        return None, None
+
+    meta_path, data_path = _entry_paths(key)
+    data_path = data_path.with_suffix(meta.get("suffix", ""))
+    target = scratch.new_path(meta.get("suffix", ""), job)
+    try:
+        _link_into(str(data_path), target)
+    except OSError:
+        return None, None  # evacuat între timp
+    scratch.manager.touch(data_path)
+    scratch.manager.touch(meta_path)
+    return target, meta
+
+
+def refresh(key: str):
+    """Marchează o intrare revalidată (304) ca proaspătă"""
+    meta = get_meta(key)
+    if meta:
+        meta["validated"] = time.time()
+        meta_path, _ = _entry_paths(key)
+        meta_path.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+
+def store(key: str, path: str, **meta) -> bool:
+    """Adaugă fișierul în cache (hard link, fără copiere dacă se poate)"""
+    if not ENABLED or not key or not path or not os.path.exists(path):
+        return False
+    meta_path, data_path = _entry_paths(key)
+    suffix = os.path.splitext(path)[1]
+    data_path = data_path.with_suffix(suffix)
+
+    # Scriere atomică: fișier temporar în aceeași zonă, apoi os.replace
+    pending = f"{data_path}.{os.getpid()}.tmp"
+    try:
+        _link_into(path, pending)
+        os.replace(pending, data_path)
+        now = time.time()
+        meta.update(key=key, suffix=suffix, size=os.path.getsize(data_path),
+                    created=now, version=f"{now:.6f}")
+        meta_tmp = f"{meta_path}.{os.getpid()}.tmp"
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_tmp, meta_path)
+    except OSError:
+        try:
+            os.unlink(pending)
+        except OSError:
+            pass
+        return False
+
+    scratch.manager.evict_zone(ZONE, int(MEDIA_CACHE_MAX_MB * 1024 * 1024))
+    return True
@@ -0,0 +1,462 @@
+"""
+Trasarea etapelor pipeline-ului de transcriere, consumul de tokeni
+și statistici de latență.
+
+Fiecare job primește un Tracer; fiecare etapă (download, staging, preprocess,
+upload, processing, generation, persistence, export) devine un span cu durată,
+dimensiune, cheie, model, tokeni și rezultat, salvat în tabelul
+pipeline_spans. Statisticile p50/p95 pe etapă și tip de sursă sunt
+disponibile în sidebar și din linia de comandă:
+
+    python metrics.py stats --days 7
+    python metrics.py tokens --days 7
+
+Tokenii din response.usage_metadata (prompt, cached, output) se salvează
+per apel în token_usage, cu sesiunea, amprenta cheii și modelul folosit.
+
+La final, fiecare job ajuns la generare scrie un rând în job_timings:
+tipul sursei, modelul, dimensiunea și durata media și secundele pe etapă
+(datele pe care eta.py își antrenează estimările).
+"""
+import argparse
+import hashlib
+import json
+import math
+import sqlite3
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+DB_FILE = Path("data") / "sessions.db"
+
+STAGES = ("probe", "download", "staging", "preprocess", "upload", "processing", "generation", "persistence", "export")
+
+# Prețuri estimative în USD per 1M tokeni: (input, output).
+# Tokenii din cache se taxează la CACHED_PRICE_RATIO din prețul de input.
+MODEL_PRICING = {
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-exp": (0.10, 0.40),
+}
+CACHED_PRICE_RATIO = 0.25
+
+
+def get_connection(db_file=None):
+    return sqlite3.connect(str(db_file or DB_FILE))
+
+
+def init_metrics_tables(db_file=None):
+    """Creează tabelele pentru metrici (dacă nu există)"""
+    conn = get_connection(db_file)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pipeline_spans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT,
+            session_id TEXT,
+            stage TEXT,
+            source_type TEXT,
+            model TEXT,
+            key_index INTEGER,
+            bytes INTEGER,
+            duration_ms REAL,
+            input_tokens INTEGER,
+            output_tokens INTEGER,
+            outcome TEXT,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pipeline_spans_stage
+        ON pipeline_spans (stage, source_type, created_at)
+    ''')
+    # Statisticile pe ultimele zile și retenția filtrează doar după timp
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pipeline_spans_created
+        ON pipeline_spans (created_at)
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS token_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            key_fingerprint TEXT,
+            model TEXT,
+            purpose TEXT,
+            prompt_tokens INTEGER DEFAULT 0,
+            cached_tokens INTEGER DEFAULT 0,
+            output_tokens INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_token_usage_session
+        ON token_usage (session_id, created_at)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_token_usage_key
+        ON token_usage (key_fingerprint, created_at)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_token_usage_created
+        ON token_usage (created_at)
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_timings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT,
+            source_type TEXT,
+            model TEXT,
+            file_size_mb REAL,
+            duration_s REAL,
+            stage_seconds TEXT,
+            total_s REAL,
+            outcome TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_job_timings_created
+        ON job_timings (created_at)
+    ''')
+
+    conn.commit()
+    conn.close()
+
+
+def usage_tokens(response) -> tuple:
+    """Extrage (input_tokens, output_tokens) din response.usage_metadata"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None, None
+    return (getattr(usage, "prompt_token_count", None),
+            getattr(usage, "candidates_token_count", None))
+
+
+class Tracer:
+    """Colectează span-urile unui job și le scrie în SQLite la final"""
+
+    def __init__(self, session_id: str, source_type: str, key_index=None, model=None, db_file=None):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.session_id = session_id
+        self.source_type = source_type
+        self.key_index = key_index
+        self.model = model
+        self.db_file = db_file
+        self.spans = []
+        # Atributele jobului pentru job_timings (file_size_mb, duration_s, outcome)
+        self.job = {}
+        self.current_stage = None
+        self.current_started = None
+
+    def annotate(self, **attrs):
+        """Completează atributele jobului (valorile None sunt ignorate)"""
+        self.job.update({name: value for name, value in attrs.items() if value is not None})
+
+    @contextmanager
+    def span(self, stage: str, **attrs):
+        """
+        Măsoară o etapă. Dicționarul returnat poate fi completat în interior
+        (ex. span["bytes"], span["outcome"] = "error").
+        """
+        record = dict(attrs)
+        start = time.perf_counter()
+        self.current_stage, self.current_started = stage, start
+        try:
+            yield record
+        except Exception as e:
+            record["outcome"] = "error"
+            record["error"] = str(e)[:500]
+            raise
+        finally:
+            record["stage"] = stage
+            record["duration_ms"] = (time.perf_counter() - start) * 1000
+            record.setdefault("outcome", "ok")
+            self.spans.append(record)
+            self.current_stage = None
+
+    def stage_seconds(self) -> dict:
+        """Secundele pe etapă (fără export), însumate pe span-uri"""
+        seconds = {}
+        for record in self.spans:
+            if record["stage"] != "export":
+                seconds[record["stage"]] = seconds.get(record["stage"], 0.0) + record["duration_ms"] / 1000
+        return seconds
+
+    def _timing_row(self):
+        """Rândul pentru job_timings, o singură dată și doar dacă s-a ajuns la generare"""
+        if self.job.get("recorded") or not any(record["stage"] == "generation" for record in self.spans):
+            return None
+        models = [record.get("model") for record in self.spans
+                  if record["stage"] == "generation" and record.get("outcome") == "ok"]
+        seconds = self.stage_seconds()
+        self.job["recorded"] = True
+        return (self.job_id, self.source_type, models[-1] if models else self.model,
+                self.job.get("file_size_mb"), self.job.get("duration_s"),
+                json.dumps({stage: round(value, 3) for stage, value in seconds.items()}),
+                round(sum(seconds.values()), 3),
+                self.job.get("outcome", "ok" if models else "error"))
+
+    def flush(self):
+        """Scrie span-urile colectate (și rândul job_timings) într-o singură tranzacție"""
+        if not self.spans:
+            return
+        timing = self._timing_row()
+        rows = [
+            (self.job_id, self.session_id, span["stage"], self.source_type,
+             span.get("model", self.model), span.get("key_index", self.key_index),
+             span.get("bytes"), span["duration_ms"], span.get("input_tokens"),
+             span.get("output_tokens"), span.get("outcome"), span.get("error"))
+            for span in self.spans
+        ]
+        try:
+            conn = get_connection(self.db_file)
+            conn.executemany('''
+                INSERT INTO pipeline_spans
+                (job_id, session_id, stage, source_type, model, key_index, bytes,
+                 duration_ms, input_tokens, output_tokens, outcome, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            if timing:
+                conn.execute('''
+                    INSERT INTO job_timings
+                    (job_id, source_type, model, file_size_mb, duration_s, stage_seconds, total_s, outcome)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', timing)
+            conn.commit()
+            conn.close()
+            self.spans = []
+        except sqlite3.Error:
+            pass  # Metricile nu trebuie să oprească o transcriere
+
+
+@contextmanager
+def span(tracer, stage: str, **attrs):
+    """Ca Tracer.span, dar acceptă și tracer=None (fără trasare)"""
+    if tracer is None:
+        yield dict(attrs)
+    else:
+        with tracer.span(stage, **attrs) as record:
+            yield record
+
+
+def record_key_usage(key_index, status: str, error_message: str = None, db_file=None):
+    """Înregistrează o utilizare a unei chei API în api_key_usage"""
+    try:
+        conn = get_connection(db_file)
+        conn.execute(
+            "INSERT INTO api_key_usage (key_index, status, error_message) VALUES (?, ?, ?)",
+            (key_index, status, (error_message or "")[:500] or None)
+        )
+        conn.commit()
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+# ============ TOKENI ============
+
+def key_fingerprint(api_key: str) -> str:
+    """Identificator stabil pentru o cheie, fără a stoca cheia în metrici"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12] if api_key else ""
+
+
+def estimate_cost(model: str, prompt_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    """Cost estimativ în USD pentru un apel"""
+    input_price, output_price = MODEL_PRICING.get(model, MODEL_PRICING["gemini-2.5-pro"])
+    billable_input = max((prompt_tokens or 0) - (cached_tokens or 0), 0)
+    return (billable_input * input_price
+            + (cached_tokens or 0) * input_price * CACHED_PRICE_RATIO
+            + (output_tokens or 0) * output_price) / 1_000_000
+
+
+def record_token_usage(response, session_id, api_key: str, model: str, purpose: str, db_file=None):
+    """Salvează tokenii din response.usage_metadata pentru un apel generate_content"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    try:
+        conn = get_connection(db_file)
+        conn.execute('''
+            INSERT INTO token_usage
+            (session_id, key_fingerprint, model, purpose, prompt_tokens, cached_tokens, output_tokens)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            session_id, key_fingerprint(api_key), model, purpose,
+            getattr(usage, "prompt_token_count", None) or 0,
+            getattr(usage, "cached_content_token_count", None) or 0,
+            getattr(usage, "candidates_token_count", None) or 0,
+        ))
+        conn.commit()
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def tokens_today(session_id: str = None, api_key: str = None, db_file=None) -> int:
+    """Totalul de tokeni (prompt + output) consumați azi de o sesiune sau o cheie"""
+    if session_id is None and api_key is None:
+        return 0
+    query = '''
+        SELECT COALESCE(SUM(prompt_tokens + output_tokens), 0)
+        FROM token_usage WHERE created_at >= date('now')
+    '''
+    params = []
+    if session_id is not None:
+        query += " AND session_id = ?"
+        params.append(session_id)
+    if api_key is not None:
+        query += " AND key_fingerprint = ?"
+        params.append(key_fingerprint(api_key))
+    try:
+        conn = get_connection(db_file)
+        total = conn.execute(query, params).fetchone()[0]
+        conn.close()
+        return total
+    except sqlite3.Error:
+        return 0
+
+
+def daily_token_rollup(days: int = 7, session_id: str = None, api_key: str = None,
+                       fingerprint: str = None, by_key: bool = False, db_file=None) -> list:
+    """
+    Agregare zilnică pe model și scop, cu costul estimat. Filtre opționale:
+    sesiunea, cheia (api_key sau amprenta ei); by_key grupează și pe cheie.
+    """
+    key_column = "key_fingerprint" if by_key else "NULL"
+    query = f'''
+        SELECT date(created_at) AS day, {key_column} AS key, model, purpose, COUNT(*),
+               SUM(prompt_tokens), SUM(cached_tokens), SUM(output_tokens)
+        FROM token_usage
+        WHERE created_at >= date('now', ?)
+    '''
+    params = [f"-{int(days)} days"]
+    if session_id is not None:
+        query += " AND session_id = ?"
+        params.append(session_id)
+    if api_key is not None:
+        fingerprint = key_fingerprint(api_key)
+    if fingerprint is not None:
+        query += " AND key_fingerprint = ?"
+        params.append(fingerprint)
+    query += " GROUP BY day, key, model, purpose ORDER BY day DESC, key, model"
+
+    conn = get_connection(db_file)
+    rows = []
+    for day, key, model, purpose, calls, prompt, cached, output in conn.execute(query, params):
+        rows.append({
+            "day": day,
+            **({"key": key} if by_key else {}),
+            "model": model,
+            "purpose": purpose,
+            "calls": calls,
+            "prompt_tokens": prompt,
+            "cached_tokens": cached,
+            "output_tokens": output,
+            "cost_usd": round(estimate_cost(model, prompt, output, cached), 4),
+        })
+    conn.close()
+    return rows
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    """Percentilă nearest-rank pe o listă sortată"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def stage_latency_stats(days: int = 7, db_file=None) -> list:
+    """
+    Agregă latența și debitul pe (etapă, tip sursă) pentru ultimele `days` zile.
+    Returnează o listă de dicționare, ordonată după etapă.
+    """
+    conn = get_connection(db_file)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT stage, source_type, duration_ms, bytes, outcome
+        FROM pipeline_spans
+        WHERE created_at >= datetime('now', ?)
+    ''', (f"-{int(days)} days",))
+
+    groups = {}
+    for stage, source_type, duration_ms, size, outcome in cursor:
+        group = groups.setdefault((stage, source_type or "upload"), {
+            "durations": [], "bytes": 0, "ok_ms": 0.0, "errors": 0
+        })
+        if outcome != "ok":
+            group["errors"] += 1
+            continue
+        group["durations"].append(duration_ms)
+        if size:
+            group["bytes"] += size
+            group["ok_ms"] += duration_ms
+    conn.close()
+
+    order = {stage: i for i, stage in enumerate(STAGES)}
+    stats = []
+    for (stage, source_type), group in sorted(groups.items(), key=lambda item: (order.get(item[0][0], 99), item[0][1])):
+        durations = sorted(group["durations"])
+        stats.append({
+            "stage": stage,
+            "source_type": source_type,
+            "count": len(durations),
+            "errors": group["errors"],
+            "p50_ms": round(_percentile(durations, 50), 1),
+            "p95_ms": round(_percentile(durations, 95), 1),
+            "mb_per_s": round(group["bytes"] / (1024 * 1024) / (group["ok_ms"] / 1000), 2) if group["ok_ms"] > 0 else None,
+        })
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Statistici pipeline transcriere")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    stats_parser = subparsers.add_parser("stats", help="Latență p50/p95 pe etapă și tip sursă")
+    stats_parser.add_argument("--days", type=int, default=7)
+    stats_parser.add_argument("--db", default=str(DB_FILE))
+    tokens_parser = subparsers.add_parser("tokens", help="Consum zilnic de tokeni și cost estimat")
+    tokens_parser.add_argument("--days", type=int, default=7)
+    tokens_parser.add_argument("--session")
+    tokens_parser.add_argument("--key", help="Amprenta cheii (key_fingerprint)")
+    tokens_parser.add_argument("--by-key", action="store_true", help="Grupează și pe cheie")
+    tokens_parser.add_argument("--db", default=str(DB_FILE))
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        init_metrics_tables(args.db)
+        rows = stage_latency_stats(args.days, args.db)
+        if not rows:
+            print("📭 Nu există date")
+            return 0
+        print(f"{'etapă':12s} {'sursă':8s} {'n':>5s} {'erori':>5s} {'p50 ms':>10s} {'p95 ms':>10s} {'MB/s':>8s}")
+        for row in rows:
+            throughput = f"{row['mb_per_s']:.2f}" if row["mb_per_s"] is not None else "-"
+            print(f"{row['stage']:12s} {row['source_type']:8s} {row['count']:5d} {row['errors']:5d} "
+                  f"{row['p50_ms']:10.1f} {row['p95_ms']:10.1f} {throughput:>8s}")
+    elif args.command == "tokens":
+        init_metrics_tables(args.db)
+        rows = daily_token_rollup(args.days, args.session, fingerprint=args.key,
+                                  by_key=args.by_key, db_file=args.db)
+        if not rows:
+            print("📭 Nu există date")
+            return 0
+        key_header = f"{'cheie':12s} " if args.by_key else ""
+        print(f"{'zi':10s} {key_header}{'model':24s} {'scop':10s} {'apeluri':>7s} {'prompt':>10s} {'cache':>8s} {'output':>9s} {'USD':>8s}")
+        for row in rows:
+            key_cell = f"{row['key'] or '-':12s} " if args.by_key else ""
+            print(f"{row['day']:10s} {key_cell}{row['model']:24s} {row['purpose']:10s} {row['calls']:7d} "
+                  f"{row['prompt_tokens']:10d} {row['cached_tokens']:8d} {row['output_tokens']:9d} {row['cost_usd']:8.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
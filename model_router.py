@@ -0,0 +1,161 @@
+"""
+Selecția modelului Gemini pentru fiecare apel.
+
+select_models alege nivelul după durata media, nevoia de traducere și ținta
+de latență, și adaugă modele de rezervă pentru cazul în care primul eșuează
+sau depășește timpul. route_model coboară la un model mai ieftin când
+sesiunea sau cheia API se apropie de bugetul zilnic de tokeni (calculat din
+token_usage, vezi metrics.py). plan_models le combină.
+"""
+from typing import Optional
+
+import api_errors
+import metrics
+
+# Bugete zilnice de tokeni (prompt + output)
+SESSION_DAILY_TOKEN_BUDGET = 2_000_000
+KEY_DAILY_TOKEN_BUDGET = 20_000_000
+
+# Peste această fracțiune din buget se coboară un nivel; peste buget se
+# folosește direct cel mai ieftin model
+BUDGET_SOFT_LIMIT = 0.8
+
+# Modele ordonate de la cel mai ieftin (și rapid) la cel mai scump
+MODEL_TIERS = ["gemini-2.5-flash-lite", "gemini-2.5-flash", "gemini-2.5-pro"]
+
+# Praguri de durată pentru tiering
+SHORT_MEDIA_SECONDS = 5 * 60
+LONG_MEDIA_SECONDS = 45 * 60
+
+# Ținta implicită de latență pentru generare
+DEFAULT_LATENCY_TARGET_S = 180
+
+# Secunde de generare estimate per minut de media, pe model
+GENERATION_SECONDS_PER_MEDIA_MINUTE = {
+    "gemini-2.5-flash-lite": 1.5,
+    "gemini-2.5-flash": 3.0,
+    "gemini-2.5-pro": 8.0,
+}
+
+# Limitele timeout-ului de generare
+MIN_GENERATION_TIMEOUT_S = 120
+MAX_GENERATION_TIMEOUT_S = 600
+
+def _downgrade(model: str, steps: int) -> str:
+    if model not in MODEL_TIERS:
+        return model
+    return MODEL_TIERS[max(MODEL_TIERS.index(model) - steps, 0)]
+
+
+def budget_usage(session_id=None, api_key=None, db_file=None) -> float:
+    """Fracțiunea maximă consumată azi din bugetul sesiunii sau al cheii"""
+    usage = 0.0
+    if session_id:
+        usage = max(usage, metrics.tokens_today(session_id=session_id, db_file=db_file) / SESSION_DAILY_TOKEN_BUDGET)
+    if api_key:
+        usage = max(usage, metrics.tokens_today(api_key=api_key, db_file=db_file) / KEY_DAILY_TOKEN_BUDGET)
+    return usage
+
+
+def route_model(preferred: str, session_id=None, api_key=None, db_file=None):
+    """
+    Alege modelul pentru un apel.
+    Returnează (model, motiv) - motivul e None dacă s-a păstrat modelul preferat.
+    """
+    usage = budget_usage(session_id, api_key, db_file)
+
+    if usage >= 1.0:
+        model = MODEL_TIERS[0] if preferred in MODEL_TIERS else preferred
+        reason = f"buget zilnic depășit ({usage:.0%})"
+    elif usage >= BUDGET_SOFT_LIMIT:
+        model = _downgrade(preferred, 1)
+        reason = f"buget zilnic aproape epuizat ({usage:.0%})"
+    else:
+        return preferred, None
+
+    if model == preferred:
+        return preferred, None
+    return model, reason
+
+
+def estimate_generation_seconds(model: str, duration_s: Optional[float]) -> Optional[float]:
+    """Timpul de generare estimat pentru o durată de media"""
+    if not duration_s:
+        return None
+    rate = GENERATION_SECONDS_PER_MEDIA_MINUTE.get(model, GENERATION_SECONDS_PER_MEDIA_MINUTE["gemini-2.5-pro"])
+    return duration_s / 60 * rate
+
+
+def generation_timeout_s(model: str, duration_s: Optional[float]) -> int:
+    """Timeout-ul de generare: de trei ori estimarea, în limite"""
+    estimate = estimate_generation_seconds(model, duration_s)
+    if estimate is None:
+        return MAX_GENERATION_TIMEOUT_S
+    return int(min(max(estimate * 3, MIN_GENERATION_TIMEOUT_S), MAX_GENERATION_TIMEOUT_S))
+
+
+def select_models(duration_s: Optional[float], is_audio_only: bool, needs_translation: bool,
+                  latency_target_s: float = DEFAULT_LATENCY_TARGET_S) -> list:
+    """
+    Alege modelul principal după durată, tip media și traducere, apoi îl
+    coboară până când estimarea încape în ținta de latență. Cazurile grele
+    (traducere pe conținut lung, video lung) rămân pe nivelul de care au
+    nevoie: ținta de latență nu le coboară, doar bugetul (route_model).
+    Returnează [principal, rezerve...]; rezervele sunt celelalte niveluri,
+    în ordinea apropierii (întâi cel mai rapid).
+    """
+    floor = 0
+    if duration_s is None:
+        tier = 1
+    elif duration_s <= SHORT_MEDIA_SECONDS:
+        tier = 0 if (is_audio_only or not needs_translation) else 1
+    elif needs_translation or (duration_s >= LONG_MEDIA_SECONDS and not is_audio_only):
+        # Cazurile grele: traducere pe conținut lung sau video lung
+        tier = floor = 2
+    else:
+        tier = 1
+
+    while tier > floor:
+        estimate = estimate_generation_seconds(MODEL_TIERS[tier], duration_s)
+        if estimate is None or estimate <= latency_target_s:
+            break
+        tier -= 1
+
+    fallbacks = sorted(
+        (i for i in range(len(MODEL_TIERS)) if i != tier),
+        key=lambda i: (abs(i - tier), i)
+    )
+    return [MODEL_TIERS[tier]] + [MODEL_TIERS[i] for i in fallbacks]
+
+
+def plan_models(duration_s: Optional[float], is_audio_only: bool, needs_translation: bool,
+                latency_target_s: float = DEFAULT_LATENCY_TARGET_S,
+                session_id=None, api_key=None, db_file=None) -> list:
+    """select_models cu limitarea de buget aplicată fiecărui model, fără duplicate"""
+    planned = []
+    for model in select_models(duration_s, is_audio_only, needs_translation, latency_target_s):
+        routed, _ = route_model(model, session_id, api_key, db_file)
+        if routed not in planned:
+            planned.append(routed)
+    return planned
+
+
+def should_fallback(error: Exception) -> bool:
+    """
+    Un alt model merită încercat doar dacă eroarea nu ține de cheie
+    (cotele și limitele de rată sunt per model, deci acolo ajută)
+    """
+    return api_errors.classify(error).kind != api_errors.INVALID_KEY
+
+
+def plan_text_models(session_id=None, api_key=None, db_file=None) -> list:
+    """
+    Modelele pentru prelucrări doar-text (ex. curățarea subtitrărilor):
+    nivelurile ieftine, cu limitarea de buget aplicată, fără duplicate
+    """
+    planned = []
+    for model in MODEL_TIERS[:2]:
+        routed, _ = route_model(model, session_id, api_key, db_file)
+        if routed not in planned:
+            planned.append(routed)
+    return planned
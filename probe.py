@@ -0,0 +1,295 @@
+"""
+Sondarea surselor media înainte de descărcare.
+
+Pentru linkurile directe și Google Drive se cere doar începutul fișierului
+(GET cu Range: bytes=0-PROBE_BYTES, cu HEAD ca rezervă): dimensiunea totală
+vine din Content-Range / Content-Length, tipul din Content-Type, iar ffprobe
+rulează pe octeții primiți pentru durată, codecuri și prezența pistelor
+audio/video. Fișierele locale (upload, după descărcare) se sondează direct.
+
+route() transformă rezultatul într-o decizie luată înainte de transferul
+mare: respingere (nu e media, fără pistă audio, prea mare), doar audio,
+cadre cheie (video peste limita de upload) sau video complet. Ce nu se poate
+afla rămâne None și nu blochează jobul: doar semnalele sigure resping.
+
+Rezultatele remote se păstrează CACHE_TTL_S, deci interfața poate sonda la
+fiecare rerun Streamlit fără cereri noi.
+"""
+import os
+import re
+import threading
+import time
+from urllib.parse import unquote, urlsplit
+
+import media
+import scratch
+from lazy_imports import LazyModule
+
+requests = LazyModule("requests")
+
+PROBE_BYTES = 2 * 1024 * 1024
+PROBE_TIMEOUT_S = 15
+CACHE_TTL_S = 10 * 60
+
+REJECT = "reject"
+AUDIO_ONLY = "audio_only"
+KEYFRAMES = "keyframes"
+FULL = "full"
+
+MEDIA_EXTENSIONS = (".mp4", ".mpeg", ".mpg", ".mov", ".avi", ".mkv", ".webm", ".flv", ".wmv",
+                    ".3gp", ".ogv", ".m4v", ".ts", ".mp3", ".m4a", ".aac", ".wav", ".ogg",
+                    ".oga", ".opus", ".flac")
+# Tipuri generice: conținutul decide (ffprobe)
+GENERIC_CONTENT_TYPES = ("application/octet-stream", "binary/octet-stream", "application/ogg")
+
+_CONTENT_RANGE_RE = re.compile(r'bytes\s+\d+-\d+/(\d+)')
+_FILENAME_RE = re.compile(r'filename\*?=(?:UTF-8\'\')?"?([^";]+)"?', re.IGNORECASE)
+_CONFIRM_RE = re.compile(r'confirm=([0-9A-Za-z_-]+)')
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def empty_info() -> dict:
+    return {
+        "size_mb": None,
+        "content_type": None,
+        "file_name": None,
+        "accepts_ranges": False,
+        "is_media": None,
+        "format_name": None,
+        "duration_s": None,
+        "has_video": None,
+        "has_audio": None,
+        "video_codec": None,
+        "audio_codec": None,
+        "width": None,
+        "height": None,
+    }
+
+
+def has_media_extension(url: str) -> bool:
+    """Extensia din calea URL-ului (fără query și fragment) este media"""
+    path = urlsplit(url).path.lower()
+    return path.endswith(MEDIA_EXTENSIONS)
+
+
+def _cached(key: str):
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry and time.time() - entry[0] <= CACHE_TTL_S:
+            return dict(entry[1])
+        _cache.pop(key, None)
+        return None
+
+
+def _remember(key: str, info: dict):
+    with _cache_lock:
+        _cache[key] = (time.time(), dict(info))
+
+
+def _apply_streams(info: dict, streams: dict):
+    info.update(streams)
+    info["is_media"] = streams["has_video"] or streams["has_audio"]
+
+
+def _probe_bytes(info: dict, head: bytes, suffix: str, job=None):
+    """Rulează ffprobe pe începutul fișierului, salvat temporar în scratch"""
+    if not head or not media.ffprobe_available():
+        return
+    path = scratch.new_path(suffix or ".bin", job)
+    try:
+        with open(path, "wb") as f:
+            f.write(head)
+        streams = media.probe_streams(path)
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    if streams:
+        _apply_streams(info, streams)
+
+
+def _apply_headers(info: dict, response):
+    headers = response.headers
+    content_type = (headers.get("content-type") or "").split(";")[0].strip().lower()
+    info["content_type"] = content_type or None
+
+    match = _CONTENT_RANGE_RE.search(headers.get("content-range", ""))
+    if response.status_code == 206 and match:
+        info["size_mb"] = int(match.group(1)) / (1024 * 1024)
+        info["accepts_ranges"] = True
+    elif response.status_code == 200 and headers.get("content-length"):
+        info["size_mb"] = int(headers["content-length"]) / (1024 * 1024)
+        info["accepts_ranges"] = headers.get("accept-ranges", "").lower() == "bytes"
+
+    match = _FILENAME_RE.search(headers.get("content-disposition", ""))
+    if match:
+        info["file_name"] = unquote(match.group(1)).strip()
+
+    if content_type.startswith(("video/", "audio/")):
+        info["is_media"] = True
+    elif content_type and content_type not in GENERIC_CONTENT_TYPES:
+        info["is_media"] = False
+
+
+def _read_head(response) -> bytes:
+    """Cel mult PROBE_BYTES din răspuns (serverele fără Range trimit tot)"""
+    chunks = []
+    received = 0
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        chunks.append(chunk)
+        received += len(chunk)
+        if received >= PROBE_BYTES:
+            break
+    response.close()
+    return b"".join(chunks)[:PROBE_BYTES]
+
+
+def _head_if_media(info: dict, response) -> bytes:
+    """Începutul fișierului, sau nimic dacă antetele arată că nu e media"""
+    if info["is_media"] is False:
+        response.close()
+        return b""
+    return _read_head(response)
+
+
+def _ranged_get(url: str):
+    return requests.get(url, stream=True, timeout=PROBE_TIMEOUT_S, allow_redirects=True,
+                        headers={"Range": f"bytes=0-{PROBE_BYTES - 1}"})
+
+
+def probe_url(url: str, job=None):
+    """
+    Sondează un link direct. Returnează (info, None) sau (None, eroare).
+    Cu HEAD se încearcă doar dacă serverul refuză GET-ul parțial.
+    """
+    cached = _cached(f"url:{url}")
+    if cached:
+        return cached, None
+
+    info = empty_info()
+    info["file_name"] = unquote(urlsplit(url).path.rsplit("/", 1)[-1]) or None
+    try:
+        response = _ranged_get(url)
+        if response.status_code in (200, 206):
+            _apply_headers(info, response)
+            head = _head_if_media(info, response)
+        else:
+            response.close()
+            response = requests.head(url, timeout=PROBE_TIMEOUT_S, allow_redirects=True)
+            if response.status_code >= 400:
+                return None, f"Eroare HTTP: {response.status_code}"
+            _apply_headers(info, response)
+            head = b""
+    except Exception as e:
+        return None, f"Linkul nu răspunde: {e}"
+
+    suffix = os.path.splitext(info["file_name"] or "")[1]
+    _probe_bytes(info, head, suffix, job)
+    _remember(f"url:{url}", info)
+    return info, None
+
+
+def probe_gdrive(file_id: str, job=None):
+    """
+    Sondează un fișier Google Drive public. Pagina de confirmare (fișiere
+    mari, fără scanare antivirus) se ocolește cu tokenul confirm.
+    """
+    cached = _cached(f"gdrive:{file_id}")
+    if cached:
+        return cached, None
+
+    info = empty_info()
+    url = f"https://drive.google.com/uc?export=download&id={file_id}"
+    try:
+        response = _ranged_get(url)
+        if response.status_code not in (200, 206):
+            response.close()
+            return None, f"Eroare HTTP: {response.status_code}"
+        _apply_headers(info, response)
+        if info["content_type"] == "text/html":
+            page = _read_head(response).decode("utf-8", errors="replace")
+            match = _CONFIRM_RE.search(page)
+            if not match:
+                # Pagină de permisiuni sau de cotă: nu se poate afla nimic sigur
+                return empty_info(), None
+            info = empty_info()
+            response = _ranged_get(f"{url}&confirm={match.group(1)}")
+            if response.status_code not in (200, 206):
+                response.close()
+                return None, f"Eroare HTTP: {response.status_code}"
+            _apply_headers(info, response)
+        head = _head_if_media(info, response)
+    except Exception as e:
+        return None, f"Google Drive nu răspunde: {e}"
+
+    suffix = os.path.splitext(info["file_name"] or "")[1]
+    _probe_bytes(info, head, suffix, job)
+    _remember(f"gdrive:{file_id}", info)
+    return info, None
+
+
+def probe_file(path: str) -> dict:
+    """Sondează un fișier local (dimensiunea e mereu cunoscută)"""
+    info = empty_info()
+    info["size_mb"] = os.path.getsize(path) / (1024 * 1024)
+    info["file_name"] = os.path.basename(path)
+    streams = media.probe_streams(path)
+    if streams:
+        _apply_streams(info, streams)
+    return info
+
+
+def probe_source(source_type: str, source_data, job=None):
+    """Sondarea pentru o sursă din render_upload_tab; (None, None) dacă nu se aplică"""
+    if source_type == "direct":
+        return probe_url(source_data, job)
+    if source_type == "gdrive":
+        return probe_gdrive(source_data, job)
+    return None, None
+
+
+def route(info: dict, limit_mb: float, max_mb: float, can_preprocess: bool = None):
+    """
+    Decizia pentru sursă: (REJECT | AUDIO_ONLY | KEYFRAMES | FULL, motiv).
+    can_preprocess: ffmpeg disponibil pentru modul cadre cheie.
+    """
+    if not info:
+        return FULL, None
+    if can_preprocess is None:
+        can_preprocess = media.ffmpeg_available()
+
+    size_mb = info.get("size_mb")
+    if info.get("is_media") is False:
+        kind = info.get("content_type") or "necunoscut"
+        return REJECT, f"Linkul nu duce la un fișier video/audio (tip: {kind})"
+    if info.get("has_audio") is False:
+        return REJECT, "Fișierul nu are pistă audio: nu există vorbire de transcris"
+    if size_mb and size_mb > max_mb:
+        return REJECT, f"Fișier prea mare ({size_mb:.0f}MB). Limita: {max_mb}MB"
+    if info.get("has_video") is False:
+        return AUDIO_ONLY, None
+    if size_mb and size_mb > limit_mb:
+        if can_preprocess:
+            return KEYFRAMES, (f"Fișier de {size_mb:.0f}MB, peste limita de upload ({limit_mb}MB): "
+                               f"se trimit pista audio și cadrele cheie")
+        return REJECT, f"Fișier prea mare ({size_mb:.0f}MB). Limita: {limit_mb}MB"
+    return FULL, None
+
+
+def describe(info: dict) -> str:
+    """Rezumat scurt pentru interfață"""
+    parts = []
+    if info.get("size_mb"):
+        parts.append(f"{info['size_mb']:.1f}MB")
+    if info.get("duration_s"):
+        minutes, seconds = divmod(int(info["duration_s"]), 60)
+        parts.append(f"{minutes}:{seconds:02d}")
+    codecs = "/".join(c for c in (info.get("video_codec"), info.get("audio_codec")) if c)
+    if codecs:
+        parts.append(codecs)
+    if info.get("width") and info.get("height"):
+        parts.append(f"{info['width']}x{info['height']}")
+    return " · ".join(parts)
@@ -0,0 +1,291 @@
+"""
+Retenția datelor din sessions.db.
+
+Politica:
+- o sesiune fără activitate (sessions.updated_at) de SESSION_TTL_DAYS se
+  șterge cu tot cu transcrieri, segmente și mesaje; sesiunile goale (fără
+  transcrieri și mesaje) expiră după EMPTY_SESSION_TTL_HOURS
+- transcrierile și mesajele fără rând în sessions se șterg la fiecare rulare
+- o sesiune păstrează cel mult MAX_MESSAGES_PER_SESSION mesaje (cele recente)
+- metricile (pipeline_spans, token_usage, api_key_usage) se păstrează
+  METRICS_RETENTION_DAYS
+- peste MAX_DB_MB de date se șterg sesiunile cel mai puțin recent active
+- rândurile terminate din jobs se șterg după jobs.KEEP_FINISHED_S
+
+Textele mari rămase necomprimate sunt rescrise în loturi (compression.py),
+iar textul vechi din segments, dublură a transcrierii, se golește (segments.py).
+Baza folosește auto_vacuum=INCREMENTAL; paginile eliberate se recuperează
+periodic cu PRAGMA incremental_vacuum. start_pruning_job pornește o singură
+dată per proces un fir de fundal care rulează run_maintenance la fiecare
+PRUNE_INTERVAL_S.
+
+    python retention.py            # o rulare de mentenanță
+    python retention.py --dry-run  # doar raportează ce s-ar șterge
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import compression
+import jobs
+import segments
+
+DB_FILE = Path("data") / "sessions.db"
+
+SESSION_TTL_DAYS = int(os.environ.get("RETENTION_SESSION_TTL_DAYS", "30"))
+EMPTY_SESSION_TTL_HOURS = int(os.environ.get("RETENTION_EMPTY_SESSION_TTL_HOURS", "24"))
+METRICS_RETENTION_DAYS = int(os.environ.get("RETENTION_METRICS_DAYS", "90"))
+MAX_MESSAGES_PER_SESSION = int(os.environ.get("RETENTION_MAX_MESSAGES_PER_SESSION", "1000"))
+MAX_DB_MB = float(os.environ.get("RETENTION_MAX_DB_MB", "500"))
+
+PRUNE_INTERVAL_S = 6 * 3600
+DELETE_BATCH = 50
+
+# Se recuperează spațiu doar peste acest procent de pagini libere
+VACUUM_FREE_RATIO = 0.1
+
+# Tabelele de metrici și coloana de timp
+METRICS_TABLES = {
+    "pipeline_spans": "created_at",
+    "token_usage": "created_at",
+    "api_key_usage": "used_at",
+    "job_timings": "created_at",
+}
+
+_job_started = set()
+_job_lock = threading.Lock()
+_stop = threading.Event()
+last_report = {}
+
+
+def get_connection(db_file=None):
+    return sqlite3.connect(str(db_file or DB_FILE), timeout=30)
+
+
+def init_retention(db_file=None):
+    """Indexurile folosite de retenție și de ștergerea pe sesiune"""
+    conn = get_connection(db_file)
+    cursor = conn.cursor()
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transcriptions_session ON transcriptions (session_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_api_key_usage_used ON api_key_usage (used_at)")
+    conn.commit()
+    conn.close()
+
+
+def touch_session(conn, session_id: str):
+    """
+    Marchează activitatea sesiunii (fără commit). Sesiunea expirată cât
+    timp un tab o mai folosea se recreează, ca rândurile noi să nu rămână orfane.
+    """
+    conn.execute("INSERT OR IGNORE INTO sessions (session_id) VALUES (?)", (session_id,))
+    conn.execute(
+        "UPDATE sessions SET updated_at = CURRENT_TIMESTAMP WHERE session_id = ?",
+        (session_id,)
+    )
+
+
+def _table_exists(conn, table: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+def delete_session(conn, session_id: str):
+    """Șterge sesiunea și tot ce îi aparține (fără commit)"""
+    if _table_exists(conn, "segments"):
+        conn.execute('''
+            DELETE FROM segments WHERE transcription_id IN
+            (SELECT id FROM transcriptions WHERE session_id = ?)
+        ''', (session_id,))
+    conn.execute("DELETE FROM transcriptions WHERE session_id = ?", (session_id,))
+    conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+    conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+
+def _delete_sessions(conn, session_ids: list, dry_run: bool) -> int:
+    if dry_run:
+        return len(session_ids)
+    for start in range(0, len(session_ids), DELETE_BATCH):
+        for session_id in session_ids[start:start + DELETE_BATCH]:
+            delete_session(conn, session_id)
+        conn.commit()
+    return len(session_ids)
+
+
+def expired_sessions(conn) -> list:
+    """Sesiunile inactive peste TTL și sesiunile goale peste TTL-ul lor"""
+    rows = conn.execute('''
+        SELECT s.session_id FROM sessions s
+        WHERE COALESCE(s.updated_at, s.created_at) < datetime('now', ?)
+           OR (COALESCE(s.updated_at, s.created_at) < datetime('now', ?)
+               AND NOT EXISTS (SELECT 1 FROM transcriptions t WHERE t.session_id = s.session_id)
+               AND NOT EXISTS (SELECT 1 FROM messages m WHERE m.session_id = s.session_id))
+    ''', (f"-{SESSION_TTL_DAYS} days", f"-{EMPTY_SESSION_TTL_HOURS} hours")).fetchall()
+    return [row[0] for row in rows]
+
+
+def delete_orphans(conn, dry_run: bool = False) -> int:
+    """
+    Șterge transcrierile, segmentele și mesajele fără sesiune (scrise de
+    căi care nu trec prin touch_session după ce sesiunea a expirat)
+    """
+    orphan = "session_id IS NULL OR session_id NOT IN (SELECT session_id FROM sessions)"
+    if dry_run:
+        return sum(conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {orphan}").fetchone()[0]
+                   for table in ("transcriptions", "messages"))
+    if _table_exists(conn, "segments"):
+        conn.execute(f'''
+            DELETE FROM segments WHERE transcription_id IN
+            (SELECT id FROM transcriptions WHERE {orphan})
+        ''')
+    removed = conn.execute(f"DELETE FROM transcriptions WHERE {orphan}").rowcount
+    removed += conn.execute(f"DELETE FROM messages WHERE {orphan}").rowcount
+    conn.commit()
+    return removed
+
+
+def trim_messages(conn, dry_run: bool = False) -> int:
+    """Păstrează ultimele MAX_MESSAGES_PER_SESSION mesaje din fiecare sesiune"""
+    over = conn.execute('''
+        SELECT session_id FROM messages GROUP BY session_id HAVING COUNT(*) > ?
+    ''', (MAX_MESSAGES_PER_SESSION,)).fetchall()
+    removed = 0
+    for (session_id,) in over:
+        params = (session_id, session_id, MAX_MESSAGES_PER_SESSION)
+        condition = '''
+            session_id = ? AND id NOT IN
+            (SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?)
+        '''
+        if dry_run:
+            removed += conn.execute(f"SELECT COUNT(*) FROM messages WHERE {condition}", params).fetchone()[0]
+        else:
+            removed += conn.execute(f"DELETE FROM messages WHERE {condition}", params).rowcount
+            conn.commit()
+    return removed
+
+
+def prune_metrics(conn, dry_run: bool = False) -> int:
+    removed = 0
+    for table, column in METRICS_TABLES.items():
+        if not _table_exists(conn, table):
+            continue
+        age = (f"-{METRICS_RETENTION_DAYS} days",)
+        if dry_run:
+            removed += conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {column} < datetime('now', ?)", age).fetchone()[0]
+        else:
+            removed += conn.execute(f"DELETE FROM {table} WHERE {column} < datetime('now', ?)", age).rowcount
+            conn.commit()
+    return removed
+
+
+def data_size_mb(conn) -> float:
+    """Dimensiunea datelor (fără paginile libere), în MB"""
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return (page_count - free_pages) * page_size / (1024 * 1024)
+
+
+def enforce_size_cap(conn, dry_run: bool = False) -> int:
+    """
+    Șterge sesiunile cel mai puțin recent active până sub MAX_DB_MB
+    (sesiunile active în ultima oră nu se ating)
+    """
+    removed = 0
+    while data_size_mb(conn) > MAX_DB_MB:
+        oldest = [row[0] for row in conn.execute('''
+            SELECT session_id FROM sessions
+            WHERE COALESCE(updated_at, created_at) < datetime('now', '-1 hour')
+            ORDER BY COALESCE(updated_at, created_at) LIMIT ?
+        ''', (DELETE_BATCH,)).fetchall()]
+        if not oldest or dry_run:
+            break
+        removed += _delete_sessions(conn, oldest, dry_run)
+    return removed
+
+
+def ensure_incremental_vacuum(conn) -> bool:
+    """
+    Activează auto_vacuum=INCREMENTAL. Pe o bază existentă modul se aplică
+    doar după un VACUUM complet, făcut o singură dată.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+def reclaim_space(conn) -> int:
+    """Eliberează paginile libere dacă depășesc VACUUM_FREE_RATIO; returnează paginile recuperate"""
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if not page_count or free_pages / page_count < VACUUM_FREE_RATIO:
+        return 0
+    conn.execute("PRAGMA incremental_vacuum")
+    return free_pages - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def run_maintenance(db_file=None, dry_run: bool = False) -> dict:
+    """O rulare completă: expirare, limite, metrici și recuperare de spațiu"""
+    conn = get_connection(db_file)
+    try:
+        report = {"size_mb_before": round(data_size_mb(conn), 2)}
+        report["expired_sessions"] = _delete_sessions(conn, expired_sessions(conn), dry_run)
+        report["orphaned_rows"] = delete_orphans(conn, dry_run)
+        report["trimmed_messages"] = trim_messages(conn, dry_run)
+        report["pruned_metrics"] = prune_metrics(conn, dry_run)
+        report["capped_sessions"] = enforce_size_cap(conn, dry_run)
+        if _table_exists(conn, "jobs"):
+            report["pruned_jobs"] = jobs.prune_finished(conn, dry_run)
+        if not dry_run:
+            report["compressed_rows"] = compression.compress_existing(conn)
+            report["stripped_segments"] = segments.strip_text(conn)
+            report["full_vacuum"] = ensure_incremental_vacuum(conn)
+            report["reclaimed_pages"] = reclaim_space(conn)
+        report["size_mb_after"] = round(data_size_mb(conn), 2)
+        return report
+    finally:
+        conn.close()
+
+
+def _pruning_loop(db_file):
+    global last_report
+    while not _stop.is_set():
+        try:
+            last_report = run_maintenance(db_file)
+        except sqlite3.Error as e:
+            last_report = {"error": str(e)}
+        _stop.wait(PRUNE_INTERVAL_S)
+
+
+def start_pruning_job(db_file=None) -> bool:
+    """Pornește firul de mentenanță pentru baza dată (o singură dată per proces)"""
+    db_key = str(db_file or DB_FILE)
+    with _job_lock:
+        if db_key in _job_started:
+            return False
+        _job_started.add(db_key)
+    threading.Thread(target=_pruning_loop, args=(db_file,), name="retention", daemon=True).start()
+    return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Retenția și compactarea sessions.db")
+    parser.add_argument("--db", default=None, help="Calea bazei de date (implicit data/sessions.db)")
+    parser.add_argument("--dry-run", action="store_true", help="Doar raportează ce s-ar șterge")
+    args = parser.parse_args()
+
+    report = run_maintenance(args.db, dry_run=args.dry_run)
+    for name, value in report.items():
+        print(f"{name}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Spațiul de lucru pe disc pentru fișierele media temporare.
+
+Toate fișierele stau sub SCRATCH_DIR (implicit <tmp>/transcript_tool), cu o
+cotă totală SCRATCH_QUOTA_MB:
+    jobs/<job_id>/   fișierele unui job, șterse când jobul se termină sau eșuează
+    cache/<zonă>/    fișiere păstrate între joburi (cache media), evacuate LRU
+    loose/           căi cerute fără job, evacuate LRU
+
+Un job se obține cu `with scratch.job() as job:` sau start_job() + cleanup().
+job.path(".mp4") întoarce o cale unică într-un director privat (înlocuiește
+tempfile.mktemp). Înainte de fiecare job nou se face loc: se șterg întâi
+directoarele de job abandonate (proces oprit), apoi fișierele din cache și
+loose folosite cel mai demult, până sub cotă. Fișierele joburilor active nu
+se evacuează niciodată.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+SCRATCH_DIR = Path(os.environ.get("SCRATCH_DIR", Path(tempfile.gettempdir()) / "transcript_tool"))
+SCRATCH_QUOTA_MB = float(os.environ.get("SCRATCH_QUOTA_MB", "5000"))
+
+# Un director de job neatins de atâta timp aparține unui proces oprit
+STALE_JOB_SECONDS = 6 * 3600
+
+
+class ScratchJob:
+    """Căile unui job; toate dispar la cleanup()"""
+
+    def __init__(self, manager, job_id: str):
+        self.manager = manager
+        self.job_id = job_id
+        self.root = manager.root / "jobs" / job_id
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, suffix: str = "", name: str = None) -> str:
+        """O cale nouă în directorul jobului (fișierul nu este creat)"""
+        return str(self.root / (name or f"{uuid.uuid4().hex[:12]}{suffix}"))
+
+    def mkdtemp(self, prefix: str = "") -> str:
+        directory = self.root / f"{prefix}{uuid.uuid4().hex[:8]}"
+        directory.mkdir(parents=True, exist_ok=True)
+        return str(directory)
+
+    def cleanup(self):
+        self.manager._finish(self)
+
+
+class ScratchManager:
+    def __init__(self, root=SCRATCH_DIR, quota_mb: float = SCRATCH_QUOTA_MB):
+        self.root = Path(root)
+        self.quota_bytes = int(quota_mb * 1024 * 1024)
+        self._active = set()
+        self._lock = threading.Lock()
+
+    # ============ JOBURI ============
+
+    def start_job(self, expected_bytes: int = 0) -> ScratchJob:
+        """Creează un job nou, după ce face loc pentru expected_bytes"""
+        self.evict(expected_bytes)
+        job = ScratchJob(self, uuid.uuid4().hex[:12])
+        with self._lock:
+            self._active.add(job.job_id)
+        return job
+
+    @contextmanager
+    def job(self, expected_bytes: int = 0):
+        job = self.start_job(expected_bytes)
+        try:
+            yield job
+        finally:
+            job.cleanup()
+
+    def _finish(self, job: ScratchJob):
+        shutil.rmtree(job.root, ignore_errors=True)
+        with self._lock:
+            self._active.discard(job.job_id)
+
+    # ============ CACHE ȘI CĂI FĂRĂ JOB ============
+
+    def cache_dir(self, zone: str) -> Path:
+        directory = self.root / "cache" / zone
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+
+    def loose_path(self, suffix: str = "") -> str:
+        """Cale în afara oricărui job; fișierul se evacuează LRU"""
+        directory = self.root / "loose"
+        directory.mkdir(parents=True, exist_ok=True)
+        return str(directory / f"{uuid.uuid4().hex[:12]}{suffix}")
+
+    @staticmethod
+    def touch(path):
+        """Marchează fișierul ca folosit acum (pentru LRU)"""
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    # ============ COTĂ ============
+
+    def _files(self, *parts):
+        base = self.root.joinpath(*parts)
+        if not base.exists():
+            return
+        for dirpath, _, filenames in os.walk(base):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def usage_bytes(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    def _remove_stale_jobs(self):
+        jobs_dir = self.root / "jobs"
+        if not jobs_dir.exists():
+            return
+        now = time.time()
+        with self._lock:
+            active = set(self._active)
+        for entry in jobs_dir.iterdir():
+            if entry.name in active:
+                continue
+            newest = max((mtime for _, _, mtime in self._files("jobs", entry.name)),
+                         default=entry.stat().st_mtime)
+            if now - newest > STALE_JOB_SECONDS:
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def evict(self, needed_bytes: int = 0) -> int:
+        """
+        Face loc pentru needed_bytes: șterge joburile abandonate, apoi
+        fișierele din cache și loose în ordinea ultimei folosiri.
+        Returnează bytes-ii eliberați din cache/loose.
+        """
+        self._remove_stale_jobs()
+        usage = self.usage_bytes()
+        if usage + needed_bytes <= self.quota_bytes:
+            return 0
+
+        candidates = sorted(
+            list(self._files("cache")) + list(self._files("loose")),
+            key=lambda item: item[2]
+        )
+        freed = 0
+        for path, size, _ in candidates:
+            if usage - freed + needed_bytes <= self.quota_bytes:
+                break
+            try:
+                os.unlink(path)
+                freed += size
+            except OSError:
+                pass
+        return freed
+
+    def evict_zone(self, zone: str, max_bytes: int) -> int:
+        """Limitează o zonă din cache la max_bytes, evacuând LRU"""
+        files = sorted(self._files("cache", zone), key=lambda item: item[2])
+        usage = sum(size for _, size, _ in files)
+        freed = 0
+        for path, size, _ in files:
+            if usage - freed <= max_bytes:
+                break
+            try:
+                os.unlink(path)
+                freed += size
+            except OSError:
+                pass
+        return freed
+
+
+manager = ScratchManager()
+
+
+def start_job(expected_bytes: int = 0) -> ScratchJob:
+    return manager.start_job(expected_bytes)
+
+
+def job(expected_bytes: int = 0):
+    return manager.job(expected_bytes)
+
+
+def new_path(suffix: str = "", job: ScratchJob = None) -> str:
+    """Calea pentru un fișier nou: în job dacă e dat, altfel în loose"""
+    return job.path(suffix) if job else manager.loose_path(suffix)
@@ -0,0 +1,346 @@
+"""
+Transcrierile ca segmente structurate.
+
+Textul generat de model se parsează o singură dată în tabelul segments:
+fiecare linie devine un rând (transcription_id, position, start_ms, end_ms,
+speaker, text, prefix). prefix + text reface linia originală, deci
+join_segments reproduce exact transcrierea. Liniile fără timestamp moștenesc
+intervalul liniei anterioare.
+
+Textul liniilor nu se mai păstrează în segments (coloana text rămâne NULL):
+transcrierea comprimată din transcriptions este singura copie, iar la citire
+textul se ia din linia `position` a acesteia. Rândurile vechi cu text sunt
+golite de strip_text (din ciclul de retenție).
+
+Indexul pe (transcription_id, start_ms) găsește segmentele pentru saltul la
+un moment dat, feliile de timp din contextul de chat și exporturi. Textul
+lor vine din liniile decodate ale transcrierii, păstrate într-un cache LRU
+de LINE_CACHE_SIZE transcrieri: transcrierea se decomprimă o dată, nu la
+fiecare căutare. Textul unei transcrieri nu se schimbă după salvare, iar
+id-urile nu se refolosesc (AUTOINCREMENT), deci cache-ul e sigur și între
+procese; store_segments și delete_segments îl invalidează local.
+"""
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import compression
+import timestamps
+
+DB_FILE = Path("data") / "sessions.db"
+
+# Transcrieri decodate ținute în memorie (liniile lor)
+LINE_CACHE_SIZE = 16
+
+# Prefixul unei linii: marcaje de listă, [timestamp], apoi opțional vorbitorul.
+# Se recunosc doar formele produse de model: "Vorbitor N:" / "Speaker N:"
+# (opțional îngroșat) și nume îngroșate ("**Ana:**", "**Ana Pop**:").
+# O propoziție obișnuită terminată cu ":" rămâne text.
+_LINE_RE = re.compile(
+    r'^(?P<lead>[ \t*\-]*)'
+    r'(?P<stamp>\[\d{1,3}:\d{2}(?::\d{2})?\])'
+    r'(?P<gap>[ \t]*)'
+    r'(?:(?P<speaker_block>'
+    r'(?:\*\*)?(?P<numbered>(?:Vorbitor(?:ul)?|Speaker) ?\d{1,2})(?::\*\*|\*\*:|:)'
+    r'|\*\*(?P<named>[A-ZĂÂÎȘȚ][\w.\-]*(?: [\w.\-]+){0,3})(?::\*\*|\*\*:)'
+    r')[ \t]+)?'
+)
+
+# Tabelele backfill-uite în acest proces (init_database rulează la fiecare rerun)
+_backfilled = set()
+
+_line_cache = OrderedDict()
+_line_cache_lock = threading.Lock()
+
+
+def get_connection(db_file=None):
+    return sqlite3.connect(str(db_file or DB_FILE))
+
+
+def init_segments_table(db_file=None):
+    """Creează tabelul segments (dacă nu există)"""
+    conn = get_connection(db_file)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS segments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            transcription_id INTEGER,
+            position INTEGER,
+            start_ms INTEGER,
+            end_ms INTEGER,
+            speaker TEXT,
+            text TEXT,
+            prefix TEXT DEFAULT '',
+            FOREIGN KEY (transcription_id) REFERENCES transcriptions(id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_segments_start
+        ON segments (transcription_id, start_ms)
+    ''')
+
+    conn.commit()
+    conn.close()
+
+
+def parse_segments(text: str) -> list:
+    """
+    Împarte transcrierea în segmente, câte unul pe linie:
+    [(position, start_ms, end_ms, speaker, text, prefix)].
+    end_ms este începutul următorului timestamp mai mare (None pentru ultimul).
+    """
+    rows = []
+    start_ms = None
+    for position, line in enumerate((text or "").split("\n")):
+        match = _LINE_RE.match(line)
+        speaker = None
+        if match:
+            start_ms = timestamps.line_seconds(line) * 1000
+            speaker = match.group("numbered") or match.group("named")
+            prefix = match.group(0)
+        else:
+            prefix = ""
+        rows.append([position, start_ms, None, speaker, line[len(prefix):], prefix])
+
+    # Sfârșitul fiecărui segment: începutul următoarei linii cu timestamp mai mare
+    following = None
+    for row in reversed(rows):
+        if row[1] is None or row[5] == "":
+            continue
+        if following is None:
+            end_ms = None
+        elif following[1] > row[1]:
+            end_ms = following[1]
+        else:
+            end_ms = following[2]
+        row[2] = end_ms if end_ms is None or end_ms > row[1] else None
+        following = row
+    # Liniile fără timestamp moștenesc și sfârșitul liniei anterioare
+    for previous, row in zip(rows, rows[1:]):
+        if row[5] == "" and row[1] is not None:
+            row[2] = previous[2]
+    return [tuple(row) for row in rows]
+
+
+def join_segments(rows) -> str:
+    """Reface textul original din rânduri (…, text, prefix), în ordinea position"""
+    return "\n".join(f"{row[-1]}{row[-2]}" for row in rows)
+
+
+def store_segments(conn, transcription_id: int, text: str):
+    """
+    Înlocuiește segmentele unei transcrieri. Folosește conexiunea dată
+    (fără commit), ca inserarea să fie în aceeași tranzacție cu transcrierea.
+    """
+    conn.execute("DELETE FROM segments WHERE transcription_id = ?", (transcription_id,))
+    conn.executemany('''
+        INSERT INTO segments (transcription_id, position, start_ms, end_ms, speaker, text, prefix)
+        VALUES (?, ?, ?, ?, ?, NULL, ?)
+    ''', [(transcription_id,) + row[:4] + row[5:] for row in parse_segments(text)])
+    _forget_lines([transcription_id])
+
+
+def _forget_lines(transcription_ids):
+    ids = set(transcription_ids)
+    with _line_cache_lock:
+        for key in [key for key in _line_cache if key[1] in ids]:
+            del _line_cache[key]
+
+
+def _transcript_lines(conn, transcription_id: int, db_key: str = None) -> list:
+    """Liniile transcrierii; cu db_key se folosește cache-ul LRU"""
+    key = (db_key, transcription_id)
+    if db_key is not None:
+        with _line_cache_lock:
+            lines = _line_cache.get(key)
+            if lines is not None:
+                _line_cache.move_to_end(key)
+                return lines
+
+    row = conn.execute("SELECT transcription FROM transcriptions WHERE id = ?", (transcription_id,)).fetchone()
+    if not row:
+        return []
+    lines = (compression.unpack(row[0]) or "").split("\n")
+    if db_key is not None:
+        with _line_cache_lock:
+            _line_cache[key] = lines
+            while len(_line_cache) > LINE_CACHE_SIZE:
+                _line_cache.popitem(last=False)
+    return lines
+
+
+def _with_text(rows, conn, transcription_id: int, db_file=None):
+    """Completează textul rândurilor fără text din transcrierea stocată"""
+    lines = None
+    for row in rows:
+        if row[4] is None:
+            if lines is None:
+                lines = _transcript_lines(conn, transcription_id, str(db_file or DB_FILE))
+            line = lines[row[0]] if row[0] < len(lines) else ""
+            row = row[:4] + (line[len(row[5]):], row[5])
+        yield row
+
+
+def strip_text(conn, batch: int = 50) -> int:
+    """
+    Golește textul segmentelor vechi acolo unde transcrierea stocată îl reface
+    identic, câte `batch` transcrieri pe tranzacție. Returnează transcrierile golite.
+    """
+    stripped = 0
+    last_id = 0
+    while True:
+        try:
+            pending = conn.execute('''
+                SELECT DISTINCT transcription_id FROM segments
+                WHERE text IS NOT NULL AND transcription_id > ?
+                ORDER BY transcription_id LIMIT ?
+            ''', (last_id, batch)).fetchall()
+        except sqlite3.OperationalError:
+            return stripped  # tabelul nu există încă
+        if not pending:
+            return stripped
+        for (transcription_id,) in pending:
+            rows = conn.execute(
+                "SELECT position, text, prefix FROM segments WHERE transcription_id = ?", (transcription_id,)
+            ).fetchall()
+            lines = _transcript_lines(conn, transcription_id)
+            if all(text is None or (position < len(lines) and lines[position] == prefix + text)
+                   for position, text, prefix in rows):
+                conn.execute("UPDATE segments SET text = NULL WHERE transcription_id = ?", (transcription_id,))
+                stripped += 1
+        conn.commit()
+        last_id = pending[-1][0]
+
+
+def delete_segments(conn, transcription_ids):
+    transcription_ids = list(transcription_ids)
+    conn.executemany(
+        "DELETE FROM segments WHERE transcription_id = ?",
+        [(transcription_id,) for transcription_id in transcription_ids]
+    )
+    _forget_lines(transcription_ids)
+
+
+def backfill_segments(db_file=None) -> int:
+    """Parsează transcrierile existente care nu au încă segmente (o dată per proces)"""
+    db_key = str(db_file or DB_FILE)
+    if db_key in _backfilled:
+        return 0
+
+    conn = get_connection(db_file)
+    try:
+        pending = conn.execute('''
+            SELECT t.id FROM transcriptions t
+            WHERE t.transcription IS NOT NULL AND t.transcription != ''
+              AND NOT EXISTS (SELECT 1 FROM segments s WHERE s.transcription_id = t.id)
+        ''').fetchall()
+        for (transcription_id,) in pending:
+            row = conn.execute(
+                "SELECT transcription FROM transcriptions WHERE id = ?", (transcription_id,)
+            ).fetchone()
+            store_segments(conn, transcription_id, compression.unpack(row[0]))
+            conn.commit()
+        reparsed = reparse_speakers(conn)
+        _backfilled.add(db_key)
+        return len(pending) + reparsed
+    finally:
+        conn.close()
+
+
+def reparse_speakers(conn) -> int:
+    """
+    Reparsează transcrierile segmentate cu regula veche de vorbitor (orice
+    text scurt cu majusculă urmat de ":"), păstrate înainte de restrângerea
+    _LINE_RE la formele produse de model
+    """
+    suspect = conn.execute('''
+        SELECT DISTINCT s.transcription_id FROM segments s
+        WHERE s.speaker IS NOT NULL AND s.prefix NOT LIKE '%**%'
+          AND s.speaker NOT LIKE 'Vorbitor%' AND s.speaker NOT LIKE 'Speaker%'
+          AND EXISTS (SELECT 1 FROM transcriptions t WHERE t.id = s.transcription_id)
+    ''').fetchall()
+    for (transcription_id,) in suspect:
+        row = conn.execute(
+            "SELECT transcription FROM transcriptions WHERE id = ?", (transcription_id,)
+        ).fetchone()
+        store_segments(conn, transcription_id, compression.unpack(row[0]))
+        conn.commit()
+    return len(suspect)
+
+
+def get_segments(transcription_id: int, start_ms: int = None, end_ms: int = None,
+                 limit: int = None, db_file=None) -> list:
+    """
+    Segmentele care se suprapun cu [start_ms, end_ms), în ordinea din text:
+    [(position, start_ms, end_ms, speaker, text, prefix)].
+    Fără interval se returnează toată transcrierea.
+    """
+    query = '''
+        SELECT position, start_ms, end_ms, speaker, text, prefix
+        FROM segments WHERE transcription_id = ?
+    '''
+    params = [transcription_id]
+    if end_ms is not None:
+        query += " AND start_ms < ?"
+        params.append(end_ms)
+    if start_ms is not None:
+        query += " AND start_ms IS NOT NULL AND (end_ms IS NULL OR end_ms > ?)"
+        params.append(start_ms)
+    query += " ORDER BY position"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    conn = get_connection(db_file)
+    try:
+        return list(_with_text(conn.execute(query, params).fetchall(), conn, transcription_id, db_file))
+    finally:
+        conn.close()
+
+
+def iter_segments(transcription_id: int, db_file=None):
+    """Ca get_segments fără interval, dar citește rândurile pe măsură ce sunt consumate"""
+    conn = get_connection(db_file)
+    try:
+        cursor = conn.execute('''
+            SELECT position, start_ms, end_ms, speaker, text, prefix
+            FROM segments WHERE transcription_id = ?
+            ORDER BY position
+        ''', (transcription_id,))
+        yield from _with_text(cursor, conn, transcription_id, db_file)
+    finally:
+        conn.close()
+
+
+def segment_at(transcription_id: int, ms: int, db_file=None):
+    """Segmentul care conține momentul dat (ultimul cu start_ms <= ms)"""
+    conn = get_connection(db_file)
+    try:
+        rows = conn.execute('''
+            SELECT position, start_ms, end_ms, speaker, text, prefix
+            FROM segments
+            WHERE transcription_id = ? AND start_ms <= ?
+            ORDER BY start_ms DESC, position LIMIT 1
+        ''', (transcription_id, ms)).fetchall()
+        return next(_with_text(rows, conn, transcription_id, db_file), None)
+    finally:
+        conn.close()
+
+
+def excerpt(transcription_id: int, start_ms: int = None, end_ms: int = None,
+            max_chars: int = 300, db_file=None) -> str:
+    """Textul unei felii de timp (sau începutul transcrierii), tăiat la max_chars"""
+    lines = []
+    total = 0
+    for row in get_segments(transcription_id, start_ms, end_ms, limit=200, db_file=db_file):
+        line = f"{row[-1]}{row[-2]}"
+        if not line.strip():
+            continue
+        lines.append(line)
+        total += len(line) + 1
+        if total >= max_chars:
+            break
+    return "\n".join(lines)[:max_chars]
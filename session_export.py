@@ -0,0 +1,174 @@
+"""
+Export ZIP al unei sesiuni întregi.
+
+Arhiva conține, pentru fiecare transcriere, textul, documentul Word (dacă
+este disponibil) și exporturile SRT/VTT/JSON, plus un manifest.json.
+iter_session_zip este un generator de bucăți de bytes: transcrierile se
+citesc una câte una (segmentele unei transcrieri o singură dată, pentru
+toate formatele) și fiecare fișier se comprimă și se predă pe măsură ce e
+scris, deci memoria nu crește cu numărul de transcrieri.
+
+    python session_export.py abcd1234 --out sesiune.zip
+"""
+import argparse
+import io
+import json
+import re
+import sqlite3
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+import exporters
+import segments
+
+DB_FILE = Path("data") / "sessions.db"
+
+# Bucățile mai mici se adună înainte de a fi predate
+CHUNK_BYTES = 256 * 1024
+
+
+class _ChunkSink(io.RawIOBase):
+    """Destinație fără seek pentru ZipFile; bytes-ii scriși se golesc cu drain()"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+def safe_name(name: str, limit: int = 60) -> str:
+    stem = re.sub(r'[^\w.\- ]+', '_', name or "transcriere").strip(" ._")
+    return stem[:limit] or "transcriere"
+
+
+def _text_chunks(rows):
+    for index, row in enumerate(rows):
+        yield ("\n" if index else "") + f"{row[-1]}{row[-2]}"
+
+
+def _write_entry(archive, sink, name: str, chunks, manifest_files: list):
+    """Scrie un fișier în arhivă din bucăți text și predă bytes-ii comprimați"""
+    info = zipfile.ZipInfo(name, time.localtime()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    size = 0
+    with archive.open(info, "w") as entry:
+        for chunk in chunks:
+            data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+            entry.write(data)
+            size += len(data)
+            if sink.size >= CHUNK_BYTES:
+                yield sink.drain()
+    manifest_files.append({"name": name, "bytes": size})
+    if sink.size:
+        yield sink.drain()
+
+
+def _iter_transcriptions(session_id: str, db_file=None):
+    """Metadatele transcrierilor sesiunii, fără text, citite dintr-un cursor"""
+    conn = sqlite3.connect(str(db_file or DB_FILE))
+    try:
+        cursor = conn.execute('''
+            SELECT id, video_name, source_language, target_language, file_size_mb,
+                   source_type, source_url, created_at
+            FROM transcriptions
+            WHERE session_id = ?
+            ORDER BY created_at, id
+        ''', (session_id,))
+        for row in cursor:
+            yield {
+                "id": row[0],
+                "video_name": row[1],
+                "source_language": row[2],
+                "target_language": row[3],
+                "file_size_mb": row[4],
+                "source_type": row[5],
+                "source_url": row[6],
+                "created_at": row[7],
+            }
+    finally:
+        conn.close()
+
+
+def iter_session_zip(session_id: str, db_file=None, build_docx=None):
+    """
+    Generează arhiva ZIP a sesiunii, bucată cu bucată.
+    build_docx(text, info) -> BytesIO opțional (ex. app.create_word_document);
+    documentul Word se construiește pe rând, doar pentru transcrierea curentă.
+    """
+    sink = _ChunkSink()
+    manifest = {"session_id": session_id, "transcriptions": []}
+    archive = zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED)
+
+    for info in _iter_transcriptions(session_id, db_file):
+        folder = f"{info['id']:05d}_{safe_name(info['video_name'])}"
+        files = []
+
+        # Segmentele (cu textul decodat) se citesc o dată și alimentează toate fișierele
+        rows = segments.get_segments(info["id"], db_file=db_file)
+        yield from _write_entry(archive, sink, f"{folder}/transcriere.txt", _text_chunks(rows), files)
+
+        for export_format in ("srt", "vtt", "json"):
+            _, extension = exporters.EXPORT_FORMATS[export_format]
+            yield from _write_entry(archive, sink, f"{folder}/transcriere.{extension}",
+                                    exporters.iter_export(export_format, rows, info), files)
+
+        if build_docx:
+            text = segments.join_segments(rows)
+            doc_io = build_docx(text, info)
+            if doc_io:
+                doc_io.seek(0)
+                yield from _write_entry(archive, sink, f"{folder}/transcriere.docx",
+                                        iter(lambda: doc_io.read(CHUNK_BYTES), b""), files)
+
+        manifest["transcriptions"].append(dict(info, files=files))
+
+    manifest_files = []
+    yield from _write_entry(archive, sink, "manifest.json",
+                            [json.dumps(manifest, indent=2, ensure_ascii=False)], manifest_files)
+    archive.close()
+    yield sink.drain()
+
+
+def write_session_zip(session_id: str, fileobj, db_file=None, build_docx=None) -> int:
+    """Scrie arhiva în fileobj; returnează numărul de bytes"""
+    written = 0
+    for chunk in iter_session_zip(session_id, db_file, build_docx):
+        fileobj.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Exportă toate transcrierile unei sesiuni într-un ZIP")
+    parser.add_argument("session_id")
+    parser.add_argument("--out", help="Fișierul ZIP (implicit stdout)")
+    parser.add_argument("--db", default=None, help="Calea bazei de date (implicit data/sessions.db)")
+    args = parser.parse_args()
+
+    if args.out:
+        with open(args.out, "wb") as output:
+            written = write_session_zip(args.session_id, output, args.db)
+        print(f"✅ {args.out}: {written / 1024:.0f}KB", file=sys.stderr)
+    else:
+        write_session_zip(args.session_id, sys.stdout.buffer, args.db)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Deduplicarea joburilor identice aflate în lucru (single-flight).
+
+Cheia unui job este identitatea normalizată a sursei (id YouTube, id Drive,
+URL normalizat sau hash-ul fișierului încărcat) plus limbile și opțiunile
+care schimbă rezultatul. Primul solicitant devine lider și rulează jobul;
+cei care cer același job cât timp rulează devin urmăritori: văd progresul
+liderului și primesc același rezultat, salvat apoi în propria sesiune.
+Un rezultat reușit rămâne disponibil FINISHED_TTL_S după final; un eșec
+eliberează imediat cheia, ca următoarea cerere să poată reîncerca. Un lider
+care renunță din motive ale propriei sesiuni (admitere) apelează abandon():
+cheia se eliberează fără eroare, iar urmăritorii reintră în join() și unul
+dintre ei devine lider.
+
+Registrul este în memoria procesului (modulul este importat o singură dată,
+nu re-executat la rerun-urile Streamlit), deci acoperă toate sesiunile
+servite de același proces.
+"""
+import hashlib
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+FINISHED_TTL_S = 120
+FOLLOW_TIMEOUT_S = 3 * 3600
+
+
+class Flight:
+    """Un job în lucru: progresul publicat de lider și rezultatul final"""
+
+    def __init__(self, key: str, leader_session: str = None):
+        self.key = key
+        self.leader_session = leader_session
+        self.followers = 0
+        self.progress = 0.0
+        self.status = ""
+        self.result = None
+        self.error = None
+        self.abandoned = False
+        self.finished_at = None
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def publish(self, value: float, text: str):
+        self.progress = value
+        self.status = text
+
+    def finish(self, result: dict):
+        self.result = result
+        self.finished_at = time.time()
+        self._done.set()
+
+    def fail(self, error: str):
+        self.error = error or "Job întrerupt"
+        self._release()
+
+    def abandon(self):
+        """Liderul renunță fără eșec: urmăritorii pot relua jobul"""
+        self.abandoned = True
+        self._release()
+
+    def _release(self):
+        self.finished_at = time.time()
+        self._done.set()
+        with _lock:
+            if _flights.get(self.key) is self:
+                del _flights[self.key]
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+
+_flights = {}
+_lock = threading.Lock()
+
+
+def normalize_url(url: str) -> str:
+    """Schema și host-ul cu litere mici, fără fragment și fără / final"""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+def source_identity(source_type: str, source_data) -> str:
+    """Identitatea normalizată a sursei din render_upload_tab"""
+    if source_type == "upload":
+        digest = hashlib.sha256(source_data.getbuffer()).hexdigest()
+        return f"upload:{digest}"
+    if source_type == "direct":
+        return f"url:{normalize_url(source_data)}"
+    return f"{source_type}:{source_data}"
+
+
+def job_key(source_type: str, source_data, *options) -> str:
+    return "|".join([source_identity(source_type, source_data)] + [str(option) for option in options])
+
+
+def _prune(now: float):
+    expired = [key for key, flight in _flights.items()
+               if flight.done and now - flight.finished_at > FINISHED_TTL_S]
+    for key in expired:
+        del _flights[key]
+
+
+def join(key: str, session_id: str = None):
+    """
+    Returnează (flight, este_lider). Liderul trebuie să apeleze finish(),
+    fail() sau abandon() în orice situație (de preferat într-un bloc finally).
+    """
+    with _lock:
+        _prune(time.time())
+        flight = _flights.get(key)
+        if flight is not None:
+            flight.followers += 1
+            return flight, False
+        flight = Flight(key, session_id)
+        _flights[key] = flight
+        return flight, True
+
+
+def in_flight() -> int:
+    """Numărul de joburi aflate încă în lucru"""
+    with _lock:
+        return sum(1 for flight in _flights.values() if not flight.done)
@@ -0,0 +1,64 @@
+"""Timestamp-urile [MM:SS] / [HH:MM:SS] din transcrieri"""
+import re
+
+# [MM:SS] (minutele pot depăși 59) sau [HH:MM:SS]
+TIMESTAMP_RE = re.compile(r'\[(\d{1,3}):(\d{2})(?::(\d{2}))?\]')
+
+# Momente scrise liber, cu sau fără paranteze (ex. "ce se spune la 12:30?")
+CLOCK_RE = re.compile(r'(?<![\d:])(\d{1,3}):([0-5]\d)(?::([0-5]\d))?(?![\d:])')
+
+
+def match_seconds(match) -> int:
+    """Secundele reprezentate de un match TIMESTAMP_RE"""
+    first, second, third = match.groups()
+    if third is not None:
+        return int(first) * 3600 + int(second) * 60 + int(third)
+    return int(first) * 60 + int(second)
+
+
+def format_clock(seconds: float, force_hours: bool = False) -> str:
+    """Formatează secundele ca [MM:SS], sau [HH:MM:SS] peste o oră"""
+    total = max(int(seconds), 0)
+    hours, rest = divmod(total, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours or force_hours:
+        return f"[{hours:02d}:{minutes:02d}:{secs:02d}]"
+    return f"[{minutes:02d}:{secs:02d}]"
+
+
+def remap_timestamps(text: str, mapper) -> str:
+    """Înlocuiește fiecare timestamp t din text cu mapper(t)"""
+    def replace(match):
+        return format_clock(mapper(match_seconds(match)), force_hours=match.group(3) is not None)
+    return TIMESTAMP_RE.sub(replace, text)
+
+
+def line_seconds(line: str):
+    """Timestamp-ul de la începutul liniei, în secunde (None dacă lipsește)"""
+    match = TIMESTAMP_RE.match(line.lstrip(" *-\t"))
+    return match_seconds(match) if match else None
+
+
+def split_for_continuation(text: str):
+    """
+    Pregătește un text trunchiat pentru continuare: elimină ultima linie cu
+    timestamp (probabil incompletă) și tot ce urmează după ea.
+    Returnează (text_păstrat, secunde_reluare) sau (text, None) fără timestamps.
+    """
+    lines = text.rstrip("\n").split("\n")
+    for index in range(len(lines) - 1, -1, -1):
+        seconds = line_seconds(lines[index])
+        if seconds is not None:
+            return "\n".join(lines[:index]), seconds
+    return text, None
+
+
+def merge_continuation(kept: str, continuation: str, resume_seconds: int) -> str:
+    """Adaugă continuarea începând cu prima linie de la `resume_seconds` încolo"""
+    lines = continuation.strip("\n").split("\n")
+    for index, line in enumerate(lines):
+        seconds = line_seconds(line)
+        if seconds is not None and seconds >= resume_seconds:
+            new_text = "\n".join(lines[index:])
+            return f"{kept}\n{new_text}" if kept else new_text
+    return kept
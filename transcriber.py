@@ -1,11 +1,13 @@
 import streamlit as st
-from google import genai
-from google.genai import types
-import tempfile
-import os
 import time
 from typing import Tuple, Optional
 from api_manager import api_manager
+from gemini_client import get_client, generate_complete
+import model_router
+import scratch
+from lazy_imports import LazyModule
+
+types = LazyModule("google.genai.types")
 
 class VideoTranscriber:
     """Gestionează transcrierea video folosind Gemini"""
@@ -39,21 +41,22 @@ class VideoTranscriber:
     
     def initialize_client(self, api_key: str):
         """Inițializează clientul Gemini"""
-        self.client = genai.Client(api_key=api_key)
+        self.client = get_client(api_key)
     
     def upload_video_to_gemini(self, video_file, progress_callback=None) -> Tuple[Optional[object], Optional[str]]:
         """
         Încarcă video-ul pe serverele Google.
         Returnează (file_object, None) sau (None, error_message)
         """
+        job = scratch.start_job(video_file.size)
         try:
             if progress_callback:
                 progress_callback(0.1, "Salvare fișier temporar...")
             
-            # Salvează fișierul temporar
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{video_file.name.split('.')[-1]}") as tmp_file:
-                tmp_file.write(video_file.getvalue())
-                tmp_path = tmp_file.name
+            # Salvează fișierul temporar (șters împreună cu jobul, și la eșec)
+            tmp_path = job.path(f".{video_file.name.split('.')[-1]}")
+            with open(tmp_path, 'wb') as tmp_file:
+                tmp_file.write(video_file.getbuffer())
             
             if progress_callback:
                 progress_callback(0.3, "Încărcare pe serverele Google...")
@@ -66,16 +69,13 @@ class VideoTranscriber:
                 progress_callback(0.5, "Procesare video...")
             
             # Așteaptă procesarea
-            while video_file_obj.state == types.FileState.PROCESSING:
+            while video_file_obj.state.name == "PROCESSING":
                 time.sleep(2)
                 video_file_obj = self.client.files.get(name=video_file_obj.name)
                 
-            if video_file_obj.state == types.FileState.FAILED:
+            if video_file_obj.state.name == "FAILED":
                 return None, f"❌ Procesarea video a eșuat"
             
-            # Șterge fișierul temporar
-            os.unlink(tmp_path)
-            
             if progress_callback:
                 progress_callback(0.7, "Video încărcat cu succes!")
             
@@ -83,6 +83,8 @@ class VideoTranscriber:
             
         except Exception as e:
             return None, f"❌ Eroare la încărcarea video: {str(e)}"
+        finally:
+            job.cleanup()
     
     def transcribe(self, video_file_obj, source_lang: str, target_lang: str, 
                    progress_callback=None) -> Tuple[Optional[str], Optional[str]]:
@@ -101,40 +103,63 @@ class VideoTranscriber:
                 # Construiește prompt-ul
                 prompt = self._build_prompt(source_lang, target_lang)
                 
-                # Generează transcrierea folosind noul API
-                response = self.client.models.generate_content(
-                    model='gemini-2.0-flash-exp',
-                    contents=[video_file_obj, prompt],
-                    config=types.GenerateContentConfig(
-                        temperature=0.3,
-                        max_output_tokens=8192
-                    )
+                # Modelul se alege după politica de tiering; la eșec se
+                # încearcă modelele de rezervă. Ca în app.py: sursa auto
+                # nu înseamnă traducere
+                source = self.LANGUAGES.get(source_lang, "auto-detect")
+                target = self.LANGUAGES.get(target_lang, "Romanian")
+                models = model_router.select_models(
+                    None, False, needs_translation=(source != "auto-detect" and source != target)
                 )
+                text = self._generate_with_fallback(models, [video_file_obj, prompt])
                 
                 if progress_callback:
                     progress_callback(1.0, "Transcriere completă!")
                 
-                return response.text, None
+                return text, None
                 
             except Exception as e:
                 error_msg = str(e)
                 
-                # Verifică dacă trebuie să schimbe cheia
-                should_retry, message = api_manager.handle_api_error(e)
+                # Așteaptă (limită de rată) sau schimbă cheia (invalidă/epuizată)
+                should_retry, message = api_manager.handle_api_error(e, retry_count)
                 
                 if should_retry:
                     retry_count += 1
-                    # Reinițializează cu noua cheie
-                    new_key, _ = api_manager.get_working_key()
-                    if new_key:
-                        self.initialize_client(new_key)
-                        st.warning(message)
-                        continue
+                    if api_manager.client is not self.client:
+                        self.client = api_manager.client
+                    st.warning(message)
+                    continue
                 
                 return None, message
         
         return None, "❌ S-au epuizat toate încercările de transcriere."
     
+    def _generate_with_fallback(self, models: list, contents: list):
+        """
+        Încearcă modelele pe rând și returnează textul complet (cu continuări
+        pentru răspunsurile trunchiate); ridică ultima eroare dacă toate eșuează
+        """
+        last_error = None
+        for model_name in models:
+            def generate(call_contents, model_name=model_name):
+                return self.client.models.generate_content(
+                    model=model_name,
+                    contents=call_contents,
+                    config=types.GenerateContentConfig(
+                        temperature=0.3,
+                        max_output_tokens=8192
+                    )
+                )
+            try:
+                text, _ = generate_complete(generate, contents)
+                return text
+            except Exception as e:
+                last_error = e
+                if not model_router.should_fallback(e):
+                    break
+        raise last_error
+    
     def _build_prompt(self, source_lang: str, target_lang: str) -> str:
         """Construiește prompt-ul pentru transcriere"""
         
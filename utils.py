@@ -1,7 +1,4 @@
 import streamlit as st
-from docx import Document
-from docx.shared import Inches, Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
 from io import BytesIO
 from datetime import datetime
 import uuid
@@ -26,6 +23,9 @@ def set_session_id_in_url(session_id: str):
 def create_word_document(transcription: str, video_name: str, 
                          source_lang: str, target_lang: str) -> BytesIO:
     """Creează un document Word cu transcrierea"""
+    from docx import Document
+    from docx.shared import Pt
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
     
     doc = Document()
     